@@ -0,0 +1,79 @@
+"""
+Parity and throughput check of the ONNX embedding backend against the reference
+Sentence Transformers model.
+
+Encodes a corpus of schema documents and questions with both backends, reports
+the cosine agreement of the two vectors for every text and the throughput of
+each backend, and exits non-zero when any text falls below --min-cosine.
+
+Usage:
+    python benchmarks/embedding_parity.py [--min-cosine 0.97] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from config import Config  # noqa: E402
+from services.embedding_backends import (  # noqa: E402
+    OnnxEmbeddingBackend,
+    SentenceTransformerBackend,
+)
+
+CORPUS = [
+    "Table: dbo.Customers | Columns: CustomerId int PK NOT NULL, Name nvarchar(100), Email nvarchar(256), CreatedAt datetime2",
+    "Table: dbo.Orders | Columns: OrderId int PK NOT NULL, CustomerId int FK->dbo.Customers.CustomerId, OrderDate date, Total decimal(18,2)",
+    "Table: dbo.OrderLines | Columns: OrderLineId bigint PK NOT NULL, OrderId int FK->dbo.Orders.OrderId, ProductId int, Quantity int",
+    "Table: sales.Invoices | Columns: InvoiceId int PK NOT NULL, InvoiceNumber varchar(20), IssuedOn date, DueOn date, Paid bit",
+    "Table: hr.Employees | Columns: EmployeeId int PK NOT NULL, ManagerId int FK->hr.Employees.EmployeeId, HireDate date, Salary money",
+    "How many orders did each customer place last month?",
+    "List the top 10 products by revenue in 2023",
+    "Which invoices are overdue and not paid?",
+    "Show employees hired after 2020 together with their manager",
+    "average order total per customer",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=Config.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--min-cosine", type=float, default=0.97)
+    parser.add_argument("--repeat", type=int, default=3, help="corpus copies used for the throughput run")
+    parser.add_argument("--batch-size", type=int, default=Config.EMBEDDING_BATCH_SIZE)
+    args = parser.parse_args()
+
+    reference = SentenceTransformerBackend(args.model)
+    candidate = OnnxEmbeddingBackend(
+        args.model,
+        onnx_file=Config.EMBEDDING_ONNX_FILE,
+        onnx_path=Config.EMBEDDING_ONNX_PATH,
+        num_threads=Config.EMBEDDING_ONNX_THREADS
+    )
+
+    expected = reference.encode(CORPUS, args.batch_size)
+    actual = candidate.encode(CORPUS, args.batch_size)
+    cosines = (expected * actual).sum(axis=1) / (
+        np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    )
+    print(f"cosine agreement: mean={cosines.mean():.4f} min={cosines.min():.4f}")
+
+    texts = CORPUS * max(args.repeat, 1) * 10
+    for backend in (reference, candidate):
+        start = time.perf_counter()
+        backend.encode(texts, args.batch_size)
+        elapsed = time.perf_counter() - start
+        print(f"{backend.name:24s} {len(texts) / elapsed:10.1f} texts/s")
+
+    failures = [text for text, cosine in zip(CORPUS, cosines) if cosine < args.min_cosine]
+    for text in failures:
+        print(f"below {args.min_cosine}: {text}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
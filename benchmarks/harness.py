@@ -0,0 +1,321 @@
+"""
+Local stand-ins for the benchmark suites: a synthetic catalog, a fake
+MSSQLRepository, a hashing embedding backend and a fully offline QueryAgent.
+
+Nothing here talks to SQL Server, the Gemini API or a model hub, and every
+generator is seeded, so runs are comparable across machines and commits.
+"""
+
+import copy
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from models.query_result import QueryResult  # noqa: E402
+from models.schema_models import ColumnInfo, DatabaseSchema, ForeignKeyInfo, TableInfo  # noqa: E402
+from repositories.query_stream import MaterializedQueryStream  # noqa: E402
+
+SCHEMAS = ["dbo", "sales", "inventory", "hr", "finance", "support"]
+ENTITIES = [
+    "Customer", "Order", "OrderLine", "Product", "Category", "Supplier", "Shipment", "Warehouse",
+    "Employee", "Department", "Invoice", "Payment", "Account", "Ledger", "Campaign", "Ticket",
+    "Region", "Store", "Return", "Promotion", "Contract", "Vendor", "Budget", "Project",
+]
+COLUMN_POOL = [
+    ("Name", "nvarchar", 200, None, None), ("Description", "nvarchar", -1, None, None),
+    ("Status", "nvarchar", 40, None, None), ("Amount", "decimal", None, 18, 2),
+    ("Quantity", "int", None, None, None), ("Price", "money", None, None, None),
+    ("Email", "nvarchar", 510, None, None), ("Phone", "varchar", 30, None, None),
+    ("City", "nvarchar", 100, None, None), ("Country", "nvarchar", 100, None, None),
+    ("StartDate", "date", None, None, None), ("EndDate", "date", None, None, None),
+    ("IsActive", "bit", None, None, None), ("Score", "float", None, None, None),
+    ("Code", "varchar", 20, None, None), ("Notes", "nvarchar", -1, None, None),
+    ("CreatedAt", "datetime2", None, None, None), ("ModifiedBy", "nvarchar", 100, None, None),
+    ("rowguid", "uniqueidentifier", None, None, None), ("Discount", "decimal", None, 5, 2),
+]
+
+
+def generate_catalog(tables, databases=1, seed=0):
+    """
+    Generates a deterministic synthetic catalog.
+
+    Args:
+        tables (int): Tables per database.
+        databases (int, optional): Number of databases, named ``BenchDb0``...
+        seed (int, optional): Random seed.
+
+    Returns:
+        dict: Mapping of database name to a list of ``TableInfo``.
+    """
+    rng = random.Random(seed)
+    modified = datetime(2024, 1, 1)
+    catalog = {}
+    object_id = 1000
+    for database_index in range(databases):
+        database_tables = []
+        for index in range(tables):
+            entity = ENTITIES[index % len(ENTITIES)]
+            round_number = index // len(ENTITIES)
+            name = f"{entity}s" if round_number == 0 else f"{entity}s{round_number}"
+            schema_name = SCHEMAS[(index // 3) % len(SCHEMAS)] if round_number else "dbo"
+            object_id += 1
+            table = TableInfo(
+                schema_name=schema_name,
+                name=name,
+                object_id=object_id,
+                modify_date=(modified + timedelta(minutes=index)).isoformat(),
+                columns=[ColumnInfo(f"{entity}Id", "int", is_nullable=False, is_primary_key=True)],
+            )
+            for column in rng.sample(COLUMN_POOL, rng.randint(4, 16)):
+                column_name, data_type, max_length, precision, scale = column
+                table.columns.append(ColumnInfo(column_name, data_type, max_length, precision, scale))
+            for referenced in rng.sample(database_tables, min(len(database_tables), rng.randint(0, 2))):
+                ref_entity = referenced.columns[0].name
+                if any(column.name == ref_entity for column in table.columns):
+                    continue
+                table.columns.append(ColumnInfo(ref_entity, "int"))
+                table.foreign_keys.append(ForeignKeyInfo(
+                    name=f"FK_{name}_{referenced.name}",
+                    columns=[ref_entity],
+                    referenced_schema=referenced.schema_name,
+                    referenced_table=referenced.name,
+                    referenced_columns=[ref_entity],
+                ))
+            database_tables.append(table)
+        catalog[f"BenchDb{database_index}"] = database_tables
+    return catalog
+
+
+class FakeMSSQLRepository:
+    """
+    In-memory implementation of the ``MSSQLRepository`` interface over a
+    synthetic catalog. Each call sleeps ``latency`` seconds to stand in for a
+    database round trip; queries return ``rows`` synthetic rows (fewer with a
+    smaller ``TOP``).
+    """
+
+    def __init__(self, catalog, latency=0.0, rows=100, server="benchsrv", estimated_cost=1.0):
+        self.catalog = catalog
+        self.latency = latency
+        self.rows = rows
+        self.server = server
+        self.database = next(iter(catalog))
+        self.estimated_cost = estimated_cost
+        self.round_trips = 0
+        self._lock = threading.Lock()
+
+    def alter_tables(self, database, count):
+        """
+        Simulates DDL: bumps the modification date of ``count`` tables.
+        """
+        with self._lock:
+            for table in self.catalog[database][:count]:
+                table.modify_date = (datetime.fromisoformat(table.modify_date) + timedelta(days=1)).isoformat()
+                table.columns.append(ColumnInfo(f"Added{len(table.columns)}", "int"))
+
+    def fetch_schema(self, object_ids=None, database=None):
+        self._round_trip()
+        database = database or self.database
+        wanted = None if object_ids is None else set(object_ids)
+        schema = DatabaseSchema(database_name=database)
+        with self._lock:
+            for table in self.catalog[database]:
+                if wanted is None or table.object_id in wanted:
+                    schema.add_table(copy.deepcopy(table))
+        return schema
+
+    def fetch_schema_details(self):
+        return self.fetch_schema().render()
+
+    def fetch_schema_fingerprint(self, database=None):
+        self._round_trip()
+        with self._lock:
+            tables = self.catalog[database or self.database]
+            return f"{len(tables)}:{max(table.modify_date for table in tables)}"
+
+    def fetch_table_versions(self, database=None):
+        self._round_trip()
+        with self._lock:
+            return {
+                table.object_id: (table.full_name, table.modify_date)
+                for table in self.catalog[database or self.database]
+            }
+
+    def list_databases(self):
+        self._round_trip()
+        return list(self.catalog)
+
+    def execute_query(self, sql_query, max_rows=None, max_bytes=None, database=None, read_only=False):
+        self._round_trip()
+        match = re.search(r"\bTOP\s*\(?\s*(\d+)", sql_query, re.IGNORECASE)
+        count = min(self.rows, int(match.group(1))) if match else self.rows
+        rows = [(index, f"name{index}", index * 1.5) for index in range(count)]
+        return QueryResult(columns=["Id", "Name", "Amount"], rows=rows)
+
+    def stream_query(self, sql_query, batch_size=500, max_rows=None, max_bytes=None, database=None,
+                     read_only=False):
+        return MaterializedQueryStream(self.execute_query(sql_query, database=database), batch_size)
+
+    def fetch_estimated_plan(self, sql_query, database=None):
+        self._round_trip()
+        return f'<ShowPlanXML><StmtSimple StatementSubTreeCost="{self.estimated_cost}"/></ShowPlanXML>'
+
+    def close_connection(self):
+        pass
+
+    def _round_trip(self):
+        with self._lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class HashingEmbeddingBackend:
+    """
+    Deterministic embedding backend for offline runs: signed feature hashing of
+    lower-cased words and identifier parts into an L2-normalized vector. Texts
+    sharing words get similar vectors, which is enough for routing and retrieval
+    to behave plausibly.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dimension=384):
+        self._dimension = dimension
+
+    @property
+    def dimension(self):
+        return self._dimension
+
+    def encode(self, texts, batch_size):
+        matrix = np.zeros((len(texts), self._dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+", text):
+                digest = zlib.crc32(word.lower().encode("utf-8"))
+                matrix[row, digest % self._dimension] += 1.0 if digest & 0x80000000 else -1.0
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+
+def create_embedding_service(backend_name="hashing"):
+    """
+    Creates an EmbeddingService with an in-memory cache.
+
+    Args:
+        backend_name (str, optional): ``hashing`` for the offline backend, or a
+            real backend name (``sentence-transformers``, ``onnx``).
+    """
+    from config import Config
+    from repositories.embedding_cache_repository import EmbeddingCacheRepository
+    from services.embedding_backends import create_embedding_backend
+    from services.embedding_service import EmbeddingService
+
+    if backend_name == HashingEmbeddingBackend.name:
+        backend = HashingEmbeddingBackend()
+    else:
+        backend = create_embedding_backend(backend_name, Config.EMBEDDING_MODEL_NAME)
+    return EmbeddingService(
+        backend=backend, cache_repository=EmbeddingCacheRepository(max_entries=Config.EMBEDDING_CACHE_SIZE)
+    )
+
+
+def create_agent(repository, embedding_service, llm_latency=0.0, use_caches=False, vector_index_type="exact",
+                 cache_dir=None):
+    """
+    Wires a QueryAgent around the fake repository, an in-process vector index
+    and the fake LLM provider.
+
+    Args:
+        repository (FakeMSSQLRepository): Catalog stand-in.
+        embedding_service (EmbeddingService): Embedding service.
+        llm_latency (float, optional): Simulated LLM call latency in seconds.
+        use_caches (bool, optional): Keep the generated-SQL and result caches on.
+            Off by default so every question pays for the full pipeline.
+        vector_index_type (str, optional): ``exact`` or ``ivf``.
+        cache_dir (str, optional): Directory for the schema snapshot. Defaults to
+            a new temporary directory.
+
+    Returns:
+        QueryAgent: Offline agent.
+    """
+    from query_agent import QueryAgent
+    from repositories.numpy_vector_repository import NumpyVectorRepository
+    from repositories.schema_cache_repository import SchemaCacheRepository
+    from services.gemini_service import GeminiService
+    from services.llm_client import FakeLLMProvider, LLMClient
+    from services.result_cache_service import ResultCacheService
+    from services.schema_indexing_service import SchemaIndexingService
+    from services.schema_service import SchemaService
+    from services.sql_cache_service import SQLCacheService
+    from services.vector_search_service import VectorSearchService
+
+    cache_dir = cache_dir or tempfile.mkdtemp(prefix="sql-agent-bench-")
+    schema_service = SchemaService(
+        db_repository=repository,
+        cache_repository=SchemaCacheRepository(os.path.join(cache_dir, "schema_cache.json"))
+    )
+    vector_search_service = VectorSearchService(chroma_repo=NumpyVectorRepository(index_type=vector_index_type))
+    gemini_service = GeminiService(LLMClient(
+        FakeLLMProvider(latency=llm_latency), max_concurrency=64, requests_per_minute=0
+    ))
+    return QueryAgent(
+        schema_service,
+        embedding_service,
+        vector_search_service,
+        gemini_service,
+        repository,
+        SchemaIndexingService(schema_service, embedding_service, vector_search_service),
+        SQLCacheService() if use_caches else SQLCacheService(max_entries=0),
+        result_cache_service=ResultCacheService(enabled=use_caches)
+    )
+
+
+def measure(func, rounds=5, warmup=1):
+    """
+    Runs ``func`` repeatedly and summarizes its wall-clock time, in the manner
+    of pytest-benchmark.
+
+    Args:
+        func (Callable[[], Any]): Code under test.
+        rounds (int, optional): Timed runs.
+        warmup (int, optional): Untimed runs first.
+
+    Returns:
+        dict: ``min``, ``median``, ``mean``, ``stddev`` and ``max`` seconds,
+        ``rounds`` and ``ops`` (runs per second at the median).
+    """
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return summarize(timings)
+
+
+def summarize(timings):
+    median = statistics.median(timings)
+    ordered = sorted(timings)
+    return {
+        "min": ordered[0],
+        "median": median,
+        "mean": statistics.fmean(timings),
+        "stddev": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        "p99": ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))],
+        "max": ordered[-1],
+        "rounds": len(timings),
+        "ops": 1.0 / median if median else float("inf"),
+    }
@@ -0,0 +1,62 @@
+"""
+Question corpus for the benchmark suites: natural language questions phrased
+over the tables and columns of a synthetic catalog.
+"""
+
+import random
+import re
+
+TEMPLATES = [
+    "How many {table} are there?",
+    "List all {table} with their {column}",
+    "Show the top 10 {table} by {column}",
+    "What is the total {column} of {table}?",
+    "What is the average {column} per {other}?",
+    "Count {table} grouped by {column}",
+    "Which {other} has the most {table}?",
+    "Show {table} where {column} is missing",
+    "List {table} together with their {other} {other_column}",
+    "Find {table} created in the last 30 days",
+    "What is the highest {column} among {table}?",
+    "Show the number of {table} per {other} and {column}",
+    "Which {table} have no {other}?",
+    "Give me the {column} and {other_column} of every {other} with {table}",
+    "Compare the {column} of {table} across {other}",
+]
+
+
+def _words(identifier):
+    return " ".join(part.lower() for part in re.findall(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+", identifier))
+
+
+def generate_questions(catalog_tables, count, seed=0):
+    """
+    Generates a deterministic list of questions.
+
+    Args:
+        catalog_tables (List[TableInfo]): Tables of one database.
+        count (int): Number of questions.
+        seed (int, optional): Random seed.
+
+    Returns:
+        List[str]: Questions; each is unique so caches never hide pipeline cost.
+    """
+    rng = random.Random(seed)
+    questions = []
+    seen = set()
+    while len(questions) < count:
+        table = rng.choice(catalog_tables)
+        other = rng.choice(catalog_tables)
+        fields = {
+            "table": _words(table.name),
+            "column": _words(rng.choice(table.columns[1:] or table.columns).name),
+            "other": _words(other.name),
+            "other_column": _words(rng.choice(other.columns).name),
+        }
+        question = rng.choice(TEMPLATES).format(**fields)
+        if question in seen:
+            # Keep questions unique without changing their shape
+            question = f"{question} (variant {len(questions)})"
+        seen.add(question)
+        questions.append(question)
+    return questions
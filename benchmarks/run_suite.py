@@ -0,0 +1,252 @@
+"""
+Offline benchmark suite: schema extraction, embedding throughput, vector top-k
+search and end-to-end ``full_query_workflow`` latency/throughput at several
+concurrency levels, on synthetic catalogs of configurable size.
+
+SQL Server, Gemini and Chroma are replaced by the stand-ins in ``harness.py``,
+with optional simulated latencies, so runs need no credentials or network.
+Results can be saved as a baseline and later runs compared against it; the
+script exits with status 1 when a median regresses beyond the tolerance.
+
+Usage:
+    python benchmarks/run_suite.py [--suites schema,embedding,vector,workflow]
+        [--sizes 10,1000,10000] [--concurrency 1,4,16]
+        [--save-baseline benchmarks/baselines/local.json]
+        [--compare benchmarks/baselines/local.json --tolerance 0.25]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from harness import (
+    FakeMSSQLRepository, create_agent, create_embedding_service, generate_catalog, measure, summarize
+)
+from questions import generate_questions
+
+import metrics  # noqa: E402  (on the path once harness is imported)
+from repositories.numpy_vector_repository import NumpyVectorRepository  # noqa: E402
+from repositories.schema_cache_repository import SchemaCacheRepository  # noqa: E402
+from services.gemini_service import GeminiService  # noqa: E402
+from services.llm_client import FakeLLMProvider, LLMClient  # noqa: E402
+from services.prompt_builder import PromptBuilder  # noqa: E402
+from services.schema_service import SchemaService  # noqa: E402
+
+SUITES = ["schema", "embedding", "vector", "workflow"]
+
+
+def schema_suite(args, results):
+    for size in args.sizes:
+        catalog = generate_catalog(size)
+        repository = FakeMSSQLRepository(catalog, latency=args.db_latency)
+        database = repository.database
+
+        def cold():
+            with tempfile.TemporaryDirectory() as cache_dir:
+                service = SchemaService(repository, SchemaCacheRepository(os.path.join(cache_dir, "cache.json")))
+                service.get_schema(database)
+
+        results[f"schema_extraction[cold-{size}]"] = measure(cold, args.rounds)
+
+        cache_dir = tempfile.mkdtemp(prefix="sql-agent-bench-")
+        service = SchemaService(repository, SchemaCacheRepository(os.path.join(cache_dir, "cache.json")),
+                                check_interval=0)
+        service.get_schema(database)
+        results[f"schema_extraction[warm-{size}]"] = measure(lambda: service.get_schema(database), args.rounds)
+
+        # 1% of the tables change between calls
+        changed = max(1, size // 100)
+
+        def incremental():
+            repository.alter_tables(database, changed)
+            service.get_schema(database)
+
+        results[f"schema_extraction[incremental-{size}]"] = measure(incremental, args.rounds)
+
+        builder = PromptBuilder(GeminiService(LLMClient(FakeLLMProvider())).build_prompt)
+        schema = service.get_schema(database)
+        question = generate_questions(catalog[database], 1)[0]
+        results[f"prompt_build[{size}]"] = measure(lambda: builder.build(schema, [], question), args.rounds)
+
+
+def embedding_suite(args, results):
+    for size in args.sizes:
+        catalog = generate_catalog(size)
+        documents = [table.render() for table in next(iter(catalog.values()))]
+
+        def encode():
+            # A fresh service per round so the embedding cache never answers
+            create_embedding_service(args.embedding_backend).generate_embeddings(documents)
+
+        stats = measure(encode, args.rounds)
+        stats["texts_per_second"] = len(documents) / stats["median"]
+        results[f"embedding_throughput[{args.embedding_backend}-{size}]"] = stats
+
+
+def vector_suite(args, results):
+    embedding_service = create_embedding_service(args.embedding_backend)
+    for size in args.sizes:
+        catalog = generate_catalog(size, databases=2)
+        ids, documents, metadatas = [], [], []
+        for database, tables in catalog.items():
+            for table in tables:
+                ids.append(f"benchsrv/{database}:{table.full_name}")
+                documents.append(table.render())
+                metadatas.append({"server": "benchsrv", "database": database,
+                                  "schema": table.schema_name, "table": table.name})
+        vectors = embedding_service.generate_embeddings(documents)
+        queries = embedding_service.generate_embeddings(generate_questions(catalog["BenchDb0"], args.queries))
+        where = {"$and": [{"server": "benchsrv"}, {"database": "BenchDb0"}]}
+
+        index_types = ["exact"] + (["ivf"] if size >= 1000 else [])
+        for index_type in index_types:
+            def upsert():
+                repository = NumpyVectorRepository(index_type=index_type)
+                repository.add_embeddings(ids, documents, vectors, metadatas)
+                return repository
+
+            results[f"vector_upsert[{index_type}-{size}]"] = measure(upsert, args.rounds)
+
+            repository = upsert()
+            repository.train()
+            repository.query_similar_schemas(queries[0], top_k=5, where=where)
+            latencies = []
+            for query in queries:
+                start = time.perf_counter()
+                repository.query_similar_schemas(query, top_k=5, where=where)
+                latencies.append(time.perf_counter() - start)
+            results[f"vector_topk[{index_type}-{size}]"] = summarize(latencies)
+
+
+def workflow_suite(args, results):
+    embedding_service = create_embedding_service(args.embedding_backend)
+    for size in args.sizes:
+        catalog = generate_catalog(size)
+        repository = FakeMSSQLRepository(catalog, latency=args.db_latency)
+        agent = create_agent(repository, embedding_service, llm_latency=args.llm_latency)
+        database = repository.database
+        # Index once up front; steady-state latency is what the suite tracks
+        agent.schema_indexing_service.index_schema(database)
+
+        for concurrency in args.concurrency:
+            questions = generate_questions(catalog[database], args.questions, seed=concurrency)
+            metrics.registry.reset()
+
+            def run(question):
+                start = time.perf_counter()
+                agent.full_query_workflow(question, database, execute_sql=True)
+                return time.perf_counter() - start
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                latencies = list(executor.map(run, questions))
+            elapsed = time.perf_counter() - start
+
+            stats = summarize(latencies)
+            stats["throughput_qps"] = len(questions) / elapsed
+            stats["stages_p50"] = {
+                histogram["labels"]["stage"]: histogram["p50"]
+                for histogram in metrics.registry.to_json()["histograms"]
+                if histogram["name"] == "stage_duration_seconds" and histogram["labels"].get("status") == "ok"
+                and "kind" not in histogram["labels"]
+            }
+            results[f"workflow[{size}-c{concurrency}]"] = stats
+
+
+def print_results(results):
+    print(f"{'benchmark':<42} {'min':>10} {'median':>10} {'mean':>10} {'p99':>10} {'ops':>10}  extra")
+    for name, stats in results.items():
+        extra = ""
+        if "texts_per_second" in stats:
+            extra = f"{stats['texts_per_second']:.0f} texts/s"
+        elif "throughput_qps" in stats:
+            extra = f"{stats['throughput_qps']:.1f} q/s"
+        print(f"{name:<42} {stats['min'] * 1000:>8.2f}ms {stats['median'] * 1000:>8.2f}ms "
+              f"{stats['mean'] * 1000:>8.2f}ms {stats['p99'] * 1000:>8.2f}ms {stats['ops']:>10.1f}  {extra}")
+        if "stages_p50" in stats:
+            stages = ", ".join(f"{stage} {seconds * 1000:.2f}ms" for stage, seconds in sorted(stats["stages_p50"].items()))
+            print(f"{'':<42} p50 by stage: {stages}")
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares medians against a baseline.
+
+    Returns:
+        List[str]: Benchmarks whose median regressed beyond the tolerance.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<42} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, stats in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        change = stats["median"] / reference["median"] - 1 if reference["median"] else 0.0
+        flag = ""
+        if change > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<42} {reference['median'] * 1000:>8.2f}ms {stats['median'] * 1000:>8.2f}ms "
+              f"{change * 100:>+7.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suites", default=",".join(SUITES))
+    parser.add_argument("--sizes", default="10,1000,10000", help="tables per synthetic catalog")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200, help="vector queries per index")
+    parser.add_argument("--questions", type=int, default=48, help="workflow questions per concurrency level")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="simulated Gemini latency in seconds")
+    parser.add_argument("--db-latency", type=float, default=0.002, help="simulated round-trip latency in seconds")
+    parser.add_argument("--embedding-backend", default="hashing",
+                        help="hashing (offline), sentence-transformers or onnx")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--save-baseline", help="write results as a baseline JSON file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed median slowdown, e.g. 0.25")
+    args = parser.parse_args()
+    args.sizes = [int(size) for size in args.sizes.split(",")]
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+
+    suites = {"schema": schema_suite, "embedding": embedding_suite, "vector": vector_suite,
+              "workflow": workflow_suite}
+    results = {}
+    for name in args.suites.split(","):
+        print(f"running {name} suite...", file=sys.stderr)
+        suites[name](args, results)
+
+    print_results(results)
+    report = {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor(), "cpus": os.cpu_count()},
+        "settings": {key: value for key, value in vars(args).items()
+                     if key not in ("output", "save_baseline", "compare")},
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("machine") != report["machine"]:
+            print("warning: baseline was recorded on a different machine", file=sys.stderr)
+        regressions = compare(results, baseline["results"], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
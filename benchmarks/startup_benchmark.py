@@ -0,0 +1,83 @@
+"""
+Startup benchmark for the Streamlit app.
+
+Measures, each in a fresh interpreter:
+  * import cost of the modules the app script imports on every rerun
+  * cold creation time of each heavy resource (requires the real dependencies
+    and a reachable database; enable with --create)
+  * warm lookup cost of an already created resource, i.e. the rerun overhead
+
+Usage:
+    python benchmarks/startup_benchmark.py [--create] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+_IMPORT_SNIPPET = """
+import json, time
+start = time.perf_counter()
+import resources
+import query_agent
+from models.query_result import QueryResult
+print(json.dumps({"import_seconds": time.perf_counter() - start}))
+"""
+
+_CREATE_SNIPPET = """
+import json, time
+import resources
+timings = {}
+for name in ["embedding_service", "mssql_repository", "vector_repository", "gemini_service", "query_agent"]:
+    start = time.perf_counter()
+    resources.registry.get(name)
+    timings[name + "_cold_seconds"] = time.perf_counter() - start
+start = time.perf_counter()
+for _ in range(1000):
+    resources.get_query_agent()
+timings["rerun_lookup_seconds"] = (time.perf_counter() - start) / 1000
+print(json.dumps(timings))
+"""
+
+
+def run_snippet(snippet):
+    """
+    Runs a snippet in a fresh interpreter with ``src`` on the path.
+
+    Returns:
+        dict: Timings printed by the snippet as JSON.
+    """
+    env = dict(os.environ, PYTHONPATH=SRC_DIR, PREWARM_RESOURCES="false")
+    output = subprocess.run(
+        [sys.executable, "-c", snippet], env=env, cwd=SRC_DIR,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--create", action="store_true", help="also measure cold resource creation")
+    parser.add_argument("--repeat", type=int, default=5, help="number of fresh interpreters per measurement")
+    args = parser.parse_args()
+
+    samples = {}
+    for _ in range(args.repeat):
+        timings = run_snippet(_IMPORT_SNIPPET)
+        if args.create:
+            timings.update(run_snippet(_CREATE_SNIPPET))
+        for key, value in timings.items():
+            samples.setdefault(key, []).append(value)
+
+    for key, values in samples.items():
+        print(f"{key:40s} median={statistics.median(values) * 1000:10.3f} ms  "
+              f"min={min(values) * 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
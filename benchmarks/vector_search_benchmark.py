@@ -0,0 +1,109 @@
+"""
+Vector search benchmark: ChromaRepository vs NumpyVectorRepository (exact and IVF).
+
+Indexes synthetic unit vectors spread over several databases and measures
+top-k query latency with a per-database metadata filter, plus recall@k of
+each backend against the exact NumPy search. Exits with status 1 if a filtered
+query returns fewer than ``min(k, rows matching the filter)`` results.
+
+Usage:
+    python benchmarks/vector_search_benchmark.py [--documents 20000] [--queries 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from repositories.numpy_vector_repository import NumpyVectorRepository  # noqa: E402
+
+
+def build_corpus(documents, dimension, databases, seed=0):
+    # Clustered like real text embeddings: related tables share a topic direction.
+    rng = np.random.default_rng(seed)
+    topics = rng.normal(size=(max(documents // 200, 1), dimension))
+    vectors = (topics[rng.integers(len(topics), size=documents)]
+               + rng.normal(scale=0.5, size=(documents, dimension))).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"db{i % databases}:dbo.Table{i}" for i in range(documents)]
+    metadatas = [
+        {"database": f"db{i % databases}", "schema": "dbo", "table": f"Table{i}"} for i in range(documents)
+    ]
+    texts = [f"Table: dbo.Table{i} | Columns: Id int PK" for i in range(documents)]
+    return ids, texts, vectors, metadatas
+
+
+def create_backends(nprobe):
+    backends = {
+        "numpy-exact": NumpyVectorRepository(index_type="exact"),
+        "numpy-ivf": NumpyVectorRepository(index_type="ivf", nprobe=nprobe),
+    }
+    try:
+        from repositories.chroma_repository import ChromaRepository
+        backends["chroma"] = ChromaRepository(persist_directory=None, collection_name="benchmark")
+    except Exception as e:
+        print(f"skipping chroma: {str(e)}")
+    return backends
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20000)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--databases", type=int, default=4)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=8)
+    args = parser.parse_args()
+
+    ids, texts, vectors, metadatas = build_corpus(args.documents, args.dimension, args.databases)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), args.queries)] + rng.normal(
+        scale=0.05, size=(args.queries, args.dimension)
+    ).astype(np.float32)
+
+    backends = create_backends(args.nprobe)
+    rows_per_database = {}
+    for metadata in metadatas:
+        rows_per_database[metadata["database"]] = rows_per_database.get(metadata["database"], 0) + 1
+    truth = None
+    short = 0
+    for name, backend in backends.items():
+        start = time.perf_counter()
+        for offset in range(0, len(ids), 5000):
+            end = offset + 5000
+            backend.add_embeddings(ids[offset:end], texts[offset:end], vectors[offset:end], metadatas[offset:end])
+        if hasattr(backend, "train"):
+            # Train IVF clusters up front instead of in the background during queries
+            backend.train()
+        index_seconds = time.perf_counter() - start
+
+        latencies = []
+        results = []
+        for number, query in enumerate(queries):
+            where = {"database": f"db{number % args.databases}"}
+            start = time.perf_counter()
+            found = backend.query_similar_schemas(query, args.top_k, where)
+            latencies.append(time.perf_counter() - start)
+            results.append(set(found["ids"][0]))
+            if len(found["ids"][0]) < min(args.top_k, rows_per_database[where["database"]]):
+                short += 1
+                print(f"{name}: query {number} returned {len(found['ids'][0])} of {args.top_k} results")
+
+        if truth is None:
+            truth = results
+        recall = statistics.mean(len(found & expected) / args.top_k for found, expected in zip(results, truth))
+        latencies.sort()
+        print(f"{name:12s} index={index_seconds:7.2f}s  "
+              f"p50={latencies[len(latencies) // 2] * 1000:8.3f} ms  "
+              f"p99={latencies[int(len(latencies) * 0.99) - 1] * 1000:8.3f} ms  recall@{args.top_k}={recall:.3f}")
+    return 1 if short else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
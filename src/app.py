@@ -1,32 +1,14 @@
 import streamlit as st
-from query_agent import QueryAgent
-from services.schema_service import SchemaService
-from services.embedding_service import EmbeddingService
-from services.vector_search_service import VectorSearchService
-from services.gemini_service import GeminiService
-from repositories.mssql_repository import MSSQLRepository
-from repositories.chroma_repository import ChromaRepository
+import resources
 from config import Config
+from models.query_result import QueryResult, unique_column_labels
+from repositories.query_stream import MaterializedQueryStream
 
-# Initialize repositories
-mssql_repo = MSSQLRepository()
-chroma_repo = ChromaRepository()
-
-# Initialize services with their dependencies
-schema_service = SchemaService(db_repository=mssql_repo)
-embedding_service = EmbeddingService()
-vector_search_service = VectorSearchService(chroma_repo=chroma_repo)
-gemini_service = GeminiService()
-sql_executor = mssql_repo
-
-# Initialize Facade Service
-query_agent = QueryAgent(
-    schema_service,
-    embedding_service,
-    vector_search_service,
-    gemini_service,
-    sql_executor
-)
+# Heavy dependencies (models, DB and vector store clients) are created lazily,
+# once per process, and survive Streamlit reruns. Start building them in the
+# background so the first request does not pay for model loading.
+resources.prewarm()
+resources.start_metrics()
 
 # Streamlit App UI
 st.title("🦾 Natural Language to SQL Agent")
@@ -35,7 +17,7 @@ st.markdown("Convert natural language queries to executable MS SQL queries via G
 
 # User Inputs
 user_query = st.text_input("🔍 Enter your Text so that I can generate a SQL query for you:")
-database_name = st.text_input("💾 Enter database name:")
+database_name = st.text_input("💾 Enter database name (leave empty to detect it from the question):")
 
 # Initialize session state variables
 if "sql_query" not in st.session_state:
@@ -44,35 +26,90 @@ if "query_result" not in st.session_state:
     st.session_state["query_result"] = None
 if "similar_schemas" not in st.session_state:
     st.session_state["similar_schemas"] = None
+if "query_stream" not in st.session_state:
+    st.session_state["query_stream"] = None
+if "plans" not in st.session_state:
+    st.session_state["plans"] = {}  # plan_id -> QueryPlan generated in this session
+if "plan_id" not in st.session_state:
+    st.session_state["plan_id"] = None
+
+
+def close_query_stream():
+    """Drops the pages of the previous result."""
+    if st.session_state["query_stream"] is not None:
+        st.session_state["query_stream"].close()
+        st.session_state["query_stream"] = None
+
 
 if st.button("📝 Generate SQL (Review Before Execution)"):
-    if not user_query or not database_name:
-        st.error("Please provide both the query and database name.")
+    if not user_query:
+        st.error("Please provide a query.")
     else:
         with st.spinner("Generating SQL..."):
             try:
-                result = query_agent.full_query_workflow(user_query, database_name, execute_sql=False)
-                st.session_state["sql_query"] = result["sql_query"]
-                st.session_state["similar_schemas"] = result["similar_schemas"]
+                # Show the SQL as the model writes it
+                preview = st.empty()
+                agent = resources.get_query_agent()
+                plan = agent.generate_plan(
+                    user_query, agent.resolve_database(database_name) if database_name.strip() else None,
+                    on_chunk=lambda text: preview.code(text, language="sql")
+                )
+                preview.empty()
+                st.session_state["plans"][plan.plan_id] = plan
+                st.session_state["plan_id"] = plan.plan_id
+                st.session_state["sql_query"] = plan.sql_query
+                st.session_state["similar_schemas"] = plan.similar_schemas
+                close_query_stream()
                 st.session_state["query_result"] = None  # Reset previous result
             except Exception as e:
                 st.error(f"An error occurred: {str(e)}")
 
 if st.session_state["sql_query"]:
     st.subheader("📝 Generated SQL Query")
+    plan = st.session_state["plans"][st.session_state["plan_id"]]
+    caption = f"Database: {plan.database_name}"
+    if plan.cache_hit == "exact":
+        caption += " · From cache (same question)"
+    elif plan.cache_hit == "semantic":
+        caption += f" · From cache (similar question: \"{plan.cached_question}\")"
+    if plan.prompt_tokens is not None:
+        caption += f" · Prompt: {plan.prompt_tokens} tokens"
+    if plan.estimated_cost is not None:
+        caption += f" · Estimated cost: {plan.estimated_cost:.2f}"
+    st.caption(caption)
+    for warning in plan.guard_warnings:
+        st.warning(warning)
     st.code(st.session_state["sql_query"], language="sql")
 
     if st.button("🚀 Execute SQL Query"):
         with st.spinner("Executing SQL..."):
             try:
-                result = query_agent.full_query_workflow(user_query, database_name, execute_sql=True)
-                st.session_state["query_result"] = result["query_result"]
+                close_query_stream()
+                # Execute exactly the reviewed plan; nothing is regenerated. The rows
+                # (up to the row and size caps) are fetched before the connection goes
+                # back to the pool, so an open result view never holds a connection.
+                query_result = resources.get_query_agent().execute_plan(plan)
+                stream = MaterializedQueryStream(query_result, Config.QUERY_BATCH_SIZE)
+                st.session_state["query_stream"] = stream
+                st.session_state["query_result"] = QueryResult(columns=stream.columns, rows=stream.fetch_page())
             except Exception as e:
                 st.error(f"An error occurred: {str(e)}")
 
 if st.session_state["query_result"] is not None:
     st.subheader("📊 Query Results")
-    st.write(st.session_state["query_result"])
+    stream = st.session_state["query_stream"]
+    query_result = st.session_state["query_result"]
+
+    if stream is not None and not stream.exhausted and st.button("⬇️ Load more rows"):
+        query_result.rows.extend(stream.fetch_page())
+
+    if stream is not None:
+        query_result.truncated = stream.truncated
+    # Columns by position, so repeated names such as o.Id and c.Id both show
+    st.dataframe(dict(zip(unique_column_labels(query_result.columns), query_result.to_column_arrays())))
+    st.caption(f"{query_result.row_count} rows")
+    if query_result.truncated:
+        st.warning("Result truncated at the configured row or size limit.")
 
 # Optional: Footer
 st.markdown("---")
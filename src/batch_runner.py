@@ -0,0 +1,371 @@
+"""
+Headless batch mode: translates (and optionally executes) many questions with
+a bounded worker pool, writing one result record per input question.
+
+Usage:
+    python src/batch_runner.py questions.jsonl --output results.jsonl [--execute] [--resume]
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+from config import Config
+from models.batch_report import BatchReport
+
+logger = logging.getLogger(__name__)
+
+
+def read_questions(path, question_field="question", database_field="database", id_field="id"):
+    """
+    Reads questions from a JSONL or CSV file.
+
+    Args:
+        path (str): ``.jsonl``/``.json`` file with one object per line, or ``.csv``
+            file with a header row.
+        question_field (str, optional): Field holding the question.
+        database_field (str, optional): Field holding the target database; rows
+            without one are routed to the best matching database.
+        id_field (str, optional): Field holding a stable question id. Defaults to
+            the 1-based row number.
+
+    Returns:
+        List[dict]: Items with ``id``, ``question`` and ``database`` keys.
+    """
+    try:
+        with open(path, encoding="utf-8", newline="") as f:
+            if path.lower().endswith(".csv"):
+                rows = list(csv.DictReader(f))
+            else:
+                rows = [json.loads(line) for line in f if line.strip()]
+    except Exception as e:
+        raise Exception(f"Failed to read questions from {path}: {str(e)}")
+
+    items = []
+    for number, row in enumerate(rows, start=1):
+        question = (row.get(question_field) or "").strip()
+        if not question:
+            logger.warning(f"Skipping row {number} of {path}: no {question_field}")
+            continue
+        items.append({
+            "id": str(row.get(id_field) or number),
+            "question": question,
+            "database": row.get(database_field) or None,
+        })
+    return items
+
+
+def question_key(question, database):
+    """
+    Dedupe key of a question: case- and whitespace-insensitive, per database.
+    """
+    return " ".join(question.split()).casefold(), database or ""
+
+
+class BatchRunner:
+    """
+    Runs questions through a QueryAgent in parallel.
+
+    Questions are deduplicated, embedded in batches ahead of the workers (the
+    workers then hit the embedding cache) and processed by a bounded thread
+    pool. LLM calls are additionally capped and rate limited by the agent's
+    ``LLMClient``. Records are appended to a JSONL file as they complete, which
+    doubles as the checkpoint a resumed run skips finished questions from.
+    """
+
+    def __init__(self, query_agent, workers=Config.BATCH_WORKERS, window_size=Config.BATCH_WINDOW_SIZE,
+                 execute_sql=False, include_rows=False):
+        """
+        Args:
+            query_agent (QueryAgent): Agent to run questions through.
+            workers (int, optional): Questions in flight at once.
+            window_size (int, optional): Questions embedded per batch, and the
+                number queued ahead of the workers.
+            execute_sql (bool, optional): Also execute the generated SQL.
+            include_rows (bool, optional): Include result rows in the records,
+                not just row counts.
+        """
+        self.query_agent = query_agent
+        self.workers = max(1, workers)
+        self.window_size = max(1, window_size)
+        self.execute_sql = execute_sql
+        self.include_rows = include_rows
+
+    def run(self, items, output_path, resume=False):
+        """
+        Processes questions and writes one record per item.
+
+        Args:
+            items (List[dict]): Items from ``read_questions``.
+            output_path (str): ``.jsonl`` or ``.parquet`` file. Parquet output is
+                staged in ``<output_path>.partial.jsonl`` and written at the end.
+            resume (bool, optional): Skip items already recorded as succeeded in
+                the output (or staging) file instead of starting over.
+
+        Returns:
+            BatchReport: Counts and throughput of the run.
+        """
+        parquet = output_path.lower().endswith(".parquet")
+        if parquet:
+            _import_pyarrow()
+        checkpoint_path = f"{output_path}.partial.jsonl" if parquet else output_path
+
+        groups = OrderedDict()
+        for item in items:
+            groups.setdefault(question_key(item["question"], item["database"]), []).append(item)
+
+        done = set()
+        if resume and os.path.exists(checkpoint_path):
+            done = {record["id"] for record in _read_records(checkpoint_path) if record["status"] == "ok"}
+        pending = [group for group in groups.values() if any(item["id"] not in done for item in group)]
+
+        report = BatchReport(total=len(items), unique=len(groups), duplicates=len(items) - len(groups),
+                             resumed=sum(1 for item in items if item["id"] in done))
+        logger.info(f"Batch of {report.total} questions: {report.unique} unique, {len(pending)} to process")
+
+        if resume:
+            _end_last_line(checkpoint_path)
+
+        latencies = []
+        metrics_checkpoint = metrics.registry.checkpoint()
+        start = time.perf_counter()
+        try:
+            with open(checkpoint_path, "a" if resume else "w", encoding="utf-8") as output, \
+                    ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="batch") as executor:
+                in_flight = {}
+                try:
+                    for offset in range(0, len(pending), self.window_size):
+                        window = pending[offset:offset + self.window_size]
+                        self._embed([group[0]["question"] for group in window])
+                        for group in window:
+                            in_flight[executor.submit(self._process, group[0])] = group
+                        # Keep at most one window queued behind the one being processed
+                        while len(in_flight) > self.window_size:
+                            self._drain(in_flight, output, report, latencies)
+                    while in_flight:
+                        self._drain(in_flight, output, report, latencies)
+                except BaseException:
+                    # On an error or Ctrl-C, drop the queued questions but record the
+                    # ones already answered, so a resumed run does not pay for them again
+                    executor.shutdown(cancel_futures=True)
+                    finished = [future for future in in_flight if not future.cancelled()]
+                    self._write(finished, in_flight, output, report, latencies)
+                    raise
+        except Exception as e:
+            raise Exception(f"Failed to run batch: {str(e)}")
+        finally:
+            report.elapsed_seconds = time.perf_counter() - start
+
+        if latencies:
+            ordered = sorted(latencies)
+            report.latency_p50 = statistics.median(ordered)
+            report.latency_p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+            report.latency_max = ordered[-1]
+        for histogram in metrics.registry.to_json(since=metrics_checkpoint)["histograms"]:
+            labels = histogram["labels"]
+            if histogram["name"] == "stage_duration_seconds" and labels.get("status") == "ok":
+                stage = f"{labels['stage']}[{labels['kind']}]" if "kind" in labels else labels["stage"]
+                report.stages_p50[stage] = histogram["p50"]
+
+        if resume or parquet:
+            # Keep the latest record per item, in input order
+            latest = {record["id"]: record for record in _read_records(checkpoint_path)}
+            records = [latest[item["id"]] for item in items if item["id"] in latest]
+            if parquet:
+                _write_parquet(records, output_path)
+                os.remove(checkpoint_path)
+            else:
+                _write_jsonl(records, output_path)
+        return report
+
+    def _embed(self, questions):
+        """
+        Embeds a window of questions in one batch so the workers hit the cache.
+        """
+        try:
+            with metrics.span("embed", kind="batch"):
+                self.query_agent.embedding_service.generate_embeddings(questions)
+        except Exception as e:
+            # Workers embed their question on their own if this fails
+            logger.warning(f"Failed to pre-embed {len(questions)} questions: {str(e)}")
+
+    def _process(self, item):
+        """
+        Generates (and optionally executes) the SQL of one question.
+
+        Returns:
+            dict: Result record, with ``status`` ``ok`` or ``error``.
+        """
+        record = {"id": item["id"], "question": item["question"], "database": item["database"]}
+        start = time.perf_counter()
+        try:
+            plan = self.query_agent.generate_plan(item["question"], item["database"])
+            record.update({
+                "status": "ok",
+                "routed_database": plan.database_name,
+                "sql_query": plan.sql_query,
+                "cache_hit": plan.cache_hit,
+                "prompt_tokens": plan.prompt_tokens,
+                "estimated_cost": plan.estimated_cost,
+                "warnings": plan.guard_warnings,
+            })
+            if self.execute_sql:
+                query_result = self.query_agent.execute_plan(plan)
+                record.update({
+                    "row_count": query_result.row_count,
+                    "truncated": query_result.truncated,
+                    "columns": query_result.columns,
+                })
+                if self.include_rows:
+                    record["rows"] = [list(row) for row in query_result.rows]
+        except Exception as e:
+            record.update({"status": "error", "error": str(e)})
+        record["latency_seconds"] = round(time.perf_counter() - start, 4)
+        metrics.increment("batch_questions_total", status=record["status"])
+        return record
+
+    def _drain(self, in_flight, output, report, latencies):
+        """
+        Waits for at least one question to finish and writes its records.
+        """
+        finished, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        self._write(finished, in_flight, output, report, latencies)
+
+    def _write(self, finished, in_flight, output, report, latencies):
+        """
+        Writes the records of finished questions and removes them from ``in_flight``.
+        """
+        for future in finished:
+            group = in_flight.pop(future)
+            record = future.result()
+            latencies.append(record["latency_seconds"])
+            if record["status"] == "ok":
+                report.succeeded += 1
+                report.cache_hits += record["cache_hit"] is not None
+                report.executed += "row_count" in record
+            else:
+                report.failed += 1
+                logger.warning(f"Question {record['id']} failed: {record['error']}")
+            # Duplicates share the first occurrence's result
+            for position, item in enumerate(group):
+                copy = dict(record, id=item["id"], question=item["question"])
+                if position:
+                    copy["duplicate_of"] = group[0]["id"]
+                output.write(json.dumps(copy, default=str) + "\n")
+            output.flush()
+
+
+def _read_records(path):
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A run killed mid-write leaves a partial last line
+                logger.warning(f"Ignoring unreadable line in {path}")
+    return records
+
+
+def _end_last_line(path):
+    """
+    Terminates a partial last line left by a killed run, so appended records
+    start on a line of their own.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.write(b"\n")
+
+
+def _write_jsonl(records, path):
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, default=str) + "\n")
+    os.replace(temp_path, path)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise Exception(f"Parquet output requires pyarrow: {str(e)}")
+    return pyarrow, pyarrow.parquet
+
+
+def _write_parquet(records, path):
+    pa, pq = _import_pyarrow()
+    for record in records:
+        # Result values have mixed types per column; keep them as JSON text
+        if "rows" in record:
+            record["rows"] = json.dumps(record["rows"], default=str)
+    temp_path = f"{path}.tmp"
+    pq.write_table(pa.Table.from_pylist(records), temp_path)
+    os.replace(temp_path, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Translate a file of questions to SQL in parallel.")
+    parser.add_argument("input", help=".jsonl or .csv file of questions")
+    parser.add_argument("--output", required=True, help=".jsonl or .parquet results file")
+    parser.add_argument("--database", help="database for questions that do not name one")
+    parser.add_argument("--question-field", default="question")
+    parser.add_argument("--database-field", default="database")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--execute", action="store_true", help="also execute the generated SQL")
+    parser.add_argument("--include-rows", action="store_true", help="include result rows in the output")
+    parser.add_argument("--resume", action="store_true", help="skip questions already in the output")
+    parser.add_argument("--workers", type=int, default=Config.BATCH_WORKERS)
+    parser.add_argument("--window-size", type=int, default=Config.BATCH_WINDOW_SIZE)
+    parser.add_argument("--llm-concurrency", type=int, default=Config.LLM_MAX_CONCURRENCY)
+    parser.add_argument("--requests-per-minute", type=float, default=Config.LLM_REQUESTS_PER_MINUTE,
+                        help="LLM request rate limit, 0 to disable")
+    parser.add_argument("--report", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    import resources
+    from services.gemini_service import GeminiService
+    from services.llm_client import LLMClient, create_llm_provider
+
+    # One LLM client shared by all workers enforces the batch's limits
+    resources.registry.register("gemini_service", lambda: GeminiService(LLMClient(
+        create_llm_provider(), max_concurrency=args.llm_concurrency, requests_per_minute=args.requests_per_minute
+    )))
+    resources.start_metrics()
+
+    items = read_questions(args.input, args.question_field, args.database_field, args.id_field)
+    if args.database:
+        for item in items:
+            item["database"] = item["database"] or args.database
+
+    query_agent = resources.get_query_agent()
+    if any(item["database"] is None for item in items):
+        # Routing compares indexed tables only; index the routable databases first
+        query_agent.schema_indexing_service.index_databases(Config.DB_DATABASES)
+    runner = BatchRunner(query_agent, workers=args.workers, window_size=args.window_size,
+                         execute_sql=args.execute, include_rows=args.include_rows)
+    try:
+        report = runner.run(items, args.output, resume=args.resume)
+    finally:
+        query_agent.close()
+    print(report.render())
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(dict(vars(report), questions_per_second=report.questions_per_second), f, indent=2)
+    return 1 if report.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
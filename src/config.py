@@ -10,4 +10,105 @@ class Config:
     DB_DATABASE = os.getenv("DB_DATABASE")
     DB_USER = os.getenv("DB_USER")
     DB_PASSWORD = os.getenv("DB_PASSWORD")
+    # SQL login for generated queries; grant it db_datareader only
+    DB_READONLY_USER = os.getenv("DB_READONLY_USER")
+    DB_READONLY_PASSWORD = os.getenv("DB_READONLY_PASSWORD")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+
+    # Database connection pool
+    DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+    DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "30"))
+
+    # Schema cache
+    SCHEMA_CACHE_PATH = os.getenv("SCHEMA_CACHE_PATH", "./data/schema_cache.json")
+    SCHEMA_CACHE_CHECK_INTERVAL = float(os.getenv("SCHEMA_CACHE_CHECK_INTERVAL", "60"))
+
+    # Background schema index refresh
+    SCHEMA_REFRESH_INTERVAL = float(os.getenv("SCHEMA_REFRESH_INTERVAL", "30"))
+    SCHEMA_REFRESH_BATCH_SIZE = int(os.getenv("SCHEMA_REFRESH_BATCH_SIZE", "32"))
+    SCHEMA_REFRESH_MAX_DUTY_CYCLE = float(os.getenv("SCHEMA_REFRESH_MAX_DUTY_CYCLE", "0.25"))
+
+    # Schema retrieval
+    SCHEMA_TOP_K_TABLES = int(os.getenv("SCHEMA_TOP_K_TABLES", "5"))
+    # Databases a question is routed among when no database is given
+    DB_DATABASES = [name.strip() for name in os.getenv("DB_DATABASES", DB_DATABASE or "").split(",") if name.strip()]
+    ROUTING_TOP_K = int(os.getenv("ROUTING_TOP_K", "20"))
+
+    # Embeddings and vector store
+    EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+    CHROMA_PERSIST_DIRECTORY = os.getenv("CHROMA_PERSIST_DIRECTORY")
+    CHROMA_COLLECTION_NAME = os.getenv("CHROMA_COLLECTION_NAME", "db_schema")
+
+    # Generated SQL cache
+    SQL_CACHE_MAX_ENTRIES = int(os.getenv("SQL_CACHE_MAX_ENTRIES", "1000"))
+    SQL_CACHE_TTL_SECONDS = float(os.getenv("SQL_CACHE_TTL_SECONDS", "3600"))
+    SQL_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("SQL_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+
+    # Query execution limits
+    QUERY_BATCH_SIZE = int(os.getenv("QUERY_BATCH_SIZE", "500"))
+    QUERY_MAX_ROWS = int(os.getenv("QUERY_MAX_ROWS", "10000"))
+    QUERY_MAX_BYTES = int(os.getenv("QUERY_MAX_BYTES", str(50 * 1024 * 1024)))
+
+    # Concurrent workflow
+    WORKFLOW_MAX_WORKERS = int(os.getenv("WORKFLOW_MAX_WORKERS", "8"))
+
+    # Startup
+    PREWARM_RESOURCES = os.getenv("PREWARM_RESOURCES", "true").lower() in ("1", "true", "yes")
+
+    # Embedding generation
+    EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+    EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR")
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+    EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_quint8_avx2.onnx")
+    EMBEDDING_ONNX_PATH = os.getenv("EMBEDDING_ONNX_PATH")
+    EMBEDDING_ONNX_THREADS = int(os.getenv("EMBEDDING_ONNX_THREADS", "0"))
+
+    # Vector index backend
+    VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+    VECTOR_INDEX_DIRECTORY = os.getenv("VECTOR_INDEX_DIRECTORY")
+    VECTOR_INDEX_TYPE = os.getenv("VECTOR_INDEX_TYPE", "exact")
+    VECTOR_IVF_NLIST = int(os.getenv("VECTOR_IVF_NLIST", "0"))
+    VECTOR_IVF_NPROBE = int(os.getenv("VECTOR_IVF_NPROBE", "8"))
+    VECTOR_IVF_RETRAIN_FRACTION = float(os.getenv("VECTOR_IVF_RETRAIN_FRACTION", "0.2"))
+    VECTOR_INDEX_SAVE_INTERVAL = float(os.getenv("VECTOR_INDEX_SAVE_INTERVAL", "5"))
+
+    # LLM client
+    LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")
+    LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "gemini-1.5-pro")
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+    LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+
+    # Prompt construction
+    PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "4000"))
+    PROMPT_COMPRESS_SCHEMA = os.getenv("PROMPT_COMPRESS_SCHEMA", "true").lower() in ("1", "true", "yes")
+    PROMPT_DROP_AUDIT_COLUMNS = os.getenv("PROMPT_DROP_AUDIT_COLUMNS", "true").lower() in ("1", "true", "yes")
+
+    # Generated SQL guard
+    QUERY_TIMEOUT_SECONDS = int(os.getenv("QUERY_TIMEOUT_SECONDS", "30"))
+    SQL_GUARD_MAXDOP = int(os.getenv("SQL_GUARD_MAXDOP", "2"))
+    SQL_GUARD_COST_THRESHOLD = float(os.getenv("SQL_GUARD_COST_THRESHOLD", "50"))
+    SQL_GUARD_COST_ACTION = os.getenv("SQL_GUARD_COST_ACTION", "reject")
+    SQL_GUARD_ESTIMATE_COST = os.getenv("SQL_GUARD_ESTIMATE_COST", "true").lower() in ("1", "true", "yes")
+
+    # Query result cache
+    RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+    RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "300"))
+    RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR")
+    RESULT_CACHE_DISK_MAX_BYTES = int(os.getenv("RESULT_CACHE_DISK_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+    # Batch mode
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+    BATCH_WINDOW_SIZE = int(os.getenv("BATCH_WINDOW_SIZE", "256"))
+
+    # Metrics
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    METRICS_RESERVOIR_SIZE = int(os.getenv("METRICS_RESERVOIR_SIZE", "1024"))
+    METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PROFILER_INTERVAL = float(os.getenv("METRICS_PROFILER_INTERVAL", "0"))
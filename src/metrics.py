@@ -0,0 +1,430 @@
+"""In-process latency metrics with Prometheus and JSON export."""
+
+import json
+import logging
+import math
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE = "sql_agent"
+
+# Bucket upper bounds per unit; observations above the last one land in +Inf
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+
+class Histogram:
+    """
+    Cumulative bucket counts plus a bounded reservoir of the latest samples,
+    from which quantiles are computed for the JSON export.
+    """
+
+    def __init__(self, buckets, reservoir_size):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=reservoir_size)
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[index] += 1
+                break
+
+    def quantile(self, q):
+        """
+        Returns the ``q`` quantile of the reservoir, or None when it is empty.
+        """
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of labelled counters and histograms, plus collectors that
+    report point-in-time values (e.g. cache statistics) when metrics are exported.
+    """
+
+    def __init__(self, enabled=Config.METRICS_ENABLED, reservoir_size=Config.METRICS_RESERVOIR_SIZE):
+        """
+        Args:
+            enabled (bool, optional): Record observations. When disabled, spans
+                still run their body but nothing is stored.
+            reservoir_size (int, optional): Latest samples kept per histogram for quantiles.
+        """
+        self.enabled = enabled
+        self.reservoir_size = reservoir_size
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, **labels):
+        """
+        Adds to a counter.
+
+        Args:
+            name (str): Metric name without namespace, e.g. ``cache_lookups_total``.
+            value (float, optional): Increment.
+            **labels: Label values.
+        """
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=SECONDS_BUCKETS, **labels):
+        """
+        Records a histogram observation.
+
+        Args:
+            name (str): Metric name without namespace, e.g. ``llm_prompt_tokens``.
+            value (float): Observed value.
+            buckets (Tuple[float], optional): Bucket bounds, fixed by the first observation.
+            **labels: Label values.
+        """
+        if not self.enabled:
+            return
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets, self.reservoir_size)
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, stage, **labels):
+        """
+        Times a pipeline stage into the ``stage_duration_seconds`` histogram,
+        labelled with the stage and whether it raised.
+
+        Args:
+            stage (str): Stage name, e.g. ``llm`` or ``vector_search``.
+            **labels: Additional label values.
+        """
+        started = time.perf_counter()
+        status = "error"
+        try:
+            yield
+            status = "ok"
+        finally:
+            self.observe("stage_duration_seconds", time.perf_counter() - started,
+                         stage=stage, status=status, **labels)
+
+    def register_collector(self, name, collect):
+        """
+        Registers a callable whose numeric results are exported as gauges named
+        ``<name>_<key>``.
+
+        Args:
+            name (str): Gauge name prefix, e.g. ``result_cache``.
+            collect (Callable[[], dict]): Returns current values, e.g. ``stats``.
+        """
+        with self._lock:
+            self._collectors[name] = collect
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def checkpoint(self):
+        """
+        Records the current counter and histogram totals, so that
+        ``to_json(since=...)`` can report only what was observed afterwards.
+
+        Returns:
+            dict: Checkpoint to pass to ``to_json``.
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "histograms": {
+                    key: (histogram.count, histogram.sum, list(histogram.bucket_counts))
+                    for key, histogram in self._histograms.items()
+                },
+            }
+
+    def to_json(self, since=None):
+        """
+        Exports all metrics with p50/p90/p99 per histogram.
+
+        Args:
+            since (dict, optional): Result of ``checkpoint``. Limits counters and
+                histograms to what was recorded after it; quantiles then come
+                from the samples still in the reservoir.
+
+        Returns:
+            dict: ``counters``, ``histograms`` and ``gauges`` lists.
+        """
+        counters, histograms, gauges = self._snapshot()
+        if since is not None:
+            counters = [
+                (key, value - since["counters"].get(key, 0)) for key, value in counters
+                if value != since["counters"].get(key, 0)
+            ]
+            histograms = [
+                (key, _histogram_since(histogram, since["histograms"].get(key)))
+                for key, histogram in histograms
+            ]
+            histograms = [(key, histogram) for key, histogram in histograms if histogram.count]
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in counters
+            ],
+            "histograms": [
+                {
+                    "name": name, "labels": dict(labels), "count": histogram.count, "sum": histogram.sum,
+                    "p50": histogram.quantile(0.5), "p90": histogram.quantile(0.9),
+                    "p99": histogram.quantile(0.99),
+                }
+                for (name, labels), histogram in histograms
+            ],
+            "gauges": [{"name": name, "value": value} for name, value in gauges],
+        }
+
+    def to_prometheus(self):
+        """
+        Exports all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text.
+        """
+        counters, histograms, gauges = self._snapshot()
+        lines = []
+        typed = set()
+
+        def declare(name, metric_type):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {metric_type}")
+
+        for (name, labels), value in counters:
+            metric = f"{NAMESPACE}_{name}"
+            declare(metric, "counter")
+            lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), histogram in histograms:
+            metric = f"{NAMESPACE}_{name}"
+            declare(metric, "histogram")
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+        for name, value in gauges:
+            metric = f"{NAMESPACE}_{name}"
+            declare(metric, "gauge")
+            lines.append(f"{metric} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _snapshot(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = [
+                (key, _copy_histogram(histogram))
+                for key, histogram in sorted(self._histograms.items(), key=lambda item: item[0])
+            ]
+            collectors = list(self._collectors.items())
+
+        gauges = []
+        for prefix, collect in collectors:
+            try:
+                values = collect()
+            except Exception as e:
+                logger.warning(f"Metrics collector {prefix} failed: {str(e)}")
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges.append((f"{prefix}_{key}", value))
+        return counters, histograms, gauges
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler: a daemon thread records the stack of every
+    other thread each ``interval`` seconds. ``collapsed_stacks`` returns the
+    counts in the collapsed format read by flame graph tools.
+    """
+
+    def __init__(self, interval=Config.METRICS_PROFILER_INTERVAL, max_depth=64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._stacks = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def collapsed_stacks(self):
+        """
+        Returns:
+            str: One ``frame;frame;frame count`` line per distinct stack, root first.
+        """
+        with self._lock:
+            items = self._stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            samples = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                frames = traceback.extract_stack(frame, limit=self.max_depth)
+                stack = ";".join(f"{entry.name} ({entry.filename}:{entry.lineno})" for entry in frames)
+                samples.append(f"{names.get(thread_id, thread_id)};{stack}")
+            with self._lock:
+                self._stacks.update(samples)
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = ",".join(
+        f'{key}="{value.replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), "")}"'
+        for key, value in labels
+    )
+    return "{" + escaped + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return str(value)
+
+
+def _copy_histogram(histogram):
+    copy = Histogram(histogram.buckets, histogram.samples.maxlen)
+    copy.bucket_counts = list(histogram.bucket_counts)
+    copy.count = histogram.count
+    copy.sum = histogram.sum
+    copy.samples = deque(histogram.samples, maxlen=histogram.samples.maxlen)
+    return copy
+
+
+def _histogram_since(histogram, checkpoint):
+    """
+    Narrows a copied histogram to the observations made after a checkpoint.
+    """
+    if checkpoint is None:
+        return histogram
+    count, total, bucket_counts = checkpoint
+    histogram.count -= count
+    histogram.sum -= total
+    histogram.bucket_counts = [now - then for now, then in zip(histogram.bucket_counts, bucket_counts)]
+    # The newest samples are at the end of the reservoir
+    kept = min(histogram.count, len(histogram.samples))
+    histogram.samples = deque(list(histogram.samples)[len(histogram.samples) - kept:],
+                              maxlen=histogram.samples.maxlen)
+    return histogram
+
+
+registry = MetricsRegistry()
+profiler = None
+
+
+def increment(name, value=1, **labels):
+    registry.increment(name, value, **labels)
+
+
+def observe(name, value, buckets=SECONDS_BUCKETS, **labels):
+    registry.observe(name, value, buckets, **labels)
+
+
+def span(stage, **labels):
+    return registry.span(stage, **labels)
+
+
+def register_collector(name, collect):
+    registry.register_collector(name, collect)
+
+
+def start_profiler(interval=Config.METRICS_PROFILER_INTERVAL):
+    """
+    Starts the process-wide sampling profiler.
+
+    Returns:
+        SamplingProfiler: The running profiler.
+    """
+    global profiler
+    if profiler is None:
+        profiler = SamplingProfiler(interval).start()
+    return profiler
+
+
+def start_http_server(port=Config.METRICS_PORT, host=Config.METRICS_HOST):
+    """
+    Serves ``/metrics`` (Prometheus), ``/metrics.json`` and, when the profiler
+    runs, ``/profile`` (collapsed stacks) from a daemon thread.
+
+    Args:
+        port (int, optional): TCP port.
+        host (str, optional): Interface to bind.
+
+    Returns:
+        ThreadingHTTPServer: The running server.
+    """
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                self._reply(registry.to_prometheus(), "text/plain; version=0.0.4")
+            elif path == "/metrics.json":
+                self._reply(json.dumps(registry.to_json()), "application/json")
+            elif path == "/profile" and profiler is not None:
+                self._reply(profiler.collapsed_stacks(), "text/plain")
+            else:
+                self.send_error(404)
+
+        def _reply(self, body, content_type):
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.debug("Metrics request: " + format, *args)
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    logger.info(f"Serving metrics on http://{host}:{server.server_port}/metrics")
+    return server
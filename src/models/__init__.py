@@ -0,0 +1,3 @@
+"""
+Models package for SQL Query Agent.
+"""
@@ -0,0 +1,53 @@
+"""Summary of a batch run."""
+
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+@dataclass
+class BatchReport:
+    """
+    Counts and throughput of a batch run. Latencies are per unique question,
+    in seconds.
+    """
+    total: int = 0
+    unique: int = 0
+    duplicates: int = 0
+    resumed: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    cache_hits: int = 0
+    executed: int = 0
+    elapsed_seconds: float = 0.0
+    latency_p50: float = 0.0
+    latency_p95: float = 0.0
+    latency_max: float = 0.0
+    stages_p50: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def processed(self):
+        return self.succeeded + self.failed
+
+    @property
+    def questions_per_second(self):
+        return self.processed / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def render(self):
+        """
+        Renders the report as human-readable lines.
+
+        Returns:
+            str: Report text.
+        """
+        lines = [
+            f"Questions: {self.total} ({self.unique} unique, {self.duplicates} duplicates, "
+            f"{self.resumed} already done)",
+            f"Processed: {self.processed} ({self.succeeded} succeeded, {self.failed} failed, "
+            f"{self.cache_hits} from cache, {self.executed} executed)",
+            f"Elapsed: {self.elapsed_seconds:.1f}s, throughput: {self.questions_per_second:.2f} questions/s",
+            f"Latency: p50 {self.latency_p50:.2f}s, p95 {self.latency_p95:.2f}s, max {self.latency_max:.2f}s",
+        ]
+        if self.stages_p50:
+            stages = ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in sorted(self.stages_p50.items()))
+            lines.append(f"Stage p50: {stages}")
+        return "\n".join(lines)
@@ -0,0 +1,23 @@
+"""LLM prompt together with its size and the schema context it holds."""
+
+from dataclasses import dataclass, field
+from typing import List
+
+
+@dataclass
+class BuiltPrompt:
+    """
+    Prompt produced by ``PromptBuilder``. ``omitted_tables`` lists ranked tables
+    that did not fit the token budget and ``reduced_tables`` those that were
+    included with only their key and question-relevant columns.
+    """
+    text: str
+    token_count: int
+    token_budget: int
+    tables: List[str] = field(default_factory=list)
+    reduced_tables: List[str] = field(default_factory=list)
+    omitted_tables: List[str] = field(default_factory=list)
+
+    @property
+    def truncated(self):
+        return bool(self.reduced_tables or self.omitted_tables)
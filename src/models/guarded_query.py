@@ -0,0 +1,15 @@
+"""Generated SQL after validation and limit injection."""
+
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class GuardedQuery:
+    """
+    SQL that passed the guard, with the limits it injected and its estimated cost.
+    """
+    sql: str
+    original_sql: str
+    estimated_cost: Optional[float] = None
+    warnings: List[str] = field(default_factory=list)
@@ -0,0 +1,26 @@
+"""Generated SQL together with the context it was generated from."""
+
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+@dataclass
+class QueryPlan:
+    """
+    Reusable handle for a generated SQL query. Executing a plan runs exactly the
+    SQL the user reviewed, without regenerating it.
+    """
+    user_query: str
+    database_name: str
+    sql_query: str
+    schema_fingerprint: Optional[str] = None
+    similar_schemas: Optional[dict] = None
+    cache_hit: Optional[str] = None
+    cached_question: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    estimated_cost: Optional[float] = None
+    guard_warnings: List[str] = field(default_factory=list)
+    plan_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: float = field(default_factory=time.time)
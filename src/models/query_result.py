@@ -0,0 +1,110 @@
+"""Bounded SQL query results."""
+
+import sys
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+
+
+def estimate_row_bytes(row):
+    """
+    Estimates the in-memory size of a result row.
+
+    Args:
+        row (tuple): Result row.
+
+    Returns:
+        int: Approximate size in bytes.
+    """
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+
+
+def unique_column_labels(columns):
+    """
+    Makes column names unique for display, e.g. ``Id, Id`` from a join becomes
+    ``Id, Id_1``.
+
+    Args:
+        columns (List[str]): Column names, possibly repeated.
+
+    Returns:
+        List[str]: Labels in column order, with repeats suffixed.
+    """
+    labels = []
+    seen = set()
+    taken = set(columns)
+    for name in columns:
+        label = name
+        if name in seen:
+            suffix = 1
+            while f"{name}_{suffix}" in taken:
+                suffix += 1
+            label = f"{name}_{suffix}"
+            taken.add(label)
+        seen.add(name)
+        labels.append(label)
+    return labels
+
+
+@dataclass
+class QueryResult:
+    """
+    Materialized rows of a query, possibly cut off at a row or byte cap.
+    """
+    columns: List[str]
+    rows: List[tuple] = field(default_factory=list)
+    truncated: bool = False
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    def to_columnar(self):
+        """
+        Converts the row-oriented result into one array per column.
+
+        Returns:
+            dict: Mapping of column name to a NumPy array. Columns that do not
+            form a homogeneous numeric array are kept as object arrays.
+        """
+        return dict(zip(self.columns, self.to_column_arrays()))
+
+    def to_column_arrays(self):
+        """
+        Converts the row-oriented result into one array per column, in column
+        order, which unlike ``to_columnar`` also keeps duplicate column names.
+
+        Returns:
+            List[np.ndarray]: Column arrays, numeric where the values allow.
+        """
+        arrays = []
+        for index in range(len(self.columns)):
+            values = [row[index] for row in self.rows]
+            try:
+                array = np.array(values)
+            except (TypeError, ValueError, OverflowError):
+                array = None
+            if array is None or array.dtype.kind in "USO" or array.ndim != 1:
+                # Element-wise, so values such as strings or tuples stay unchanged
+                array = np.empty(len(values), dtype=object)
+                for position, value in enumerate(values):
+                    array[position] = value
+            arrays.append(array)
+        return arrays
+
+    @classmethod
+    def from_column_arrays(cls, columns, arrays, truncated=False):
+        """
+        Rebuilds a row-oriented result from ``to_column_arrays`` output.
+
+        Args:
+            columns (List[str]): Column names.
+            arrays (List[np.ndarray]): One array per column.
+            truncated (bool, optional): Whether the rows were cut off at a cap.
+
+        Returns:
+            QueryResult: Result with plain Python values.
+        """
+        rows = list(zip(*(array.tolist() for array in arrays))) if arrays else []
+        return cls(columns=list(columns), rows=rows, truncated=truncated)
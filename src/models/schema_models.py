@@ -0,0 +1,167 @@
+"""Structured in-memory model of a database schema."""
+
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+
+# Types whose max_length is reported in bytes but declared in characters.
+_UNICODE_TYPES = {"nchar", "nvarchar"}
+_LENGTH_TYPES = {"char", "varchar", "binary", "varbinary"} | _UNICODE_TYPES
+_PRECISION_TYPES = {"decimal", "numeric"}
+
+
+@dataclass
+class ColumnInfo:
+    """
+    A single table column.
+    """
+    name: str
+    data_type: str
+    max_length: Optional[int] = None
+    precision: Optional[int] = None
+    scale: Optional[int] = None
+    is_nullable: bool = True
+    is_primary_key: bool = False
+
+    def type_declaration(self):
+        """
+        Formats the column type the way it would appear in DDL.
+
+        Returns:
+            str: Type declaration, e.g. ``nvarchar(50)`` or ``decimal(18,2)``.
+        """
+        if self.data_type in _LENGTH_TYPES and self.max_length is not None:
+            if self.max_length == -1:
+                return f"{self.data_type}(max)"
+            length = self.max_length // 2 if self.data_type in _UNICODE_TYPES else self.max_length
+            return f"{self.data_type}({length})"
+        if self.data_type in _PRECISION_TYPES and self.precision is not None:
+            return f"{self.data_type}({self.precision},{self.scale or 0})"
+        return self.data_type
+
+
+@dataclass
+class ForeignKeyInfo:
+    """
+    A foreign key from one table to another.
+    """
+    name: str
+    columns: List[str]
+    referenced_schema: str
+    referenced_table: str
+    referenced_columns: List[str]
+
+    @property
+    def referenced_full_name(self):
+        return f"{self.referenced_schema}.{self.referenced_table}"
+
+
+@dataclass
+class TableInfo:
+    """
+    A table with its columns, primary key and foreign keys.
+    """
+    schema_name: str
+    name: str
+    object_id: Optional[int] = None
+    modify_date: Optional[str] = None
+    columns: List[ColumnInfo] = field(default_factory=list)
+    foreign_keys: List[ForeignKeyInfo] = field(default_factory=list)
+
+    @property
+    def full_name(self):
+        return f"{self.schema_name}.{self.name}"
+
+    def render(self):
+        """
+        Renders the table as a single line of schema text.
+
+        Returns:
+            str: ``Table: schema.name | Columns: ...`` line including types and keys.
+        """
+        fk_by_column = {}
+        for fk in self.foreign_keys:
+            for column, ref_column in zip(fk.columns, fk.referenced_columns):
+                fk_by_column[column] = f"{fk.referenced_full_name}.{ref_column}"
+
+        parts = []
+        for column in self.columns:
+            part = f"{column.name} {column.type_declaration()}"
+            if column.is_primary_key:
+                part += " PK"
+            if not column.is_nullable:
+                part += " NOT NULL"
+            if column.name in fk_by_column:
+                part += f" FK->{fk_by_column[column.name]}"
+            parts.append(part)
+
+        return f"Table: {self.full_name} | Columns: {', '.join(parts)}"
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        data["columns"] = [ColumnInfo(**column) for column in data.get("columns", [])]
+        data["foreign_keys"] = [ForeignKeyInfo(**fk) for fk in data.get("foreign_keys", [])]
+        return cls(**data)
+
+
+@dataclass
+class DatabaseSchema:
+    """
+    All user tables of a single database.
+    """
+    database_name: str
+    tables: Dict[str, TableInfo] = field(default_factory=dict)
+
+    def add_table(self, table: TableInfo):
+        self.tables[table.full_name] = table
+
+    def render(self, table_names=None):
+        """
+        Renders the schema (or a subset of its tables) as text in a single pass.
+
+        Args:
+            table_names (Iterable[str], optional): Full table names to include.
+                Defaults to all tables.
+
+        Returns:
+            str: One ``Table: ...`` line per table.
+        """
+        names = self.tables.keys() if table_names is None else table_names
+        lines = [self.tables[name].render() for name in names if name in self.tables]
+        return "".join(f"{line}\n" for line in lines)
+
+    def expand_with_foreign_keys(self, table_names):
+        """
+        Adds the direct foreign-key neighbours (referenced and referencing tables)
+        of the given tables, preserving the order of the input.
+
+        Args:
+            table_names (Iterable[str]): Full table names.
+
+        Returns:
+            List[str]: Input tables followed by their neighbours, without duplicates.
+        """
+        seeds = [name for name in table_names if name in self.tables]
+        seed_set = set(seeds)
+        expanded = dict.fromkeys(seeds)
+
+        for name in seeds:
+            for fk in self.tables[name].foreign_keys:
+                if fk.referenced_full_name in self.tables:
+                    expanded.setdefault(fk.referenced_full_name)
+        for name, table in self.tables.items():
+            if any(fk.referenced_full_name in seed_set for fk in table.foreign_keys):
+                expanded.setdefault(name)
+
+        return list(expanded)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        schema = cls(database_name=data["database_name"])
+        for table_data in data.get("tables", {}).values():
+            schema.add_table(TableInfo.from_dict(table_data))
+        return schema
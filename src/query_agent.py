@@ -2,8 +2,21 @@ from services.schema_service import SchemaService
 from services.embedding_service import EmbeddingService
 from services.vector_search_service import VectorSearchService
 from services.gemini_service import GeminiService
+from services.schema_indexing_service import SchemaIndexingService, schema_filter
+from services.sql_cache_service import SQLCacheService
+from services.prompt_builder import PromptBuilder, estimate_tokens
+from services.sql_guard_service import SQLGuardService
+from services.result_cache_service import ResultCacheService
+from repositories.query_stream import MaterializedQueryStream
 from repositories.mssql_repository import MSSQLRepository
+from models.query_plan import QueryPlan
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+import asyncio
+import functools
 import logging
+import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -18,93 +31,463 @@ class QueryAgent:
                  embedding_service: EmbeddingService,
                  vector_search_service: VectorSearchService,
                  gemini_service: GeminiService,
-                 sql_executor: MSSQLRepository):
+                 sql_executor: MSSQLRepository,
+                 schema_indexing_service: SchemaIndexingService = None,
+                 sql_cache_service: SQLCacheService = None,
+                 prompt_builder: PromptBuilder = None,
+                 sql_guard_service: SQLGuardService = None,
+                 result_cache_service: ResultCacheService = None):
         self.schema_service = schema_service
         self.embedding_service = embedding_service
         self.vector_search_service = vector_search_service
         self.gemini_service = gemini_service
         self.sql_executor = sql_executor
+        self.schema_indexing_service = schema_indexing_service or SchemaIndexingService(
+            schema_service, embedding_service, vector_search_service
+        )
+        self.sql_cache_service = sql_cache_service or SQLCacheService()
+        self.prompt_builder = prompt_builder or PromptBuilder(gemini_service.build_prompt)
+        self.sql_guard_service = sql_guard_service or SQLGuardService(sql_executor)
+        self.result_cache_service = result_cache_service or ResultCacheService()
+        # Executor for the blocking pyodbc, SentenceTransformer, Chroma and Gemini
+        # calls made by the async workflow
+        self._executor = ThreadPoolExecutor(
+            max_workers=Config.WORKFLOW_MAX_WORKERS, thread_name_prefix="query-agent"
+        )
         logger.info("QueryAgent initialized with all required services")
 
-    def full_query_workflow(self, user_query: str, database_name: str, execute_sql: bool = False):
+    def full_query_workflow(self, user_query: str, database_name: str, execute_sql: bool = False,
+                            stream_results: bool = False):
         """
         Executes the full workflow from schema embedding to SQL execution.
 
         Args:
             user_query (str): Natural language user question
-            database_name (str): Database name for schema context
+            database_name (str): Database name for schema context, or None to
+                route the question to the best matching database
             execute_sql (bool): Whether to execute the SQL query
+            stream_results (bool): Return an open QueryStream instead of a
+                materialized QueryResult, so pages can be fetched on demand
 
         Returns:
             dict: {
                 'sql_query': str,
-                'query_result': any,
+                'query_result': QueryResult or QueryStream or None,
                 'similar_schemas': list,
+                'cache_hit': str or None,  # "exact", "semantic" or None
+                'plan': QueryPlan,
             }
         """
+        plan = self.generate_plan(user_query, database_name)
+        query_result = self.execute_plan(plan, stream_results) if execute_sql else None
+        return self._to_result(plan, query_result)
+
+    async def full_query_workflow_async(self, user_query: str, database_name: str, execute_sql: bool = False,
+                                        stream_results: bool = False):
+        """
+        Async variant of ``full_query_workflow``.
+
+        Args:
+            user_query (str): Natural language user question
+            database_name (str): Database name for schema context, or None to
+                route the question to the best matching database
+            execute_sql (bool): Whether to execute the SQL query
+            stream_results (bool): Return an open QueryStream instead of a
+                materialized QueryResult
+
+        Returns:
+            dict: Same structure as ``full_query_workflow``.
+        """
+        plan = await self.generate_plan_async(user_query, database_name)
+        query_result = None
+        if execute_sql:
+            query_result = await self._run_blocking(self.execute_plan, plan, stream_results)
+        return self._to_result(plan, query_result)
+
+    def generate_plan(self, user_query: str, database_name: str, on_chunk=None):
+        """
+        Generates the SQL for a question without executing it.
+
+        Args:
+            user_query (str): Natural language user question
+            database_name (str): Database name for schema context, or None to
+                route the question to the best matching database
+            on_chunk (Callable[[str], None], optional): Called with the LLM response
+                generated so far each time a new chunk arrives
+
+        Returns:
+            QueryPlan: Handle to pass to ``execute_plan``.
+        """
+        with metrics.span("generate_plan"):
+            plan = self._generate_plan(user_query, database_name, on_chunk)
+        metrics.increment("plans_total", cache_hit=plan.cache_hit or "none")
+        return plan
+
+    def _generate_plan(self, user_query, database_name, on_chunk):
         try:
-            # 1. Get schema text
-            logger.info("Step 1: Fetching schema text...")
-            schema_text = self.schema_service.get_schema_text()
-            logger.info(f"Schema text retrieved successfully. Length: {len(schema_text)} characters")
-
-            # 2. Generate schema embedding
-            logger.info("Step 2: Generating schema embedding...")
-            schema_embedding = self.embedding_service.generate_embedding(schema_text)
-            logger.info("Schema embedding generated successfully")
-
-            # 3. Store or update in vector DB
-            logger.info("Step 3: Storing schema in vector database...")
-            self.vector_search_service.add_schema_embedding(
-                doc_id=database_name, 
-                schema_text=schema_text, 
-                embedding_vector=schema_embedding
-            )
-            logger.info(f"Schema stored in vector database with ID: {database_name}")
+            if not database_name:
+                database_name = self.route_database(self._embed_question(user_query))
+
+            # 1-3. Get schema and make sure its per-table embeddings are indexed.
+            # Re-embedding only happens for tables whose content hash changed.
+            logger.info("Steps 1-3: Fetching and indexing schema...")
+            schema, fingerprint = self._index_schema(database_name)
+            logger.info(f"Schema of {database_name} indexed. Tables: {len(schema.tables)}")
+
+            cached = self.sql_cache_service.get_exact(user_query, database_name, fingerprint)
+            if cached is not None:
+                logger.info("Using cached SQL query (exact match)")
+                return self._cached_plan(user_query, database_name, fingerprint, cached, "exact")
 
             # 4. Generate user input SQL query embedding
             logger.info("Step 4: Generating embedding for user query...")
-            query_embedding = self.embedding_service.generate_embedding(user_query)
+            query_embedding = self._embed_question(user_query)
             logger.info("User query embedding generated successfully")
 
-            # 5. Retrieve similar schemas
-            logger.info("Step 5: Retrieving similar schemas...")
-            similar_schemas = self.vector_search_service.search_similar_schemas(query_embedding, top_k=1)
-            logger.info(f"Found {len(similar_schemas)} similar schemas")
+            cached = self.sql_cache_service.get_similar(user_query, query_embedding, database_name, fingerprint)
+            if cached is not None:
+                logger.info("Using cached SQL query (similar question)")
+                return self._cached_plan(user_query, database_name, fingerprint, cached, "semantic")
+
+            # 5. Retrieve the most relevant tables
+            logger.info("Step 5: Retrieving similar tables...")
+            similar_schemas = self._search_tables(query_embedding, database_name)
 
             # 6. Build LLM prompt
             logger.info("Step 6: Building LLM prompt...")
-            # For context, pick the top similar schema text or fallback to full schema_text
-            if similar_schemas and similar_schemas.get('documents') and len(similar_schemas['documents']) > 0:
-                context = similar_schemas['documents'][0]
-                logger.info("Using top similar schema for context")
-            else:
-                context = schema_text
-                logger.info("Using full schema text for context")
-
-            prompt = self.gemini_service.build_prompt(schema_context=context, user_query=user_query)
-            logger.info(f"LLM prompt built successfully: {prompt}")
+            prompt = self._build_prompt(schema, similar_schemas, user_query)
+            logger.debug("LLM prompt built successfully: %s", prompt.text)
 
             # 7. Generate SQL
             logger.info("Step 7: Generating SQL query...")
-            sql_query = self.gemini_service.generate_sql_query(prompt)
+            sql_query = self._generate_sql(prompt.text, on_chunk)
             logger.info(f"SQL query generated: {sql_query}")
 
-            result = {
-                "sql_query": sql_query,
-                "query_result": None,
-                "similar_schemas": similar_schemas
-            }
-
-            if execute_sql:
-                # 8. Execute SQL
-                logger.info("Step 8: Executing SQL query...")
-                query_result = self.sql_executor.execute_query(sql_query)
-                logger.info("SQL query executed successfully")
-                result["query_result"] = query_result
+            # 7b. Validate, limit and cost-check the SQL before anyone can run it
+            guarded = self._guard(sql_query, database_name)
+            self.sql_cache_service.put(user_query, database_name, fingerprint, guarded.sql, query_embedding,
+                                       guarded.estimated_cost, guarded.warnings)
 
-            return result
+            return QueryPlan(user_query, database_name, guarded.sql, fingerprint, similar_schemas,
+                             prompt_tokens=prompt.token_count, estimated_cost=guarded.estimated_cost,
+                             guard_warnings=guarded.warnings)
 
         except Exception as e:
             logger.error(f"Error in query workflow: {str(e)}", exc_info=True)
             raise
+
+    async def generate_plan_async(self, user_query: str, database_name: str):
+        """
+        Async variant of ``generate_plan`` that overlaps independent stages.
+
+        The schema fetch/indexing and the user query embedding run concurrently.
+        Once a database has been indexed, the table search also starts as soon as
+        the query embedding is ready instead of waiting for the schema freshness
+        check. All blocking calls run in the agent's thread pool.
+
+        Args:
+            user_query (str): Natural language user question
+            database_name (str): Database name for schema context, or None to
+                route the question to the best matching database
+
+        Returns:
+            QueryPlan: Handle to pass to ``execute_plan``.
+        """
+        with metrics.span("generate_plan"):
+            plan = await self._generate_plan_async(user_query, database_name)
+        metrics.increment("plans_total", cache_hit=plan.cache_hit or "none")
+        return plan
+
+    async def _generate_plan_async(self, user_query, database_name):
+        try:
+            if not database_name:
+                query_embedding = await self._run_blocking(self._embed_question, user_query)
+                database_name = await self._run_blocking(self.route_database, query_embedding)
+
+            logger.info("Steps 1-4: Indexing schema and embedding user query concurrently...")
+            schema_task = asyncio.ensure_future(
+                self._run_blocking(self._index_schema, database_name)
+            )
+            embedding_task = asyncio.ensure_future(self._run_blocking(self._embed_question, user_query))
+
+            search_task = None
+            if self.schema_indexing_service.is_indexed(database_name):
+                search_task = asyncio.ensure_future(self._search_after(embedding_task, database_name))
+
+            try:
+                schema, fingerprint = await schema_task
+
+                cached = self.sql_cache_service.get_exact(user_query, database_name, fingerprint)
+                if cached is not None:
+                    logger.info("Using cached SQL query (exact match)")
+                    return self._cached_plan(user_query, database_name, fingerprint, cached, "exact")
+
+                query_embedding = await embedding_task
+                cached = self.sql_cache_service.get_similar(user_query, query_embedding, database_name, fingerprint)
+                if cached is not None:
+                    logger.info("Using cached SQL query (similar question)")
+                    return self._cached_plan(user_query, database_name, fingerprint, cached, "semantic")
+
+                logger.info("Step 5: Retrieving similar tables...")
+                if search_task is None:
+                    search_task = asyncio.ensure_future(
+                        self._run_blocking(self._search_tables, query_embedding, database_name)
+                    )
+                similar_schemas = await search_task
+            finally:
+                for task in (schema_task, embedding_task, search_task):
+                    if task is not None and not task.done():
+                        task.cancel()
+
+            logger.info("Step 6: Building LLM prompt...")
+            prompt = self._build_prompt(schema, similar_schemas, user_query)
+
+            logger.info("Step 7: Generating SQL query...")
+            sql_query = await self._run_blocking(self._generate_sql, prompt.text)
+            logger.info(f"SQL query generated: {sql_query}")
+
+            guarded = await self._run_blocking(self._guard, sql_query, database_name)
+            self.sql_cache_service.put(user_query, database_name, fingerprint, guarded.sql, query_embedding,
+                                       guarded.estimated_cost, guarded.warnings)
+
+            return QueryPlan(user_query, database_name, guarded.sql, fingerprint, similar_schemas,
+                             prompt_tokens=prompt.token_count, estimated_cost=guarded.estimated_cost,
+                             guard_warnings=guarded.warnings)
+
+        except Exception as e:
+            logger.error(f"Error in async query workflow: {str(e)}", exc_info=True)
+            raise
+
+    def execute_plan(self, plan: QueryPlan, stream_results: bool = False):
+        """
+        Executes exactly the SQL of a previously generated plan. Only the database
+        round trip is paid; nothing is regenerated.
+
+        Args:
+            plan (QueryPlan): Plan returned by ``generate_plan``.
+            stream_results (bool): Return an open QueryStream instead of a
+                materialized QueryResult, so pages can be fetched on demand
+
+        Returns:
+            QueryResult or QueryStream: Query results.
+        """
+        try:
+            # 8. Execute SQL
+            logger.info(f"Step 8: Executing SQL query of plan {plan.plan_id}...")
+            # The plan was guarded when generated; re-check it is still a single
+            # SELECT in case it was edited, then run it read-only
+            self.sql_guard_service.validate(plan.sql_query)
+
+            cached = self.result_cache_service.get(plan.sql_query, plan.database_name)
+            if cached is not None:
+                logger.info(f"Using cached result ({cached.row_count} rows)")
+                metrics.increment("executions_total", result_cache="hit")
+                metrics.observe("result_rows", cached.row_count, metrics.ROW_BUCKETS)
+                return MaterializedQueryStream(cached, Config.QUERY_BATCH_SIZE) if stream_results else cached
+
+            metrics.increment("executions_total", result_cache="miss")
+            with metrics.span("sql_execute", streamed=stream_results):
+                if stream_results:
+                    # Timed until the query starts returning rows; pages are fetched later
+                    query_result = self.result_cache_service.caching_stream(
+                        plan.sql_query, plan.database_name,
+                        self.sql_executor.stream_query(plan.sql_query, database=plan.database_name, read_only=True)
+                    )
+                else:
+                    query_result = self.sql_executor.execute_query(plan.sql_query, database=plan.database_name,
+                                                                   read_only=True)
+                    metrics.observe("result_rows", query_result.row_count, metrics.ROW_BUCKETS)
+                    self.result_cache_service.put(plan.sql_query, plan.database_name, query_result)
+            logger.info("SQL query executed successfully")
+            return query_result
+        except Exception as e:
+            logger.error(f"Error executing query plan: {str(e)}", exc_info=True)
+            raise
+
+    def route_database(self, query_embedding):
+        """
+        Picks the database a question most likely refers to, by summing the
+        similarity of the best matching tables across all routable databases.
+        Only tables already in the vector database are compared; the routable
+        databases are indexed at startup and kept fresh by the schema refresher,
+        never on the request path.
+
+        Args:
+            query_embedding (np.ndarray): Embedding of the user question.
+
+        Returns:
+            str: Database name; the configured default when nothing matches.
+        """
+        logger.info("Routing query to a database...")
+        with metrics.span("route"):
+            results = self.vector_search_service.search_similar_schemas(
+                query_embedding,
+                top_k=Config.ROUTING_TOP_K,
+                where=schema_filter(self.schema_service.server)
+            )
+
+        scores = defaultdict(float)
+        if results and results.get("metadatas"):
+            for metadata, distance in zip(results["metadatas"][0], results["distances"][0]):
+                if metadata and metadata.get("database"):
+                    scores[metadata["database"]] += max(1.0 - distance, 0.0)
+
+        if not scores:
+            logger.warning("No indexed tables to route by yet; using the default database")
+        database_name = max(scores, key=scores.get) if scores else self.schema_service.default_database
+        logger.info(f"Query routed to database: {database_name}")
+        return database_name
+
+    def list_databases(self):
+        """
+        Lists the databases questions may target: ``Config.DB_DATABASES`` when
+        set, otherwise the user databases on the server.
+
+        Returns:
+            List[str]: Database names.
+        """
+        return list(Config.DB_DATABASES) or self.schema_service.list_databases()
+
+    def resolve_database(self, database_name):
+        """
+        Validates a user-supplied database name against ``list_databases``.
+
+        Args:
+            database_name (str): Database name as entered, compared case-insensitively.
+
+        Returns:
+            str: The database name as listed.
+        """
+        databases = self.list_databases()
+        for name in databases:
+            if name.casefold() == database_name.strip().casefold():
+                return name
+        raise Exception(f"Unknown database: {database_name}. Available: {', '.join(databases)}")
+
+    def close(self):
+        """
+        Shuts down the thread pool used by the async workflow.
+        """
+        self._executor.shutdown()
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """
+        Runs a blocking call in the agent's thread pool.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _search_after(self, embedding_task, database_name):
+        query_embedding = await embedding_task
+        return await self._run_blocking(self._search_tables, query_embedding, database_name)
+
+    def _search_tables(self, query_embedding, database_name):
+        """
+        Retrieves the tables of a database most similar to the user query.
+        """
+        # Never ask for more results than the database has tables, which Chroma
+        # rejects. The count comes from the index, since on the async path the
+        # search starts before the schema is fetched.
+        top_k = Config.SCHEMA_TOP_K_TABLES
+        table_count = self.schema_indexing_service.indexed_table_count(database_name)
+        if table_count is not None:
+            top_k = min(top_k, max(table_count, 1))
+        with metrics.span("vector_search"):
+            similar_schemas = self.vector_search_service.search_similar_schemas(
+                query_embedding,
+                top_k=top_k,
+                where=schema_filter(self.schema_service.server, database_name)
+            )
+        logger.info(f"Found {len(self._matched_table_names(similar_schemas))} similar tables")
+        return similar_schemas
+
+    def _generate_sql(self, prompt, on_chunk=None):
+        """
+        Generates SQL for a prompt, streaming the response to ``on_chunk`` if given.
+        """
+        with metrics.span("llm", streamed=on_chunk is not None):
+            if on_chunk is None:
+                sql_query = self.gemini_service.generate_sql_query(prompt)
+            else:
+                response_text = ""
+                for chunk in self.gemini_service.stream_sql_query(prompt):
+                    response_text += chunk
+                    on_chunk(response_text)
+                sql_query = self.gemini_service.clean_sql_string(response_text.strip())
+        metrics.observe("llm_response_tokens", estimate_tokens(sql_query), metrics.TOKEN_BUCKETS)
+        return sql_query
+
+    def _index_schema(self, database_name):
+        """
+        Ensures the schema of a database is indexed.
+
+        Returns:
+            Tuple[DatabaseSchema, str]: Current schema and its catalog fingerprint.
+        """
+        with metrics.span("schema"):
+            schema = self.schema_indexing_service.index_schema(database_name)
+            return schema, self.schema_service.get_fingerprint(database_name)
+
+    def _embed_question(self, user_query):
+        with metrics.span("embed", kind="question"):
+            return self.embedding_service.generate_embedding(user_query)
+
+    def _guard(self, sql_query, database_name):
+        with metrics.span("sql_guard"):
+            return self.sql_guard_service.guard(sql_query, database_name)
+
+    def _build_prompt(self, schema, similar_schemas, user_query):
+        """
+        Builds the LLM prompt within the token budget from the matched tables plus
+        their foreign-key neighbours, or from the whole schema when nothing matched.
+
+        Returns:
+            BuiltPrompt: Prompt text with its token count.
+        """
+        with metrics.span("prompt_build"):
+            prompt = self.prompt_builder.build(schema, self._matched_table_names(similar_schemas), user_query)
+        metrics.observe("llm_prompt_tokens", prompt.token_count, metrics.TOKEN_BUCKETS)
+        logger.info(
+            f"Using {len(prompt.tables)} tables for context ({len(prompt.reduced_tables)} reduced, "
+            f"{len(prompt.omitted_tables)} omitted); prompt tokens: {prompt.token_count}/{prompt.token_budget or 'unlimited'}"
+        )
+        return prompt
+
+    @staticmethod
+    def _cached_plan(user_query, database_name, fingerprint, cached, cache_hit):
+        """
+        Builds a plan for SQL served from the cache, with the guard results the
+        SQL was cached with.
+        """
+        return QueryPlan(user_query, database_name, cached.sql_query, fingerprint, cache_hit=cache_hit,
+                         cached_question=cached.question, estimated_cost=cached.estimated_cost,
+                         guard_warnings=cached.guard_warnings)
+
+    @staticmethod
+    def _to_result(plan, query_result):
+        return {
+            "sql_query": plan.sql_query,
+            "query_result": query_result,
+            "similar_schemas": plan.similar_schemas,
+            "cache_hit": plan.cache_hit,
+            "plan": plan
+        }
+
+    @staticmethod
+    def _matched_table_names(similar_schemas):
+        """
+        Extracts ``schema.table`` names from vector search results.
+
+        Args:
+            similar_schemas (dict): Vector search results for a single query.
+
+        Returns:
+            List[str]: Matched table names, most similar first.
+        """
+        if not similar_schemas or not similar_schemas.get("metadatas"):
+            return []
+        return [
+            f"{metadata['schema']}.{metadata['table']}"
+            for metadata in similar_schemas["metadatas"][0]
+            if metadata and "schema" in metadata and "table" in metadata
+        ]
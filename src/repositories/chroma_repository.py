@@ -1,7 +1,28 @@
 """Repository for Chroma vector database operations."""
 
-import chromadb
-from chromadb.config import Settings
+import re
+
+from config import Config
+
+
+def versioned_collection_name(base_name, embedding_model=None, embedding_dimension=None):
+    """
+    Builds a collection name tied to the embedding model, so that switching models
+    never mixes incompatible vectors in one index.
+
+    Args:
+        base_name (str): Base collection name.
+        embedding_model (str, optional): Embedding model name.
+        embedding_dimension (int, optional): Embedding dimension.
+
+    Returns:
+        str: Collection name valid for Chroma (at most 63 characters).
+    """
+    if not embedding_model:
+        return base_name
+    model_slug = re.sub(r"[^a-zA-Z0-9]+", "-", embedding_model.split("/")[-1]).strip("-")
+    suffix = f"_{embedding_dimension}" if embedding_dimension else ""
+    return f"{base_name}__{model_slug}"[:63 - len(suffix)].rstrip("-_") + suffix
 
 
 class ChromaRepository:
@@ -9,54 +30,122 @@ class ChromaRepository:
     Manages vector database operations for storing and querying schema embeddings.
     """
 
-    def __init__(self):
+    def __init__(self, persist_directory=Config.CHROMA_PERSIST_DIRECTORY,
+                 collection_name=Config.CHROMA_COLLECTION_NAME,
+                 embedding_model=None, embedding_dimension=None):
         """
         Initializes Chroma client and schema collection.
+
+        Args:
+            persist_directory (str, optional): Directory of an on-disk index that is
+                reused across restarts. Defaults to an in-memory index when unset.
+            collection_name (str, optional): Base collection name.
+            embedding_model (str, optional): Embedding model name used for versioning.
+            embedding_dimension (int, optional): Embedding dimension used for versioning.
         """
-        self.client = chromadb.Client(Settings())
-        self.collection_name = "db_schema"
-        self.collection = self._get_or_create_collection(self.collection_name)
+        # Imported lazily: chromadb is slow to import
+        import chromadb
+        from chromadb.config import Settings
 
-    def _get_or_create_collection(self, name):
+        if persist_directory:
+            self.client = chromadb.PersistentClient(path=persist_directory)
+        else:
+            self.client = chromadb.Client(Settings())
+        self.collection_name = versioned_collection_name(collection_name, embedding_model, embedding_dimension)
+        self.collection = self._get_or_create_collection(self.collection_name, metadata={
+            "hnsw:space": "cosine",
+            "embedding_model": embedding_model or "",
+            "embedding_dimension": embedding_dimension or 0,
+        })
+
+    def _get_or_create_collection(self, name, metadata=None):
         """
         Retrieves existing or creates a new Chroma collection.
 
         Args:
             name (str): Collection name.
+            metadata (dict, optional): Collection metadata, applied on creation.
 
         Returns:
             Collection object.
         """
         try:
-            return self.client.get_or_create_collection(name)
+            return self.client.get_or_create_collection(name, metadata=metadata)
         except Exception as e:
             raise Exception(f"Failed to create or fetch Chroma collection: {str(e)}")
 
-    def add_embedding(self, doc_id, document_text, embedding_vector):
+    def add_embedding(self, doc_id, document_text, embedding_vector, metadata=None):
         """
-        Adds a schema embedding document to the vector database.
+        Adds or replaces a schema embedding document in the vector database.
 
         Args:
             doc_id (str): Unique document identifier.
             document_text (str): Original schema text.
-            embedding_vector (List[float]): Embedding vector.
+            embedding_vector (np.ndarray or List[float]): Embedding vector.
+            metadata (dict, optional): Document metadata, e.g. its content hash.
         """
         try:
-            self.collection.add(
+            self.collection.upsert(
                 ids=[doc_id],
                 documents=[document_text],
-                embeddings=[embedding_vector]
+                embeddings=[embedding_vector],
+                metadatas=[metadata] if metadata else None
             )
         except Exception as e:
             raise Exception(f"Failed to add embedding: {str(e)}")
 
-    def query_similar_schemas(self, embedding_vector, top_k=3):
+    def add_embeddings(self, doc_ids, document_texts, embedding_vectors, metadatas=None):
+        """
+        Adds or replaces several schema embedding documents in one call.
+
+        Args:
+            doc_ids (List[str]): Unique document identifiers.
+            document_texts (List[str]): Original schema texts.
+            embedding_vectors (np.ndarray or List[List[float]]): Embedding vectors.
+            metadatas (List[dict], optional): Document metadata.
+        """
+        try:
+            self.collection.upsert(
+                ids=list(doc_ids),
+                documents=list(document_texts),
+                embeddings=list(embedding_vectors),
+                metadatas=list(metadatas) if metadatas else None
+            )
+        except Exception as e:
+            raise Exception(f"Failed to add embeddings: {str(e)}")
+
+    def get_metadata(self, doc_ids=None, where=None):
+        """
+        Retrieves stored metadata for documents without their embeddings.
+
+        Args:
+            doc_ids (List[str], optional): Document identifiers.
+            where (dict, optional): Metadata filter, e.g. ``{"database": "Sales"}``.
+
+        Returns:
+            dict: Mapping of document id to metadata for the documents that exist.
+        """
+        try:
+            results = self.collection.get(
+                ids=list(doc_ids) if doc_ids is not None else None,
+                where=where,
+                include=["metadatas"]
+            )
+            return {
+                doc_id: metadata or {}
+                for doc_id, metadata in zip(results["ids"], results["metadatas"])
+            }
+        except Exception as e:
+            raise Exception(f"Failed to get metadata: {str(e)}")
+
+    def query_similar_schemas(self, embedding_vector, top_k=3, where=None):
         """
         Retrieves top-k similar schema documents from the vector database.
 
         Args:
-            embedding_vector (List[float]): Embedding vector to compare.
+            embedding_vector (np.ndarray or List[float]): Embedding vector to compare.
             top_k (int, optional): Number of similar results to retrieve. Defaults to 3.
+            where (dict, optional): Metadata filter, e.g. ``{"database": "Sales"}``.
 
         Returns:
             List of matched document metadata.
@@ -65,6 +154,7 @@ class ChromaRepository:
             results = self.collection.query(
                 query_embeddings=[embedding_vector],
                 n_results=top_k,
+                where=where,
                 include=["documents", "distances", "metadatas"]
             )
             return results
@@ -82,3 +172,15 @@ class ChromaRepository:
             self.collection.delete(ids=[doc_id])
         except Exception as e:
             raise Exception(f"Failed to delete embedding: {str(e)}")
+
+    def delete_embeddings(self, doc_ids):
+        """
+        Deletes several document embeddings from the collection.
+
+        Args:
+            doc_ids (List[str]): Document identifiers to delete.
+        """
+        try:
+            self.collection.delete(ids=list(doc_ids))
+        except Exception as e:
+            raise Exception(f"Failed to delete embeddings: {str(e)}")
@@ -0,0 +1,170 @@
+"""Bounded, thread-safe database connection pool."""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Keeps between ``min_size`` and ``max_size`` DB-API connections, hands out one
+    connection per caller and health-checks connections before reuse.
+    """
+
+    def __init__(self, connect, min_size=1, max_size=10, acquire_timeout=30.0,
+                 health_check_interval=30.0, health_check_query="SELECT 1"):
+        """
+        Initializes the pool and opens ``min_size`` connections.
+
+        Args:
+            connect (Callable[[], Connection]): Factory that opens a new connection.
+            min_size (int, optional): Connections opened upfront and kept idle.
+            max_size (int, optional): Upper bound on open connections.
+            acquire_timeout (float, optional): Seconds to wait for a free connection.
+            health_check_interval (float, optional): Idle seconds after which a
+                connection is checked before it is handed out again.
+            health_check_query (str, optional): Query used for health checks.
+        """
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.health_check_query = health_check_query
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    @contextmanager
+    def connection(self):
+        """
+        Borrows a connection for the duration of a ``with`` block.
+
+        Yields:
+            Connection: A healthy connection owned exclusively by the caller.
+        """
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, check_health=True)
+            raise
+        else:
+            self.release(conn)
+
+    def acquire(self):
+        """
+        Takes an idle connection or opens a new one while below ``max_size``.
+
+        Returns:
+            Connection: A healthy connection.
+        """
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise Exception("Connection pool is closed")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    conn, last_used = None, None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Exception(f"Timed out after {self.acquire_timeout}s waiting for a database connection")
+                self._condition.wait(remaining)
+
+        try:
+            if conn is None:
+                return self._connect()
+            if time.monotonic() - last_used > self.health_check_interval and not self._is_healthy(conn):
+                logger.warning("Discarding unhealthy database connection and reconnecting")
+                self._close_quietly(conn)
+                return self._connect()
+            return conn
+        except Exception:
+            self._discard()
+            raise
+
+    def release(self, conn, check_health=False):
+        """
+        Returns a connection to the pool.
+
+        Args:
+            conn (Connection): Connection obtained from ``acquire``.
+            check_health (bool, optional): Verify the connection first, e.g. after
+                an error, and drop it if it is broken.
+        """
+        try:
+            conn.rollback()
+        except Exception:
+            check_health = True
+        if not check_health or self._is_healthy(conn):
+            with self._condition:
+                if not self._closed:
+                    self._idle.append((conn, time.monotonic()))
+                    self._condition.notify()
+                    return
+        self._close_quietly(conn)
+        self._discard()
+
+    def discard(self, conn):
+        """
+        Closes a borrowed connection instead of returning it, e.g. when its
+        session state could not be restored.
+
+        Args:
+            conn (Connection): Connection obtained from ``acquire``.
+        """
+        self._close_quietly(conn)
+        self._discard()
+
+    def close(self):
+        """
+        Closes all idle connections and rejects further acquisitions.
+        Borrowed connections are closed when they are released.
+        """
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                self._close_quietly(conn)
+                self._size -= 1
+            self._condition.notify_all()
+
+    def _discard(self):
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+    def _is_healthy(self, conn):
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(self.health_check_query)
+                cursor.fetchall()
+            finally:
+                cursor.close()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
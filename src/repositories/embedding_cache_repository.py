@@ -0,0 +1,98 @@
+"""Repository for cached embedding vectors."""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class EmbeddingCacheRepository:
+    """
+    Content-hash keyed cache of float32 embedding vectors: an in-memory LRU in
+    front of an optional directory of ``.npy`` files.
+    """
+
+    def __init__(self, max_entries=10000, cache_dir=None):
+        """
+        Initializes the cache.
+
+        Args:
+            max_entries (int, optional): Vectors kept in memory.
+            cache_dir (str, optional): Directory for the on-disk tier. Disabled when unset.
+        """
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """
+        Looks up vectors by key.
+
+        Args:
+            keys (List[str]): Content hashes.
+
+        Returns:
+            dict: Mapping of key to vector for the keys that are cached.
+        """
+        found = {}
+        missing = []
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is None:
+                    missing.append(key)
+                else:
+                    self._entries.move_to_end(key)
+                    found[key] = vector
+
+        for key in missing:
+            vector = self._load(key)
+            if vector is not None:
+                found[key] = vector
+                self._remember(key, vector)
+        return found
+
+    def put_many(self, vectors):
+        """
+        Stores vectors.
+
+        Args:
+            vectors (dict): Mapping of content hash to float32 vector.
+        """
+        for key, vector in vectors.items():
+            self._remember(key, vector)
+            self._store(key, vector)
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.npy")
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        try:
+            return np.load(self._path(key))
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key, vector):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.save(f, vector)
+            os.replace(tmp_path, path)
+        except OSError:
+            # The disk tier is best effort; the vector stays cached in memory.
+            pass
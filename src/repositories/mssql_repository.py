@@ -1,15 +1,88 @@
 """Repository for MS SQL database interactions."""
 import pyodbc
 from config import Config
+from repositories.connection_pool import ConnectionPool
+from repositories.query_stream import QueryStream
+from models.schema_models import ColumnInfo, DatabaseSchema, ForeignKeyInfo, TableInfo
+
+_TABLES_QUERY = """
+    SELECT t.object_id, s.name, t.name, t.modify_date
+    FROM {db}.sys.tables t
+    JOIN {db}.sys.schemas s ON s.schema_id = t.schema_id
+    WHERE t.is_ms_shipped = 0{table_filter}
+    ORDER BY s.name, t.name
+"""
+
+_COLUMNS_QUERY = """
+    SELECT c.object_id, c.name, ty.name, c.max_length, c.precision, c.scale, c.is_nullable
+    FROM {db}.sys.columns c
+    JOIN {db}.sys.tables t ON t.object_id = c.object_id
+    JOIN {db}.sys.types ty ON ty.user_type_id = c.user_type_id
+    WHERE t.is_ms_shipped = 0{table_filter}
+    ORDER BY c.object_id, c.column_id
+"""
+
+_PRIMARY_KEYS_QUERY = """
+    SELECT ic.object_id, c.name
+    FROM {db}.sys.indexes i
+    JOIN {db}.sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+    JOIN {db}.sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+    JOIN {db}.sys.tables t ON t.object_id = i.object_id
+    WHERE i.is_primary_key = 1{table_filter}
+"""
+
+_FOREIGN_KEYS_QUERY = """
+    SELECT fk.object_id, fk.name, fkc.parent_object_id, pc.name, rs.name, rt.name, rc.name
+    FROM {db}.sys.foreign_keys fk
+    JOIN {db}.sys.foreign_key_columns fkc ON fkc.constraint_object_id = fk.object_id
+    JOIN {db}.sys.columns pc ON pc.object_id = fkc.parent_object_id AND pc.column_id = fkc.parent_column_id
+    JOIN {db}.sys.tables rt ON rt.object_id = fkc.referenced_object_id
+    JOIN {db}.sys.schemas rs ON rs.schema_id = rt.schema_id
+    JOIN {db}.sys.columns rc ON rc.object_id = fkc.referenced_object_id AND rc.column_id = fkc.referenced_column_id
+    JOIN {db}.sys.tables t ON t.object_id = fkc.parent_object_id
+    WHERE 1 = 1{table_filter}
+    ORDER BY fk.object_id, fkc.constraint_column_id
+"""
+
+_FINGERPRINT_QUERY = """
+    SELECT COUNT(*), MAX(modify_date)
+    FROM {db}.sys.objects
+    WHERE is_ms_shipped = 0
+"""
+
+_DATABASES_QUERY = """
+    SELECT name
+    FROM sys.databases
+    WHERE database_id > 4 AND state_desc = 'ONLINE'
+    ORDER BY name
+"""
+
+_TABLE_VERSIONS_QUERY = """
+    SELECT t.object_id, s.name, t.name, t.modify_date
+    FROM {db}.sys.tables t
+    JOIN {db}.sys.schemas s ON s.schema_id = t.schema_id
+    WHERE t.is_ms_shipped = 0
+"""
 
 class MSSQLRepository:
     """
     Handles connection and queries to the MS SQL database using Windows Authentication.
+
+    Connections come from a bounded pool and every call uses its own cursor, so a
+    single instance can be shared safely between concurrent sessions.
     """
 
-    def __init__(self):
+    def __init__(self, pool_min_size=Config.DB_POOL_MIN_SIZE, pool_max_size=Config.DB_POOL_MAX_SIZE,
+                 acquire_timeout=Config.DB_POOL_ACQUIRE_TIMEOUT, query_timeout=Config.QUERY_TIMEOUT_SECONDS):
         """
-        Initializes the database connection and cursor using Windows Authentication.
+        Initializes the connection pools using Windows Authentication.
+
+        Args:
+            pool_min_size (int, optional): Connections opened upfront.
+            pool_max_size (int, optional): Maximum number of open connections per pool.
+            acquire_timeout (float, optional): Seconds to wait for a free connection.
+            query_timeout (int, optional): Per-statement timeout in seconds of
+                read-only connections, 0 for none.
         """
         try:
             # Create connection string with Windows Authentication
@@ -20,8 +93,42 @@ class MSSQLRepository:
                 f'Trusted_Connection=yes;'
             )
             
-            self.connection = pyodbc.connect(conn_str)
-            self.cursor = self.connection.cursor()
+            self.server = Config.DB_SERVER
+            self.database = Config.DB_DATABASE
+            self.pool = ConnectionPool(
+                lambda: pyodbc.connect(conn_str),
+                min_size=pool_min_size,
+                max_size=pool_max_size,
+                acquire_timeout=acquire_timeout
+            )
+
+            # Generated queries run on a separate pool. Neither readonly=True (an
+            # access-mode hint SQL Server does not enforce) nor ApplicationIntent
+            # (honoured only by the Microsoft ODBC drivers behind an availability
+            # group listener, not by the {SQL Server} driver) makes these
+            # connections read-only. Only the login's permissions do, so with
+            # DB_READONLY_USER set they connect as that db_datareader login.
+            read_only_conn_str = conn_str
+            if Config.DB_READONLY_USER:
+                read_only_conn_str = (
+                    f'DRIVER={{SQL Server}};'
+                    f'SERVER={Config.DB_SERVER};'
+                    f'DATABASE={Config.DB_DATABASE};'
+                    f'UID={Config.DB_READONLY_USER};'
+                    f'PWD={Config.DB_READONLY_PASSWORD};'
+                )
+
+            def connect_read_only():
+                connection = pyodbc.connect(read_only_conn_str + 'ApplicationIntent=ReadOnly;', readonly=True)
+                connection.timeout = query_timeout
+                return connection
+
+            self.read_only_pool = ConnectionPool(
+                connect_read_only,
+                min_size=0,
+                max_size=pool_max_size,
+                acquire_timeout=acquire_timeout
+            )
         except pyodbc.Error as e:
             raise Exception(f"Failed to connect to database: {str(e)}")
 
@@ -32,81 +139,285 @@ class MSSQLRepository:
         Returns:
             schema_info (str): Formatted text containing tables and their columns.
         """
+        return self.fetch_schema().render()
+
+    def fetch_schema(self, object_ids=None, database=None):
+        """
+        Extracts tables, columns, primary keys and foreign keys with a fixed number
+        of set-based catalog queries, independent of the number of tables.
+
+        Args:
+            object_ids (Iterable[int], optional): Restricts extraction to these tables.
+                Defaults to all user tables.
+            database (str, optional): Database on the server. Defaults to the
+                configured database.
+
+        Returns:
+            DatabaseSchema: Structured schema of the connected database.
+        """
         try:
-            tables = self._get_table_names()
-            schema_info = ""
+            database = database or self.database
+            db = self._quote_identifier(database)
+            table_filter, params = self._table_filter(object_ids)
+            schema = DatabaseSchema(database_name=database)
+            tables_by_id = {}
+
+            tables_query = _TABLES_QUERY.format(db=db, table_filter=table_filter)
+            for object_id, schema_name, table_name, modify_date in self._fetch_rows(tables_query, params):
+                table = TableInfo(
+                    schema_name=schema_name,
+                    name=table_name,
+                    object_id=object_id,
+                    modify_date=modify_date.isoformat() if modify_date else None,
+                )
+                tables_by_id[object_id] = table
+                schema.add_table(table)
+
+            primary_keys = set(
+                (object_id, column_name) for object_id, column_name in self._fetch_rows(
+                    _PRIMARY_KEYS_QUERY.format(db=db, table_filter=table_filter), params)
+            )
 
-            for table in tables:
-                columns = self._get_columns_for_table(table)
-                column_list = ", ".join(columns)
-                schema_info += f"Table: {table} | Columns: {column_list}\n"
+            for (object_id, column_name, data_type, max_length,
+                 precision, scale, is_nullable) in self._fetch_rows(
+                    _COLUMNS_QUERY.format(db=db, table_filter=table_filter), params):
+                table = tables_by_id.get(object_id)
+                if table is None:
+                    continue
+                table.columns.append(ColumnInfo(
+                    name=column_name,
+                    data_type=data_type,
+                    max_length=max_length,
+                    precision=precision,
+                    scale=scale,
+                    is_nullable=bool(is_nullable),
+                    is_primary_key=(object_id, column_name) in primary_keys,
+                ))
 
-            return schema_info
+            foreign_keys = {}
+            for (fk_id, fk_name, parent_id, column_name,
+                 ref_schema, ref_table, ref_column) in self._fetch_rows(
+                    _FOREIGN_KEYS_QUERY.format(db=db, table_filter=table_filter), params):
+                table = tables_by_id.get(parent_id)
+                if table is None:
+                    continue
+                fk = foreign_keys.get(fk_id)
+                if fk is None:
+                    fk = ForeignKeyInfo(
+                        name=fk_name,
+                        columns=[],
+                        referenced_schema=ref_schema,
+                        referenced_table=ref_table,
+                        referenced_columns=[],
+                    )
+                    foreign_keys[fk_id] = fk
+                    table.foreign_keys.append(fk)
+                fk.columns.append(column_name)
+                fk.referenced_columns.append(ref_column)
+
+            return schema
         except pyodbc.Error as e:
             raise Exception(f"Failed to fetch schema details: {str(e)}")
 
-    def execute_query(self, sql_query):
+    def fetch_schema_fingerprint(self, database=None):
         """
-        Executes a given SQL query and fetches results.
+        Computes a cheap fingerprint of the catalog that changes whenever any user
+        object is created, altered or dropped.
 
         Args:
-            sql_query (str): SQL query string to execute.
+            database (str, optional): Database on the server. Defaults to the
+                configured database.
 
         Returns:
-            tuple: (columns, results) where columns is a list of column names
-                  and results is a list of result rows.
+            str: Object count and latest modification date.
         """
         try:
-            self.cursor.execute(sql_query)
-            result = self.cursor.fetchall()
-            columns = [desc[0] for desc in self.cursor.description]
-            return columns, result
+            db = self._quote_identifier(database or self.database)
+            object_count, last_modified = self._fetch_rows(_FINGERPRINT_QUERY.format(db=db))[0]
+            last_modified = last_modified.isoformat() if last_modified else ""
+            return f"{object_count}:{last_modified}"
         except pyodbc.Error as e:
-            raise Exception(f"Database query failed: {str(e)}")
+            raise Exception(f"Failed to fetch schema fingerprint: {str(e)}")
+
+    def fetch_table_versions(self, database=None):
+        """
+        Retrieves the identity and last modification date of every user table.
 
-    def _get_table_names(self):
+        Args:
+            database (str, optional): Database on the server. Defaults to the
+                configured database.
+
+        Returns:
+            dict: Mapping of object id to ``(full_name, modify_date)``.
+        """
+        try:
+            return {
+                object_id: (f"{schema_name}.{table_name}",
+                            modify_date.isoformat() if modify_date else None)
+                for object_id, schema_name, table_name, modify_date
+                in self._fetch_rows(_TABLE_VERSIONS_QUERY.format(db=self._quote_identifier(database or self.database)))
+            }
+        except pyodbc.Error as e:
+            raise Exception(f"Failed to fetch table versions: {str(e)}")
+
+    def list_databases(self):
         """
-        Retrieves all table names in the connected database.
+        Lists the online user databases on the server.
 
         Returns:
-            List of table names.
+            List[str]: Database names.
         """
         try:
-            self.cursor.execute(
-                "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE'"
-            )
-            tables = [row[0] for row in self.cursor.fetchall()]
-            return tables
+            return [row[0] for row in self._fetch_rows(_DATABASES_QUERY)]
         except pyodbc.Error as e:
-            raise Exception(f"Failed to get table names: {str(e)}")
+            raise Exception(f"Failed to list databases: {str(e)}")
 
-    def _get_columns_for_table(self, table_name):
+    def execute_query(self, sql_query, max_rows=Config.QUERY_MAX_ROWS, max_bytes=Config.QUERY_MAX_BYTES,
+                      database=None, read_only=False):
         """
-        Retrieves all column names for a given table.
+        Executes a given SQL query and fetches results up to a row and byte cap.
 
         Args:
-            table_name (str): Name of the table.
+            sql_query (str): SQL query string to execute.
+            max_rows (int, optional): Maximum number of rows to fetch.
+            max_bytes (int, optional): Approximate maximum size of fetched rows.
+            database (str, optional): Database to run the query in. Defaults to the
+                configured database.
+            read_only (bool, optional): Run on a read-only connection with the
+                query timeout.
 
         Returns:
-            List of column names.
+            QueryResult: Column names, result rows and whether they were truncated.
+        """
+        with self.stream_query(sql_query, max_rows=max_rows, max_bytes=max_bytes, database=database,
+                               read_only=read_only) as stream:
+            try:
+                return stream.to_result()
+            except pyodbc.Error as e:
+                raise Exception(f"Database query failed: {str(e)}")
+
+    def stream_query(self, sql_query, batch_size=Config.QUERY_BATCH_SIZE,
+                     max_rows=Config.QUERY_MAX_ROWS, max_bytes=Config.QUERY_MAX_BYTES, database=None,
+                     read_only=False):
+        """
+        Executes a given SQL query and returns a stream that fetches its rows in
+        batches on demand.
+
+        Args:
+            sql_query (str): SQL query string to execute.
+            batch_size (int, optional): Rows fetched per batch.
+            max_rows (int, optional): Maximum number of rows to fetch.
+            max_bytes (int, optional): Approximate maximum size of fetched rows.
+            database (str, optional): Database to run the query in. Defaults to the
+                configured database.
+            read_only (bool, optional): Run on a read-only connection with the
+                query timeout.
+
+        Returns:
+            QueryStream: Open stream holding a pooled connection until exhausted or closed.
         """
         try:
-            self.cursor.execute(
-                f"SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = '{table_name}'"
-            )
-            columns = [row[0] for row in self.cursor.fetchall()]
-            return columns
+            # Pooled connections are shared across databases, so every execution
+            # sets its database context explicitly.
+            use_database = f"USE {self._quote_identifier(database or self.database)}"
+            pool = self.read_only_pool if read_only else self.pool
+            return QueryStream(pool, sql_query, batch_size, max_rows, max_bytes,
+                               setup_statements=[use_database])
+        except pyodbc.Error as e:
+            raise Exception(f"Database query failed: {str(e)}")
+
+    def fetch_estimated_plan(self, sql_query, database=None):
+        """
+        Compiles a query without executing it and returns its estimated plan.
+
+        Args:
+            sql_query (str): SQL query string.
+            database (str, optional): Database to compile the query in. Defaults to
+                the configured database.
+
+        Returns:
+            str: Showplan XML.
+        """
+        connection = self.read_only_pool.acquire()
+        cursor = connection.cursor()
+        showplan_on = False
+        try:
+            cursor.execute(f"USE {self._quote_identifier(database or self.database)}")
+            cursor.execute("SET SHOWPLAN_XML ON")
+            showplan_on = True
+            cursor.execute(sql_query)
+            return "".join(row[0] for row in cursor.fetchall())
         except pyodbc.Error as e:
-            raise Exception(f"Failed to get columns for table {table_name}: {str(e)}")
+            raise Exception(f"Failed to fetch estimated plan: {str(e)}")
+        finally:
+            try:
+                if showplan_on:
+                    cursor.execute("SET SHOWPLAN_XML OFF")
+                cursor.close()
+                self.read_only_pool.release(connection)
+            except pyodbc.Error:
+                # A connection left in showplan mode would not execute queries
+                self.read_only_pool.discard(connection)
+
+    @staticmethod
+    def _quote_identifier(name):
+        """
+        Quotes a database name for use in SQL text.
+
+        Args:
+            name (str): Identifier.
+
+        Returns:
+            str: Bracket-quoted identifier, e.g. ``[Sales]``.
+        """
+        return "[" + name.replace("]", "]]") + "]"
+
+    @staticmethod
+    def _table_filter(object_ids):
+        """
+        Builds a parameterized ``object_id`` filter for the catalog queries.
+
+        Args:
+            object_ids (Iterable[int] or None): Table object ids, or None for all tables.
+
+        Returns:
+            tuple: (SQL fragment, parameters).
+        """
+        if object_ids is None:
+            return "", ()
+        object_ids = tuple(object_ids)
+        if not object_ids:
+            return " AND 1 = 0", ()
+        placeholders = ", ".join("?" for _ in object_ids)
+        return f" AND t.object_id IN ({placeholders})", object_ids
+
+    def _fetch_rows(self, query, params=()):
+        """
+        Executes a catalog query and returns all of its rows.
+
+        Args:
+            query (str): SQL query string to execute.
+            params (tuple, optional): Query parameters.
+
+        Returns:
+            List of result rows.
+        """
+        with self.pool.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(query, *params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
 
     def close_connection(self):
         """
-        Closes the database connection.
+        Closes the pooled database connections.
         """
         try:
-            if hasattr(self, 'cursor') and self.cursor:
-                self.cursor.close()
-            if hasattr(self, 'connection') and self.connection:
-                self.connection.close()
+            if hasattr(self, 'pool') and self.pool:
+                self.pool.close()
+            if hasattr(self, 'read_only_pool') and self.read_only_pool:
+                self.read_only_pool.close()
         except pyodbc.Error as e:
             raise Exception(f"Failed to close database connection: {str(e)}")
@@ -0,0 +1,487 @@
+"""In-process vector index backed by a float32 NumPy matrix."""
+
+import atexit
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+_VECTORS_FILE = "vectors.npy"
+_DOCUMENTS_FILE = "documents.json"
+
+logger = logging.getLogger(__name__)
+
+
+def matches_where(metadata, where):
+    """
+    Evaluates a Chroma-style metadata filter.
+
+    Supports ``{"key": value}``, ``{"key": {"$eq"|"$ne"|"$in"|"$nin": ...}}``
+    and ``{"$and"|"$or": [filters]}``.
+
+    Args:
+        metadata (dict): Document metadata.
+        where (dict): Filter.
+
+    Returns:
+        bool: True if the metadata matches.
+    """
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            for operator, operand in condition.items():
+                if operator == "$eq" and value != operand:
+                    return False
+                if operator == "$ne" and value == operand:
+                    return False
+                if operator == "$in" and value not in operand:
+                    return False
+                if operator == "$nin" and value in operand:
+                    return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class NumpyVectorRepository:
+    """
+    Drop-in alternative to ``ChromaRepository`` for corpora of up to tens of
+    thousands of documents. Vectors are kept L2-normalized in one float32 matrix
+    and searched with a vectorized cosine top-k; an optional IVF (inverted file)
+    mode probes only the nearest k-means clusters for larger corpora. The index
+    persists to a directory and is memory-mapped on startup.
+
+    Writes keep the IVF usable: new or changed rows are assigned to the nearest
+    existing centroid, and k-means is retrained in a background thread once the
+    changed fraction passes ``retrain_fraction``; queries scan exactly until the
+    first training finishes. Saves are debounced to one per ``save_interval``.
+    """
+
+    def __init__(self, persist_directory=None, index_type="exact", nlist=0, nprobe=8,
+                 retrain_fraction=0.2, save_interval=5.0):
+        """
+        Initializes the index, loading it from disk when present.
+
+        Args:
+            persist_directory (str, optional): Directory for the persisted index.
+                Defaults to an in-memory index.
+            index_type (str, optional): ``exact`` or ``ivf``.
+            nlist (int, optional): Number of IVF clusters, 0 for ``sqrt(n)``.
+            nprobe (int, optional): IVF clusters searched per query.
+            retrain_fraction (float, optional): Fraction of rows added, changed or
+                deleted since the last training that triggers a retrain.
+            save_interval (float, optional): Seconds writes are batched before the
+                index is saved, 0 to save on every write.
+        """
+        if index_type not in ("exact", "ivf"):
+            raise Exception(f"Unknown vector index type: {index_type}")
+        self.persist_directory = persist_directory
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.retrain_fraction = retrain_fraction
+        self.save_interval = save_interval
+        self._vectors = None
+        self._ids = []
+        self._documents = []
+        self._metadatas = []
+        self._rows = {}
+        self._mask_cache = {}
+        self._ivf = None
+        self._ivf_changes = 0
+        self._ivf_training = False
+        self._version = 0
+        self._saved_version = 0
+        self._save_timer = None
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._load()
+        if persist_directory:
+            atexit.register(self.flush)
+
+    def add_embedding(self, doc_id, document_text, embedding_vector, metadata=None):
+        """
+        Adds or replaces a schema embedding document.
+
+        Args:
+            doc_id (str): Unique document identifier.
+            document_text (str): Original schema text.
+            embedding_vector (np.ndarray or List[float]): Embedding vector.
+            metadata (dict, optional): Document metadata.
+        """
+        self.add_embeddings([doc_id], [document_text], [embedding_vector], [metadata] if metadata else None)
+
+    def add_embeddings(self, doc_ids, document_texts, embedding_vectors, metadatas=None):
+        """
+        Adds or replaces several schema embedding documents.
+
+        Args:
+            doc_ids (List[str]): Unique document identifiers.
+            document_texts (List[str]): Original schema texts.
+            embedding_vectors (np.ndarray or List[List[float]]): Embedding vectors.
+            metadatas (List[dict], optional): Document metadata.
+        """
+        try:
+            vectors = self._normalize(np.asarray(embedding_vectors, dtype=np.float32).reshape(len(doc_ids), -1))
+            metadatas = list(metadatas) if metadatas else [{} for _ in doc_ids]
+            with self._lock:
+                self._make_writable(vectors.shape[1])
+                new_rows = []
+                changed_rows = []
+                for doc_id, document, vector, metadata in zip(doc_ids, document_texts, vectors, metadatas):
+                    row = self._rows.get(doc_id)
+                    if row is None:
+                        new_rows.append((doc_id, document, vector, metadata or {}))
+                        continue
+                    self._vectors[row] = vector
+                    self._documents[row] = document
+                    self._metadatas[row] = metadata or {}
+                    changed_rows.append(row)
+
+                if new_rows:
+                    start = len(self._ids)
+                    self._vectors = np.vstack([self._vectors, np.stack([vector for _, _, vector, _ in new_rows])])
+                    for offset, (doc_id, document, _, metadata) in enumerate(new_rows):
+                        self._rows[doc_id] = start + offset
+                        self._ids.append(doc_id)
+                        self._documents.append(document)
+                        self._metadatas.append(metadata)
+
+                self._update_derived(changed_rows, len(new_rows))
+                self._schedule_save()
+        except Exception as e:
+            raise Exception(f"Failed to add embeddings: {str(e)}")
+
+    def get_metadata(self, doc_ids=None, where=None):
+        """
+        Retrieves stored metadata for documents.
+
+        Args:
+            doc_ids (List[str], optional): Document identifiers.
+            where (dict, optional): Metadata filter, e.g. ``{"database": "Sales"}``.
+
+        Returns:
+            dict: Mapping of document id to metadata for the documents that exist.
+        """
+        with self._lock:
+            if doc_ids is not None:
+                rows = [self._rows[doc_id] for doc_id in doc_ids if doc_id in self._rows]
+            else:
+                rows = range(len(self._ids))
+            return {
+                self._ids[row]: self._metadatas[row]
+                for row in rows
+                if where is None or matches_where(self._metadatas[row], where)
+            }
+
+    def query_similar_schemas(self, embedding_vector, top_k=3, where=None):
+        """
+        Retrieves top-k similar schema documents by cosine similarity.
+
+        Args:
+            embedding_vector (np.ndarray or List[float]): Embedding vector to compare.
+            top_k (int, optional): Number of similar results to retrieve. Defaults to 3.
+            where (dict, optional): Metadata filter, e.g. ``{"database": "Sales"}``.
+
+        Returns:
+            dict: Chroma-style results (``ids``, ``documents``, ``distances`` and
+            ``metadatas``, each a list with one entry per query) with cosine distances.
+        """
+        try:
+            query = self._normalize(np.asarray(embedding_vector, dtype=np.float32).reshape(1, -1))[0]
+            with self._lock:
+                if not self._ids:
+                    return {"ids": [[]], "documents": [[]], "distances": [[]], "metadatas": [[]]}
+                candidates = self._candidate_rows(query, where, top_k)
+                if candidates is None:
+                    scores = self._vectors @ query
+                else:
+                    scores = self._vectors[candidates] @ query
+
+                k = min(top_k, len(scores))
+                if k == 0:
+                    return {"ids": [[]], "documents": [[]], "distances": [[]], "metadatas": [[]]}
+                top = np.argpartition(-scores, k - 1)[:k]
+                top = top[np.argsort(-scores[top], kind="stable")]
+                rows = top if candidates is None else candidates[top]
+
+                return {
+                    "ids": [[self._ids[row] for row in rows]],
+                    "documents": [[self._documents[row] for row in rows]],
+                    "distances": [[float(1.0 - scores[index]) for index in top]],
+                    "metadatas": [[self._metadatas[row] for row in rows]],
+                }
+        except Exception as e:
+            raise Exception(f"Failed to query similar schemas: {str(e)}")
+
+    def delete_embedding(self, doc_id):
+        """
+        Deletes a document embedding.
+
+        Args:
+            doc_id (str): Document identifier to delete.
+        """
+        self.delete_embeddings([doc_id])
+
+    def delete_embeddings(self, doc_ids):
+        """
+        Deletes several document embeddings.
+
+        Args:
+            doc_ids (List[str]): Document identifiers to delete.
+        """
+        try:
+            with self._lock:
+                doomed = {self._rows[doc_id] for doc_id in doc_ids if doc_id in self._rows}
+                if not doomed:
+                    return
+                keep = [row for row in range(len(self._ids)) if row not in doomed]
+                self._vectors = np.ascontiguousarray(self._vectors[keep])
+                self._ids = [self._ids[row] for row in keep]
+                self._documents = [self._documents[row] for row in keep]
+                self._metadatas = [self._metadatas[row] for row in keep]
+                self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+                self._mask_cache = {key: (where, mask[keep]) for key, (where, mask) in self._mask_cache.items()}
+                if self._ivf is not None:
+                    centroids, assignments = self._ivf
+                    self._ivf = (centroids, assignments[keep])
+                self._ivf_changes += len(doomed)
+                self._schedule_save()
+        except Exception as e:
+            raise Exception(f"Failed to delete embeddings: {str(e)}")
+
+    def train(self):
+        """
+        Trains the IVF clusters now, in the calling thread. Queries otherwise
+        trigger training in the background.
+        """
+        with self._lock:
+            vectors = self._vectors
+        centroids = self._train_centroids(vectors) if vectors is not None else None
+        self._install_centroids(centroids)
+
+    def flush(self):
+        """
+        Writes pending changes to the persist directory.
+        """
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._version == self._saved_version or not self.persist_directory:
+                return
+            # Snapshot under the lock; write outside it so queries are not blocked
+            version = self._version
+            vectors = np.array(self._vectors, dtype=np.float32)
+            stored = {"ids": list(self._ids), "documents": list(self._documents),
+                      "metadatas": list(self._metadatas)}
+        with self._save_lock:
+            # A concurrent flush may already have written a newer snapshot
+            if version > self._saved_version:
+                try:
+                    self._save(vectors, stored)
+                    self._saved_version = version
+                except OSError as e:
+                    logger.warning(f"Failed to save vector index: {str(e)}")
+
+    def _candidate_rows(self, query, where, top_k):
+        """
+        Selects the rows to score: rows matching the filter, intersected with the
+        probed IVF clusters. Returns None when every row is a candidate.
+
+        A selective filter can leave fewer than ``top_k`` rows in the probed
+        clusters; the filtered rows are then scanned exactly, as they are when
+        there are no more of them than a probe would visit anyway.
+        """
+        mask = None
+        if where:
+            key = json.dumps(where, sort_keys=True, default=str)
+            cached = self._mask_cache.get(key)
+            if cached is None:
+                mask = np.fromiter(
+                    (matches_where(metadata, where) for metadata in self._metadatas),
+                    dtype=bool, count=len(self._metadatas)
+                )
+                self._mask_cache[key] = (where, mask)
+            else:
+                mask = cached[1]
+
+        if self.index_type == "ivf":
+            filtered = len(self._ids) if mask is None else int(np.count_nonzero(mask))
+            ivf_mask = self._ivf_mask(query)
+            if ivf_mask is not None and filtered > self._probed_rows():
+                probed = ivf_mask if mask is None else mask & ivf_mask
+                if np.count_nonzero(probed) >= min(top_k, filtered):
+                    mask = probed
+
+        return None if mask is None else np.flatnonzero(mask)
+
+    def _ivf_mask(self, query):
+        if self._ivf is None or self._ivf_changes > self.retrain_fraction * len(self._ids):
+            self._start_training()
+        if self._ivf is None:
+            return None
+        centroids, assignments = self._ivf
+        probes = np.argsort(-(centroids @ query))[:self.nprobe]
+        return np.isin(assignments, probes)
+
+    def _probed_rows(self):
+        """
+        Returns the number of rows a probe visits on average.
+        """
+        centroids, _ = self._ivf
+        return len(self._ids) * min(self.nprobe, len(centroids)) // len(centroids)
+
+    def _start_training(self):
+        """
+        Retrains the IVF clusters in a background thread, at most one at a time.
+        The current clusters (or an exact scan) serve queries meanwhile.
+        """
+        if self._ivf_training or self._ivf_size(len(self._ids)) is None:
+            return
+        self._ivf_training = True
+        vectors = self._vectors
+
+        def _train():
+            centroids = None
+            try:
+                centroids = self._train_centroids(vectors)
+            except Exception as e:
+                logger.warning(f"Failed to train IVF index: {str(e)}")
+            finally:
+                self._install_centroids(centroids)
+
+        threading.Thread(target=_train, name="ivf-training", daemon=True).start()
+
+    def _install_centroids(self, centroids):
+        """
+        Assigns the current rows to newly trained centroids.
+        """
+        with self._lock:
+            self._ivf_training = False
+            if centroids is None:
+                return
+            self._ivf = (centroids, np.argmax(self._vectors @ centroids.T, axis=1))
+            self._ivf_changes = 0
+
+    def _ivf_size(self, count):
+        """
+        Returns the number of IVF clusters for ``count`` rows, or None when the
+        corpus is too small to cluster, since an exact scan is cheaper.
+        """
+        nlist = self.nlist or int(np.sqrt(count))
+        if nlist < 2 or count < 4 * nlist or nlist <= self.nprobe:
+            return None
+        return nlist
+
+    def _train_centroids(self, vectors, iterations=10, seed=0):
+        """
+        Clusters the vectors with spherical k-means.
+
+        Returns:
+            np.ndarray or None: Centroids, or None for a small corpus.
+        """
+        count = len(vectors)
+        nlist = self._ivf_size(count)
+        if nlist is None:
+            return None
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(count, nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignments = np.argmax(vectors @ centroids.T, axis=1)
+            for cluster in range(nlist):
+                members = vectors[assignments == cluster]
+                if len(members):
+                    centroids[cluster] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+        return centroids
+
+    def _update_derived(self, changed_rows, added):
+        """
+        Updates the cached filter masks and the IVF assignments for changed rows
+        and for ``added`` rows appended at the end.
+        """
+        rows = list(changed_rows) + list(range(len(self._ids) - added, len(self._ids)))
+        for key, (where, mask) in list(self._mask_cache.items()):
+            if added:
+                mask = np.concatenate([mask, np.zeros(added, dtype=bool)])
+            for row in rows:
+                mask[row] = matches_where(self._metadatas[row], where)
+            self._mask_cache[key] = (where, mask)
+
+        if self._ivf is not None:
+            centroids, assignments = self._ivf
+            if added:
+                assignments = np.concatenate([assignments, np.zeros(added, dtype=assignments.dtype)])
+            if rows:
+                assignments[rows] = np.argmax(self._vectors[rows] @ centroids.T, axis=1)
+            self._ivf = (centroids, assignments)
+        self._ivf_changes += len(rows)
+
+    def _make_writable(self, dimension):
+        if self._vectors is None:
+            self._vectors = np.empty((0, dimension), dtype=np.float32)
+        elif not self._vectors.flags.writeable or isinstance(self._vectors, np.memmap):
+            # Copy the memory-mapped matrix before the first mutation.
+            self._vectors = np.array(self._vectors, dtype=np.float32)
+        if self._vectors.shape[1] != dimension:
+            raise Exception(f"Embedding dimension {dimension} does not match index dimension {self._vectors.shape[1]}")
+
+    @staticmethod
+    def _normalize(vectors):
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.clip(norms, 1e-12, None)
+
+    def _load(self):
+        if not self.persist_directory:
+            return
+        vectors_path = os.path.join(self.persist_directory, _VECTORS_FILE)
+        documents_path = os.path.join(self.persist_directory, _DOCUMENTS_FILE)
+        if not (os.path.exists(vectors_path) and os.path.exists(documents_path)):
+            return
+        try:
+            with open(documents_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            self._vectors = np.load(vectors_path, mmap_mode="r")
+            self._ids = stored["ids"]
+            self._documents = stored["documents"]
+            self._metadatas = stored["metadatas"]
+            self._rows = {doc_id: row for row, doc_id in enumerate(self._ids)}
+        except (OSError, ValueError, KeyError) as e:
+            raise Exception(f"Failed to load vector index: {str(e)}")
+
+    def _schedule_save(self):
+        """
+        Marks the index dirty and saves it ``save_interval`` seconds later, so a
+        burst of writes costs one save.
+        """
+        if not self.persist_directory:
+            return
+        self._version += 1
+        if self.save_interval <= 0:
+            self.flush()
+        elif self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_interval, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def _save(self, vectors, stored):
+        os.makedirs(self.persist_directory, exist_ok=True)
+        vectors_path = os.path.join(self.persist_directory, _VECTORS_FILE)
+        documents_path = os.path.join(self.persist_directory, _DOCUMENTS_FILE)
+
+        with open(f"{vectors_path}.tmp", "wb") as f:
+            np.save(f, vectors)
+        with open(f"{documents_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+        os.replace(f"{vectors_path}.tmp", vectors_path)
+        os.replace(f"{documents_path}.tmp", documents_path)
@@ -0,0 +1,189 @@
+"""Incremental, bounded fetching of query results."""
+
+import logging
+import threading
+
+from models.query_result import QueryResult, estimate_row_bytes
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStream:
+    """
+    Fetches the rows of an executed query in ``fetchmany`` batches, stopping at a
+    row or byte cap. The pooled connection is held until the stream is exhausted
+    or closed, so a stream must not outlive the request that opened it; use
+    ``MaterializedQueryStream`` to page through results kept across requests.
+    """
+
+    def __init__(self, pool, sql_query, batch_size, max_rows=None, max_bytes=None, setup_statements=()):
+        """
+        Executes the query on a connection borrowed from the pool.
+
+        Args:
+            pool (ConnectionPool): Pool to borrow the connection from.
+            sql_query (str): SQL query string to execute.
+            batch_size (int): Rows fetched per batch.
+            max_rows (int, optional): Maximum number of rows to return.
+            max_bytes (int, optional): Approximate maximum size of returned rows.
+            setup_statements (Iterable[str], optional): Statements run on the
+                connection before the query, e.g. ``USE [Sales]``.
+        """
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.rows_fetched = 0
+        self.bytes_fetched = 0
+        self.truncated = False
+        self.exhausted = False
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._connection = pool.acquire()
+        self._cursor = None
+        try:
+            self._cursor = self._connection.cursor()
+            for statement in setup_statements:
+                self._cursor.execute(statement)
+            self._cursor.execute(sql_query)
+            self.columns = [desc[0] for desc in self._cursor.description] if self._cursor.description else []
+        except Exception:
+            self._release(check_health=True)
+            raise
+
+    def fetch_page(self):
+        """
+        Fetches the next batch of rows.
+
+        Returns:
+            List[tuple]: Next rows, or an empty list once the stream is exhausted.
+        """
+        with self._lock:
+            if self.exhausted:
+                return []
+            try:
+                size = self.batch_size
+                if self.max_rows is not None:
+                    size = min(size, self.max_rows - self.rows_fetched)
+                batch = self._cursor.fetchmany(size) if size > 0 and self.columns else []
+            except Exception:
+                self._release(check_health=True)
+                raise
+
+            rows = []
+            for row in batch:
+                row = tuple(row)
+                row_bytes = estimate_row_bytes(row)
+                if self.max_bytes is not None and self.bytes_fetched + row_bytes > self.max_bytes:
+                    self.truncated = True
+                    break
+                self.bytes_fetched += row_bytes
+                rows.append(row)
+            self.rows_fetched += len(rows)
+
+            if self.truncated or len(batch) < size:
+                self._release()
+            elif self.max_rows is not None and self.rows_fetched >= self.max_rows:
+                self.truncated = self._has_more_rows()
+                self._release()
+            return rows
+
+    def __iter__(self):
+        """
+        Yields batches of rows until the stream is exhausted.
+        """
+        while True:
+            rows = self.fetch_page()
+            if not rows:
+                break
+            yield rows
+
+    def to_result(self):
+        """
+        Fetches all remaining rows (within the caps) into a ``QueryResult``.
+
+        Returns:
+            QueryResult: Materialized rows with the truncation flag.
+        """
+        rows = []
+        for batch in self:
+            rows.extend(batch)
+        return QueryResult(columns=self.columns, rows=rows, truncated=self.truncated)
+
+    def close(self):
+        """
+        Stops fetching and returns the connection to the pool.
+        """
+        with self._lock:
+            if not self.exhausted:
+                self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __del__(self):
+        # Last resort only: callers must close streams they do not exhaust, since
+        # garbage collection may come much later, if at all
+        if not getattr(self, "exhausted", True):
+            logger.warning("QueryStream was not closed; returning its connection on garbage collection")
+            self._release()
+
+    def _has_more_rows(self):
+        """
+        Checks whether the row cap cut off further rows.
+        """
+        try:
+            return self._cursor.fetchone() is not None
+        except Exception:
+            return False
+
+    def _release(self, check_health=False):
+        self.exhausted = True
+        try:
+            if self._cursor is not None:
+                self._cursor.close()
+        except Exception:
+            check_health = True
+        self._pool.release(self._connection, check_health=check_health)
+
+
+class MaterializedQueryStream:
+    """
+    ``QueryStream`` interface over an already fetched ``QueryResult``, e.g. one
+    served from the result cache, so callers page through both the same way.
+    """
+
+    def __init__(self, result: QueryResult, batch_size):
+        self.columns = result.columns
+        self.batch_size = batch_size
+        self.truncated = result.truncated
+        self.rows_fetched = 0
+        self.exhausted = not result.rows
+        self._rows = result.rows
+
+    def fetch_page(self):
+        page = self._rows[self.rows_fetched:self.rows_fetched + self.batch_size]
+        self.rows_fetched += len(page)
+        self.exhausted = self.rows_fetched >= len(self._rows)
+        return page
+
+    def __iter__(self):
+        while not self.exhausted:
+            yield self.fetch_page()
+
+    def to_result(self):
+        rows = []
+        for batch in self:
+            rows.extend(batch)
+        return QueryResult(columns=self.columns, rows=rows, truncated=self.truncated)
+
+    def close(self):
+        self.exhausted = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
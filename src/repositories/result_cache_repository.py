@@ -0,0 +1,176 @@
+"""Repository for cached query results."""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class ResultCacheRepository:
+    """
+    Key-addressed cache of serialized query results: an in-memory LRU bounded by
+    total bytes in front of an optional directory of files. Entries expire
+    ``ttl_seconds`` after they were stored, in both tiers.
+    """
+
+    def __init__(self, max_bytes, ttl_seconds, cache_dir=None, disk_max_bytes=None):
+        """
+        Initializes the cache.
+
+        Args:
+            max_bytes (int): Total size of the blobs kept in memory.
+            ttl_seconds (float): Lifetime of an entry.
+            cache_dir (str, optional): Directory for the on-disk tier. Disabled when unset.
+            disk_max_bytes (int, optional): Total size of the on-disk tier; the
+                oldest files are removed beyond it. Unbounded when unset.
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.cache_dir = cache_dir
+        self.disk_max_bytes = disk_max_bytes
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.RLock()
+        self._disk_bytes = None
+
+    def get(self, key):
+        """
+        Looks up a blob, promoting disk hits into memory.
+
+        Args:
+            key (str): Cache key.
+
+        Returns:
+            tuple: ``(blob, tier)`` with tier ``memory`` or ``disk``, or ``(None, None)``.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                blob, stored_at = entry
+                if time.time() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    return blob, "memory"
+                self._forget(key)
+
+        loaded = self._load(key)
+        if loaded is None:
+            return None, None
+        blob, stored_at = loaded
+        self._remember(key, blob, stored_at)
+        return blob, "disk"
+
+    def put(self, key, blob):
+        """
+        Stores a blob in both tiers.
+
+        Args:
+            key (str): Cache key.
+            blob (bytes): Serialized result.
+        """
+        stored_at = time.time()
+        self._remember(key, blob, stored_at)
+        self._store(key, blob)
+
+    def entry_count(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        """
+        Drops the in-memory tier. Files on disk expire on their own.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remember(self, key, blob, stored_at):
+        if len(blob) > self.max_bytes:
+            return
+        with self._lock:
+            self._forget(key)
+            self._entries[key] = (blob, stored_at)
+            self.bytes += len(blob)
+            while self.bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+
+    def _forget(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[0])
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.bin")
+
+    def _load(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            stored_at = os.path.getmtime(path)
+            if time.time() - stored_at > self.ttl_seconds:
+                self._remove(path)
+                return None
+            with open(path, "rb") as f:
+                return f.read(), stored_at
+        except OSError:
+            return None
+
+    def _store(self, key, blob):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(blob)
+            with self._disk_lock:
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+                if self._disk_bytes is not None:
+                    self._disk_bytes += len(blob) - previous
+            self._prune_disk()
+        except OSError:
+            # The disk tier is best effort; the result stays cached in memory.
+            pass
+
+    def _prune_disk(self):
+        """
+        Removes the oldest files once the on-disk tier exceeds its bound.
+        """
+        if not self.disk_max_bytes:
+            return
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, size, _ in self._disk_files())
+            if self._disk_bytes <= self.disk_max_bytes:
+                return
+            for path, _, _ in sorted(self._disk_files(), key=lambda item: item[2]):
+                if self._disk_bytes <= self.disk_max_bytes:
+                    break
+                self._remove(path)
+
+    def _disk_files(self):
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith(".bin"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _remove(self, path):
+        with self._disk_lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
@@ -0,0 +1,66 @@
+"""Repository for the on-disk schema cache snapshot."""
+
+import json
+import os
+import threading
+
+
+class SchemaCacheRepository:
+    """
+    Persists extracted schemas and their fingerprints to a JSON file.
+    """
+
+    def __init__(self, cache_path):
+        """
+        Initializes the repository.
+
+        Args:
+            cache_path (str): Path of the JSON snapshot file.
+        """
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        """
+        Loads a cached schema entry.
+
+        Args:
+            key (str): Cache key, e.g. ``server/database``.
+
+        Returns:
+            dict or None: ``{"fingerprint": str, "schema": dict}`` if present.
+        """
+        with self._lock:
+            return self._read_all().get(key)
+
+    def save(self, key, entry):
+        """
+        Stores a cached schema entry, replacing the snapshot file atomically.
+
+        Args:
+            key (str): Cache key, e.g. ``server/database``.
+            entry (dict): ``{"fingerprint": str, "schema": dict}``.
+        """
+        with self._lock:
+            try:
+                entries = self._read_all()
+                entries[key] = entry
+                directory = os.path.dirname(self.cache_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.cache_path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entries, f)
+                os.replace(tmp_path, self.cache_path)
+            except OSError as e:
+                raise Exception(f"Failed to write schema cache: {str(e)}")
+
+    def _read_all(self):
+        if not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # A corrupt or unreadable snapshot is treated as a cold cache.
+            return {}
@@ -0,0 +1,219 @@
+"""Process-wide registry of lazily created heavy resources."""
+
+import logging
+import os
+import threading
+
+import metrics
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceRegistry:
+    """
+    Creates each registered resource at most once per process, on first use.
+
+    Streamlit re-executes the app script on every interaction, but imported
+    modules survive reruns, so resources held here are built only once.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, factory):
+        """
+        Registers a factory for a resource.
+
+        Args:
+            name (str): Resource name.
+            factory (Callable[[], Any]): Builds the resource; may call ``get``
+                for its own dependencies.
+        """
+        with self._lock:
+            self._factories[name] = factory
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """
+        Returns a resource, creating it on first use.
+
+        Args:
+            name (str): Resource name.
+
+        Returns:
+            Any: The single instance of the resource in this process.
+        """
+        if name in self._instances:
+            return self._instances[name]
+        if name not in self._factories:
+            raise KeyError(f"Unknown resource: {name}")
+
+        with self._locks[name]:
+            if name not in self._instances:
+                logger.info(f"Creating resource: {name}")
+                self._instances[name] = self._factories[name]()
+        return self._instances[name]
+
+    def is_loaded(self, name):
+        return name in self._instances
+
+    def prewarm(self, names):
+        """
+        Creates resources in a background thread so that the first request does
+        not pay for model loading.
+
+        Args:
+            names (Iterable[str]): Resource names, created in order.
+
+        Returns:
+            threading.Thread: The started daemon thread.
+        """
+        names = list(names)
+
+        def _warm():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    # The error surfaces again on first real use.
+                    logger.warning(f"Failed to pre-warm {name}: {str(e)}")
+
+        thread = threading.Thread(target=_warm, name="resource-prewarm", daemon=True)
+        thread.start()
+        return thread
+
+
+registry = ResourceRegistry()
+_prewarm_lock = threading.Lock()
+_prewarm_thread = None
+_metrics_lock = threading.Lock()
+_metrics_server = None
+_schema_refresher = None
+
+
+def _create_embedding_service():
+    from services.embedding_service import EmbeddingService
+    return EmbeddingService()
+
+
+def _create_mssql_repository():
+    from repositories.mssql_repository import MSSQLRepository
+    return MSSQLRepository()
+
+
+def _create_vector_repository():
+    from repositories.chroma_repository import ChromaRepository, versioned_collection_name
+    from repositories.numpy_vector_repository import NumpyVectorRepository
+
+    embedding_service = registry.get("embedding_service")
+    if Config.VECTOR_BACKEND == "numpy":
+        persist_directory = None
+        if Config.VECTOR_INDEX_DIRECTORY:
+            persist_directory = os.path.join(
+                Config.VECTOR_INDEX_DIRECTORY,
+                versioned_collection_name(
+                    Config.CHROMA_COLLECTION_NAME, embedding_service.model_id, embedding_service.dimension
+                )
+            )
+        return NumpyVectorRepository(
+            persist_directory=persist_directory,
+            index_type=Config.VECTOR_INDEX_TYPE,
+            nlist=Config.VECTOR_IVF_NLIST,
+            nprobe=Config.VECTOR_IVF_NPROBE,
+            retrain_fraction=Config.VECTOR_IVF_RETRAIN_FRACTION,
+            save_interval=Config.VECTOR_INDEX_SAVE_INTERVAL
+        )
+    if Config.VECTOR_BACKEND != "chroma":
+        raise Exception(f"Unknown vector backend: {Config.VECTOR_BACKEND}")
+    return ChromaRepository(
+        persist_directory=Config.CHROMA_PERSIST_DIRECTORY,
+        embedding_model=embedding_service.model_id,
+        embedding_dimension=embedding_service.dimension
+    )
+
+
+def _create_gemini_service():
+    from services.gemini_service import GeminiService
+    return GeminiService()
+
+
+def _create_query_agent():
+    global _schema_refresher
+    from query_agent import QueryAgent
+    from services.schema_service import SchemaService
+    from services.vector_search_service import VectorSearchService
+    from services.schema_indexing_service import SchemaIndexingService
+    from services.schema_refresher import SchemaRefresher
+    from services.sql_cache_service import SQLCacheService
+
+    mssql_repo = registry.get("mssql_repository")
+    embedding_service = registry.get("embedding_service")
+    schema_service = SchemaService(db_repository=mssql_repo)
+    vector_search_service = VectorSearchService(chroma_repo=registry.get("vector_repository"))
+    agent = QueryAgent(
+        schema_service,
+        embedding_service,
+        vector_search_service,
+        registry.get("gemini_service"),
+        mssql_repo,
+        SchemaIndexingService(schema_service, embedding_service, vector_search_service),
+        SQLCacheService()
+    )
+    metrics.register_collector("sql_cache", agent.sql_cache_service.stats)
+    metrics.register_collector("result_cache", agent.result_cache_service.stats)
+    # Index the routable databases at startup, off the request path
+    if Config.SCHEMA_REFRESH_INTERVAL > 0:
+        _schema_refresher = SchemaRefresher(agent.schema_indexing_service).start()
+    else:
+        threading.Thread(
+            target=SchemaRefresher(agent.schema_indexing_service, max_duty_cycle=1.0).refresh_once,
+            name="schema-indexing", daemon=True
+        ).start()
+    return agent
+
+
+registry.register("embedding_service", _create_embedding_service)
+registry.register("mssql_repository", _create_mssql_repository)
+registry.register("vector_repository", _create_vector_repository)
+registry.register("gemini_service", _create_gemini_service)
+registry.register("query_agent", _create_query_agent)
+
+
+def get_query_agent():
+    """
+    Returns the process-wide QueryAgent, creating it and its dependencies on first use.
+    """
+    return registry.get("query_agent")
+
+
+def prewarm():
+    """
+    Starts building the QueryAgent in the background, once per process, when
+    ``Config.PREWARM_RESOURCES`` is enabled.
+    """
+    global _prewarm_thread
+    if not Config.PREWARM_RESOURCES:
+        return
+    with _prewarm_lock:
+        if _prewarm_thread is None:
+            _prewarm_thread = registry.prewarm(["query_agent"])
+
+
+def start_metrics():
+    """
+    Starts the metrics HTTP endpoint and the sampling profiler, once per process,
+    when ``Config.METRICS_PORT`` and ``Config.METRICS_PROFILER_INTERVAL`` are set.
+    """
+    global _metrics_server
+    with _metrics_lock:
+        if Config.METRICS_PROFILER_INTERVAL > 0:
+            metrics.start_profiler(Config.METRICS_PROFILER_INTERVAL)
+        if Config.METRICS_PORT and _metrics_server is None:
+            try:
+                _metrics_server = metrics.start_http_server(Config.METRICS_PORT, Config.METRICS_HOST)
+            except OSError as e:
+                logger.warning(f"Failed to start metrics server: {str(e)}")
@@ -0,0 +1,175 @@
+"""Pluggable backends that turn text into embedding vectors."""
+
+import os
+
+import numpy as np
+
+from config import Config
+
+SENTENCE_TRANSFORMERS_BACKEND = "sentence-transformers"
+ONNX_BACKEND = "onnx"
+
+
+class SentenceTransformerBackend:
+    """
+    Reference backend running the full PyTorch SentenceTransformer stack.
+    """
+
+    name = SENTENCE_TRANSFORMERS_BACKEND
+
+    def __init__(self, model_name):
+        """
+        Loads the Sentence Transformer model.
+
+        Args:
+            model_name (str): Pre-trained embedding model name.
+        """
+        # Imported lazily: sentence-transformers pulls in torch
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    @property
+    def dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, batch_size):
+        """
+        Encodes texts into a float32 matrix.
+
+        Args:
+            texts (List[str]): Texts to encode.
+            batch_size (int): Texts per forward pass.
+
+        Returns:
+            np.ndarray: One row per text.
+        """
+        return self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True).astype(np.float32, copy=False)
+
+
+class OnnxEmbeddingBackend:
+    """
+    CPU backend running an exported (optionally int8-quantized) transformer with
+    ONNX Runtime, followed by the same mean pooling and normalization as the
+    Sentence Transformer pipeline. Does not import torch.
+    """
+
+    name = ONNX_BACKEND
+
+    def __init__(self, model_name, onnx_file="onnx/model_quint8_avx2.onnx", onnx_path=None,
+                 max_length=256, num_threads=0, normalize=True):
+        """
+        Loads the tokenizer and ONNX model.
+
+        Args:
+            model_name (str): Pre-trained model name; names without an organization
+                resolve to ``sentence-transformers/<name>`` on the Hugging Face Hub.
+            onnx_file (str, optional): ONNX file inside the model repository. The
+                ``*_quint8_*``/``*_qint8_*`` files are the int8-quantized exports.
+            onnx_path (str, optional): Local ONNX model file; overrides ``onnx_file``.
+                Its ``tokenizer.json`` is read from the same directory or, for the
+                ``onnx/`` layout of exported repositories, the one above, so
+                nothing is downloaded.
+            max_length (int, optional): Maximum tokens per text, as in the reference model.
+            num_threads (int, optional): Intra-op threads, 0 lets ONNX Runtime decide.
+            normalize (bool, optional): L2-normalize the pooled embeddings.
+        """
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise Exception(f"The ONNX embedding backend requires onnxruntime and tokenizers: {str(e)}")
+
+        if onnx_path:
+            model_path = onnx_path
+            tokenizer_path = self._local_tokenizer_path(onnx_path)
+        else:
+            try:
+                from huggingface_hub import hf_hub_download
+            except ImportError as e:
+                raise Exception(f"Downloading the ONNX model requires huggingface_hub: {str(e)}")
+            repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+            model_path = hf_hub_download(repo_id, onnx_file)
+            tokenizer_path = hf_hub_download(repo_id, "tokenizer.json")
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+        self.normalize = normalize
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {model_input.name for model_input in self.session.get_inputs()}
+        self._dimension = None
+
+    @staticmethod
+    def _local_tokenizer_path(onnx_path):
+        model_directory = os.path.dirname(os.path.abspath(onnx_path))
+        for directory in (model_directory, os.path.dirname(model_directory)):
+            tokenizer_path = os.path.join(directory, "tokenizer.json")
+            if os.path.exists(tokenizer_path):
+                return tokenizer_path
+        raise Exception(f"No tokenizer.json next to the local ONNX model {onnx_path}")
+
+    @property
+    def dimension(self):
+        if self._dimension is None:
+            self._dimension = self.encode(["dimension probe"], batch_size=1).shape[1]
+        return self._dimension
+
+    def encode(self, texts, batch_size):
+        """
+        Encodes texts into a float32 matrix.
+
+        Args:
+            texts (List[str]): Texts to encode.
+            batch_size (int): Texts per inference call.
+
+        Returns:
+            np.ndarray: One row per text.
+        """
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[start:start + batch_size])
+            input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+            attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+
+            inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+            if "token_type_ids" in self._input_names:
+                inputs["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+            token_embeddings = self.session.run(None, inputs)[0]
+
+            # Mean pooling over non-padding tokens
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32, copy=False))
+
+        return np.concatenate(batches) if batches else np.empty((0, 0), dtype=np.float32)
+
+
+def create_embedding_backend(backend_name, model_name):
+    """
+    Creates the embedding backend selected in configuration.
+
+    Args:
+        backend_name (str): ``sentence-transformers`` or ``onnx``.
+        model_name (str): Pre-trained embedding model name.
+
+    Returns:
+        SentenceTransformerBackend or OnnxEmbeddingBackend: Loaded backend.
+    """
+    if backend_name == SENTENCE_TRANSFORMERS_BACKEND:
+        return SentenceTransformerBackend(model_name)
+    if backend_name == ONNX_BACKEND:
+        return OnnxEmbeddingBackend(
+            model_name,
+            onnx_file=Config.EMBEDDING_ONNX_FILE,
+            onnx_path=Config.EMBEDDING_ONNX_PATH,
+            num_threads=Config.EMBEDDING_ONNX_THREADS
+        )
+    raise Exception(f"Unknown embedding backend: {backend_name}")
@@ -1,21 +1,58 @@
-"""Service for generating embeddings using Sentence Transformers."""
+"""Service for generating embeddings using Sentence Transformers or ONNX Runtime."""
 
-from sentence_transformers import SentenceTransformer
+import hashlib
+
+import numpy as np
+
+from config import Config
+from repositories.embedding_cache_repository import EmbeddingCacheRepository
+from services.embedding_backends import SENTENCE_TRANSFORMERS_BACKEND, create_embedding_backend
 
 
 class EmbeddingService:
     """
-    Service layer for generating text embeddings using Sentence Transformers.
+    Service layer for generating text embeddings with a configurable backend
+    (Sentence Transformers or ONNX Runtime).
+
+    Embeddings are float32 NumPy arrays end to end and are cached by a hash of
+    the model name and text, so only text that changed is ever encoded.
     """
 
-    def __init__(self, model_name="all-MiniLM-L6-v2"):
+    def __init__(self, model_name=Config.EMBEDDING_MODEL_NAME, backend=None,
+                 cache_repository: EmbeddingCacheRepository = None):
         """
-        Initializes the Sentence Transformer model.
+        Initializes the embedding backend.
 
         Args:
             model_name (str, optional): Pre-trained embedding model name.
+            backend (optional): Embedding backend. Defaults to the one selected by
+                ``Config.EMBEDDING_BACKEND``.
+            cache_repository (EmbeddingCacheRepository, optional): Embedding cache.
+                Defaults to one configured from ``Config``.
+        """
+        self.model_name = model_name
+        self.backend = backend or create_embedding_backend(Config.EMBEDDING_BACKEND, model_name)
+        self.cache_repository = cache_repository or EmbeddingCacheRepository(
+            max_entries=Config.EMBEDDING_CACHE_SIZE,
+            cache_dir=Config.EMBEDDING_CACHE_DIR
+        )
+
+    @property
+    def dimension(self):
         """
-        self.model = SentenceTransformer(model_name)
+        int: Dimension of the generated embedding vectors.
+        """
+        return self.backend.dimension
+
+    @property
+    def model_id(self):
+        """
+        str: Model name qualified by the backend when it is not the reference one,
+        so that vectors of different backends are never mixed in one index.
+        """
+        if self.backend.name == SENTENCE_TRANSFORMERS_BACKEND:
+            return self.model_name
+        return f"{self.model_name}-{self.backend.name}"
 
     def generate_embedding(self, text):
         """
@@ -25,10 +62,42 @@ class EmbeddingService:
             text (str): Text to generate an embedding for.
 
         Returns:
-            List[float]: Embedding vector.
+            np.ndarray: float32 embedding vector.
+        """
+        return self.generate_embeddings([text])[0]
+
+    def generate_embeddings(self, texts, batch_size=Config.EMBEDDING_BATCH_SIZE):
+        """
+        Generates embedding vectors for several texts, encoding only those that
+        are not cached, in batches.
+
+        Args:
+            texts (List[str]): Texts to generate embeddings for.
+            batch_size (int, optional): Texts encoded per forward pass.
+
+        Returns:
+            np.ndarray: float32 matrix with one row per input text.
         """
         try:
-            embedding = self.model.encode(text, convert_to_numpy=True).tolist()
-            return embedding
+            keys = [self._cache_key(text) for text in texts]
+            vectors = self.cache_repository.get_many(keys)
+
+            pending = {}
+            for key, text in zip(keys, texts):
+                if key not in vectors:
+                    pending.setdefault(key, text)
+
+            if pending:
+                encoded = self.backend.encode(list(pending.values()), batch_size=batch_size)
+                new_vectors = dict(zip(pending.keys(), encoded))
+                self.cache_repository.put_many(new_vectors)
+                vectors.update(new_vectors)
+
+            if not keys:
+                return np.empty((0, self.dimension), dtype=np.float32)
+            return np.stack([vectors[key] for key in keys])
         except Exception as e:
             raise Exception(f"Failed to generate embedding: {str(e)}")
+
+    def _cache_key(self, text):
+        return hashlib.sha256(f"{self.model_id}\0{text}".encode("utf-8")).hexdigest()
@@ -1,16 +1,21 @@
 """ Service for building prompts and querying Gemini LLM API. """
 
-import google.generativeai as genai
 import logging
-from config import Config
+from services.llm_client import LLMClient, create_llm_provider
+
+logger = logging.getLogger(__name__)
 
 
 class GeminiService:
     """Handles prompt creation and LLM API calls."""
 
-    def __init__(self):
-        genai.configure(api_key=Config.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel("gemini-1.5-pro")
+    def __init__(self, llm_client: LLMClient = None):
+        """
+        Args:
+            llm_client (LLMClient, optional): LLM call layer. Defaults to one wrapping
+                the provider selected by ``Config.LLM_PROVIDER``.
+        """
+        self.llm_client = llm_client or LLMClient(create_llm_provider())
 
     def build_prompt(self, schema_context, user_query):
         """Compose the final prompt for the LLM."""
@@ -29,18 +34,26 @@ class GeminiService:
     def generate_sql_query(self, prompt):
         """Send prompt to Gemini and retrieve generated SQL query."""
         try:
-            response = self.model.generate_content(
-                contents=prompt
-            )
-            # The generated text is usually under `response.candidates[0].content`
-           
-            logging.info(f"Gemini response: {response}")
-            sql_query = response.text.strip()
+            response_text = self.llm_client.generate(prompt)
+            logger.debug("Gemini response: %s", response_text)
+            sql_query = response_text.strip()
             cleaned_sql = self.clean_sql_string(sql_query)
             return cleaned_sql
         except Exception as e:
             raise Exception(f"Failed to generate SQL query: {str(e)}")
 
+    def stream_sql_query(self, prompt):
+        """
+        Send prompt to Gemini and yield the response as it is generated.
+
+        Yields:
+            str: Response text chunks. The concatenation still needs ``clean_sql_string``.
+        """
+        try:
+            yield from self.llm_client.stream(prompt)
+        except Exception as e:
+            raise Exception(f"Failed to generate SQL query: {str(e)}")
+
     def clean_sql_string(self, sql_string):
         clean_sql = sql_string.replace("```sql\n", "").replace("\n```", "").strip()
         return clean_sql
@@ -0,0 +1,316 @@
+"""LLM client layer: providers plus deadlines, retries and rate limiting."""
+
+import logging
+import random
+from abc import ABC, abstractmethod
+import re
+import threading
+import time
+
+import metrics
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# HTTP status codes worth retrying: rate limiting and transient server errors
+_RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+_RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway",
+}
+
+
+class LLMTimeoutError(Exception):
+    """Raised when an LLM call cannot finish within its deadline."""
+
+
+class LLMProvider(ABC):
+    """
+    Interface of an LLM backend. ``timeout`` is the time left for the call, in seconds.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, prompt, timeout):
+        """
+        Generates a complete response.
+
+        Returns:
+            str: Response text.
+        """
+
+    def stream(self, prompt, timeout):
+        """
+        Yields the response in text chunks. Providers without native streaming
+        return the whole response as one chunk.
+        """
+        yield self.generate(prompt, timeout)
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini via google-generativeai.
+    """
+
+    name = "gemini"
+
+    def __init__(self, model_name=Config.LLM_MODEL_NAME, api_key=Config.GEMINI_API_KEY):
+        # Imported lazily: google-generativeai is slow to import
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate(self, prompt, timeout):
+        response = self.model.generate_content(contents=prompt, request_options={"timeout": timeout})
+        logger.debug("Gemini response: %s", response)
+        return response.text
+
+    def stream(self, prompt, timeout):
+        response = self.model.generate_content(
+            contents=prompt, stream=True, request_options={"timeout": timeout}
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class FakeLLMProvider(LLMProvider):
+    """
+    Deterministic local model for tests and benchmarks. It answers with a
+    ``SELECT TOP 10`` from the first table in the prompt's schema context, after
+    an optional simulated latency, and can fail a number of initial calls with a
+    retryable error.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.0, chunk_size=8, fail_first=0):
+        """
+        Args:
+            latency (float, optional): Seconds to sleep per call.
+            chunk_size (int, optional): Characters per streamed chunk.
+            fail_first (int, optional): Number of initial calls that fail with a
+                retryable error.
+        """
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self._fail_first = fail_first
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, timeout):
+        with self._lock:
+            self.calls += 1
+            fail = self.calls <= self._fail_first
+        if self.latency > timeout:
+            time.sleep(timeout)
+            raise LLMTimeoutError("Fake LLM call exceeded its deadline")
+        time.sleep(self.latency)
+        if fail:
+            error = Exception("Fake LLM is rate limited")
+            error.code = 429
+            raise error
+
+        # First table line of the schema context, compact or verbose
+        match = re.search(r"^\s*(?:Table: )?(?!Types:)([\w.]+)(?: \||:) ", prompt, re.MULTILINE)
+        table = match.group(1) if match else "INFORMATION_SCHEMA.TABLES"
+        return f"```sql\nSELECT TOP 10 * FROM {table}\n```"
+
+    def stream(self, prompt, timeout):
+        text = self.generate(prompt, timeout)
+        for start in range(0, len(text), self.chunk_size):
+            yield text[start:start + self.chunk_size]
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket allowing ``rate`` acquisitions per second on
+    average, with bursts of up to ``capacity``.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        """
+        Takes one token, waiting up to ``timeout`` seconds.
+
+        Returns:
+            bool: False if no token became available in time.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class LLMClient:
+    """
+    Wraps an ``LLMProvider`` with a per-call deadline, jittered exponential
+    retries on rate limiting and transient errors, a concurrency cap and a
+    request-rate limit shared by every caller of this client.
+    """
+
+    def __init__(self, provider: LLMProvider,
+                 timeout=Config.LLM_TIMEOUT_SECONDS,
+                 max_retries=Config.LLM_MAX_RETRIES,
+                 backoff_base=Config.LLM_BACKOFF_BASE_SECONDS,
+                 backoff_max=Config.LLM_BACKOFF_MAX_SECONDS,
+                 max_concurrency=Config.LLM_MAX_CONCURRENCY,
+                 requests_per_minute=Config.LLM_REQUESTS_PER_MINUTE):
+        """
+        Args:
+            provider (LLMProvider): Backend model.
+            timeout (float, optional): Deadline of a call including retries, in seconds.
+            max_retries (int, optional): Retries after the first attempt.
+            backoff_base (float, optional): Backoff ceiling of the first retry.
+            backoff_max (float, optional): Maximum backoff ceiling.
+            max_concurrency (int, optional): Calls in flight at once.
+            requests_per_minute (float, optional): Average request rate, 0 to disable.
+        """
+        self.provider = provider
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._bucket = None
+        if requests_per_minute:
+            # Allow a burst of one request per concurrency slot on top of the average rate
+            self._bucket = TokenBucket(requests_per_minute / 60.0, float(max(1, max_concurrency)))
+
+    def generate(self, prompt, timeout=None):
+        """
+        Generates a complete response.
+
+        Args:
+            prompt (str): Prompt text.
+            timeout (float, optional): Overrides the client deadline.
+
+        Returns:
+            str: Response text.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        attempt = 0
+        while True:
+            self._admit(deadline)
+            try:
+                return self.provider.generate(prompt, self._remaining(deadline))
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, deadline)
+            finally:
+                self._semaphore.release()
+            # Back off without holding a concurrency slot
+            time.sleep(delay)
+            attempt += 1
+
+    def stream(self, prompt, timeout=None):
+        """
+        Generates a response as text chunks. Failures before the first chunk are
+        retried; once output has been yielded, errors are raised to the caller.
+
+        Args:
+            prompt (str): Prompt text.
+            timeout (float, optional): Overrides the client deadline.
+
+        Yields:
+            str: Response text chunks.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        attempt = 0
+        while True:
+            self._admit(deadline)
+            started = False
+            try:
+                for chunk in self.provider.stream(prompt, self._remaining(deadline)):
+                    started = True
+                    yield chunk
+                    if time.monotonic() > deadline:
+                        raise LLMTimeoutError(f"LLM response exceeded the {self.timeout}s deadline")
+                return
+            except Exception as e:
+                if started:
+                    raise
+                delay = self._retry_delay(e, attempt, deadline)
+            finally:
+                self._semaphore.release()
+            time.sleep(delay)
+            attempt += 1
+
+    def _admit(self, deadline):
+        """
+        Waits for a concurrency slot and a rate-limit token within the deadline.
+        """
+        if not self._semaphore.acquire(timeout=self._remaining(deadline)):
+            raise LLMTimeoutError("Timed out waiting for an LLM concurrency slot")
+        if self._bucket is not None and not self._bucket.acquire(self._remaining(deadline)):
+            self._semaphore.release()
+            raise LLMTimeoutError("Timed out waiting for the LLM rate limiter")
+
+    def _retry_delay(self, error, attempt, deadline):
+        """
+        Re-raises errors that are not retryable or leave no time for a retry.
+
+        Returns:
+            float: Jittered backoff to sleep before the next attempt.
+        """
+        if not self._is_retryable(error) or attempt >= self.max_retries:
+            raise error
+        # Full jitter: sleep uniformly up to the exponential ceiling
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if time.monotonic() + delay >= deadline:
+            raise error
+        logger.warning(f"Retrying LLM call after error ({str(error)}) in {delay:.2f}s")
+        metrics.increment("llm_retries_total", error=type(error).__name__)
+        return delay
+
+    @staticmethod
+    def _is_retryable(error):
+        if isinstance(error, LLMTimeoutError):
+            return False
+        if isinstance(error, (TimeoutError, ConnectionError)):
+            return True
+        code = getattr(error, "code", None)
+        code = getattr(code, "value", code)
+        if code in _RETRYABLE_STATUS_CODES:
+            return True
+        return type(error).__name__ in _RETRYABLE_ERROR_NAMES
+
+    @staticmethod
+    def _remaining(deadline):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMTimeoutError("LLM call deadline exceeded")
+        return remaining
+
+
+def create_llm_provider(provider_name=Config.LLM_PROVIDER):
+    """
+    Creates the LLM provider selected in configuration.
+
+    Args:
+        provider_name (str, optional): ``gemini`` or ``fake``.
+
+    Returns:
+        LLMProvider: Provider instance.
+    """
+    if provider_name == GeminiProvider.name:
+        return GeminiProvider()
+    if provider_name == FakeLLMProvider.name:
+        return FakeLLMProvider()
+    raise Exception(f"Unknown LLM provider: {provider_name}")
@@ -0,0 +1,232 @@
+"""Token-budgeted prompt construction with schema compression."""
+
+import math
+import re
+
+from config import Config
+from models.built_prompt import BuiltPrompt
+from models.schema_models import DatabaseSchema, TableInfo
+
+# Short codes for the verbose SQL Server type names; a legend of the codes used
+# is added to the prompt.
+TYPE_CODES = {
+    "bigint": "bi", "int": "i", "smallint": "si", "tinyint": "ti", "bit": "b",
+    "decimal": "d", "numeric": "n", "money": "m", "smallmoney": "sm", "float": "f", "real": "r",
+    "date": "dt", "datetime": "dtm", "datetime2": "dt2", "smalldatetime": "sdt",
+    "datetimeoffset": "dto", "time": "tm",
+    "char": "c", "varchar": "vc", "nchar": "nc", "nvarchar": "nvc", "text": "t", "ntext": "nt",
+    "binary": "bin", "varbinary": "vb", "uniqueidentifier": "uid", "xml": "x",
+}
+
+# Bookkeeping columns that rarely matter for answering a question.
+_AUDIT_COLUMN_PATTERN = re.compile(
+    r"^(created|modified|updated|changed|last_?modified|last_?updated|inserted|deleted)_?(at|by|on|date|time|datetime|user|utc)?$"
+    r"|^(rowguid|row_?version|timestamp|sys_?start_?time|sys_?end_?time|valid_?from|valid_?to)$",
+    re.IGNORECASE
+)
+_AUDIT_TYPES = {"timestamp", "rowversion"}
+_TOKEN_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_IDENTIFIER_PART_PATTERN = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+")
+
+
+def estimate_tokens(text):
+    """
+    Estimates the LLM token count of a text without a tokenizer: words cost one
+    token per four characters and every punctuation mark one token, which is
+    close to subword tokenizers on schema text and never undercounts much.
+
+    Args:
+        text (str): Text to measure.
+
+    Returns:
+        int: Estimated token count.
+    """
+    return sum(
+        math.ceil(len(piece) / 4) if piece[0].isalnum() else 1
+        for piece in _TOKEN_PATTERN.findall(text)
+    )
+
+
+def _words(text):
+    """
+    Splits text or an identifier (``CustomerId``, ``order_date``) into lowercase
+    words with a trailing plural ``s`` removed.
+    """
+    words = set()
+    for part in _IDENTIFIER_PART_PATTERN.findall(text):
+        word = part.lower()
+        if len(word) > 3 and word.endswith("s"):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+class PromptBuilder:
+    """
+    Builds the SQL generation prompt within a token budget.
+
+    Tables are ranked by retrieval relevance: vector search matches by distance,
+    then their foreign-key neighbours, and, when nothing matched, every table by
+    word overlap with the question. Each table is rendered compactly (short type
+    codes, ``*`` for primary keys, ``>Table.Column`` foreign-key hints, audit
+    columns dropped) and added in rank order while it fits. A table that does not
+    fit is retried with only its key and question-relevant columns, then omitted,
+    so the same inputs always give the same prompt. The top-ranked table is kept
+    even when it alone exceeds the budget.
+    """
+
+    def __init__(self, template, token_budget=Config.PROMPT_TOKEN_BUDGET,
+                 compress=Config.PROMPT_COMPRESS_SCHEMA,
+                 drop_audit_columns=Config.PROMPT_DROP_AUDIT_COLUMNS,
+                 token_counter=estimate_tokens):
+        """
+        Args:
+            template (Callable[[str, str], str]): Builds the final prompt from the
+                schema context and the user question, e.g. ``GeminiService.build_prompt``.
+            token_budget (int, optional): Maximum prompt tokens, 0 for no limit.
+            compress (bool, optional): Use the compact schema rendering.
+            drop_audit_columns (bool, optional): Leave out bookkeeping columns.
+            token_counter (Callable[[str], int], optional): Token counting function.
+        """
+        self.template = template
+        self.token_budget = token_budget
+        self.compress = compress
+        self.drop_audit_columns = drop_audit_columns
+        self.token_counter = token_counter
+
+    def build(self, schema: DatabaseSchema, table_names, user_query):
+        """
+        Builds the prompt for a question.
+
+        Args:
+            schema (DatabaseSchema): Structured schema of the target database.
+            table_names (List[str]): Tables matched by vector search, most similar
+                first. Empty to rank the whole schema against the question.
+            user_query (str): Natural language user question.
+
+        Returns:
+            BuiltPrompt: Prompt text with its token count and included tables.
+        """
+        question_words = _words(user_query)
+        ranked = self._rank_tables(schema, table_names, question_words)
+
+        lines = []
+        included, reduced, omitted = [], [], []
+        codes_used = set()
+        remaining = None
+        if self.token_budget:
+            remaining = self.token_budget - self.token_counter(self.template("", user_query))
+
+        for name in ranked:
+            table = schema.tables[name]
+            candidates = [(self._render_table(table, question_words, reduced=False), False)]
+            if self.compress:
+                candidates.append((self._render_table(table, question_words, reduced=True), True))
+
+            for (line, line_codes), is_reduced in candidates:
+                legend_cost = self._legend_cost(codes_used, line_codes)
+                cost = self.token_counter(line) + 1 + legend_cost
+                # The best match is always included, reduced if need be, since a
+                # prompt without any schema cannot produce usable SQL
+                must_include = not included and is_reduced == (len(candidates) > 1)
+                if remaining is None or cost <= remaining or must_include:
+                    if remaining is not None:
+                        remaining -= cost
+                    lines.append(line)
+                    codes_used |= line_codes
+                    included.append(name)
+                    if is_reduced:
+                        reduced.append(name)
+                    break
+            else:
+                omitted.append(name)
+
+        context = "".join(f"{line}\n" for line in lines)
+        if codes_used:
+            context = self._legend(codes_used) + "\n" + context
+        text = self.template(context, user_query)
+        return BuiltPrompt(
+            text=text,
+            token_count=self.token_counter(text),
+            token_budget=self.token_budget,
+            tables=included,
+            reduced_tables=reduced,
+            omitted_tables=omitted
+        )
+
+    def _rank_tables(self, schema, table_names, question_words):
+        """
+        Orders the candidate tables, most relevant first.
+        """
+        if table_names:
+            return schema.expand_with_foreign_keys(table_names)
+        # Nothing matched: rank the whole schema lexically, ties by name.
+        return sorted(
+            schema.tables,
+            key=lambda name: (-len(_words(name) & question_words), name)
+        )
+
+    def _render_table(self, table: TableInfo, question_words, reduced):
+        """
+        Renders one table line.
+
+        Returns:
+            Tuple[str, Set[str]]: Line and the type codes it uses.
+        """
+        if not self.compress:
+            return table.render(), set()
+
+        fk_by_column = {}
+        for fk in table.foreign_keys:
+            for column, ref_column in zip(fk.columns, fk.referenced_columns):
+                fk_by_column[column] = f"{self._short_name(fk.referenced_schema, fk.referenced_table)}.{ref_column}"
+
+        parts = []
+        codes = set()
+        skipped = 0
+        for column in table.columns:
+            is_key = column.is_primary_key or column.name in fk_by_column
+            is_relevant = bool(_words(column.name) & question_words)
+            if not is_key and not is_relevant:
+                if reduced or (self.drop_audit_columns and self._is_audit_column(column)):
+                    skipped += 1
+                    continue
+
+            code = TYPE_CODES.get(column.data_type, column.data_type)
+            if code != column.data_type:
+                codes.add(code)
+            # Keep the length/precision, e.g. nvc(50) or d(18,2)
+            part = f"{column.name} {code}{column.type_declaration()[len(column.data_type):]}"
+            if column.is_primary_key:
+                part += "*"
+            if column.name in fk_by_column:
+                part += f">{fk_by_column[column.name]}"
+            parts.append(part)
+
+        line = f"{self._short_name(table.schema_name, table.name)}: {', '.join(parts)}"
+        if reduced and skipped:
+            line += f", +{skipped} more"
+        return line, codes
+
+    def _legend_cost(self, codes_used, line_codes):
+        new_codes = line_codes - codes_used
+        if not new_codes:
+            return 0
+        return self.token_counter(self._legend(codes_used | new_codes)) - (
+            self.token_counter(self._legend(codes_used)) if codes_used else 0
+        )
+
+    @staticmethod
+    def _legend(codes):
+        names = {code: name for name, code in TYPE_CODES.items()}
+        entries = ", ".join(f"{code}={names[code]}" for code in sorted(codes))
+        return f"Types: {entries}; * primary key; > foreign key"
+
+    @staticmethod
+    def _is_audit_column(column):
+        return column.data_type in _AUDIT_TYPES or bool(_AUDIT_COLUMN_PATTERN.match(column.name))
+
+    @staticmethod
+    def _short_name(schema_name, table_name):
+        # dbo is the default schema, so it is implied
+        return table_name if schema_name == "dbo" else f"{schema_name}.{table_name}"
@@ -0,0 +1,220 @@
+"""Service for caching query results by normalized SQL."""
+
+import hashlib
+import logging
+import pickle
+import threading
+import zlib
+
+from config import Config
+from models.query_result import QueryResult, estimate_row_bytes
+from repositories.result_cache_repository import ResultCacheRepository
+from services.sql_guard_service import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+
+def result_cache_key(sql_query, database_name):
+    """
+    Builds the cache key of a query.
+
+    Args:
+        sql_query (str): SQL text.
+        database_name (str): Database the query runs in.
+
+    Returns:
+        str: Hex-encoded SHA-256 digest of the database and normalized SQL.
+    """
+    return hashlib.sha256(f"{database_name}\0{normalize_sql(sql_query)}".encode("utf-8")).hexdigest()
+
+
+class ResultCacheService:
+    """
+    Result cache in front of query execution, keyed on normalized SQL plus
+    database. Results are stored column by column as NumPy arrays, pickled and
+    zlib-compressed, in a byte-bounded LRU with a per-entry TTL and an optional
+    on-disk tier that survives restarts.
+
+    The on-disk tier holds pickles, so its directory must only be writable by
+    the application.
+    """
+
+    def __init__(self, repository: ResultCacheRepository = None, enabled=None):
+        """
+        Args:
+            repository (ResultCacheRepository, optional): Blob storage. Defaults to
+                one configured from ``Config``.
+            enabled (bool, optional): Defaults to ``Config.RESULT_CACHE_MAX_BYTES > 0``.
+        """
+        self.repository = repository or ResultCacheRepository(
+            max_bytes=Config.RESULT_CACHE_MAX_BYTES,
+            ttl_seconds=Config.RESULT_CACHE_TTL_SECONDS,
+            cache_dir=Config.RESULT_CACHE_DIR,
+            disk_max_bytes=Config.RESULT_CACHE_DISK_MAX_BYTES
+        )
+        self.enabled = Config.RESULT_CACHE_MAX_BYTES > 0 if enabled is None else enabled
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def get(self, sql_query, database_name):
+        """
+        Looks up the result of a query.
+
+        Args:
+            sql_query (str): SQL text.
+            database_name (str): Database the query runs in.
+
+        Returns:
+            QueryResult or None: Cached result.
+        """
+        if not self.enabled:
+            return None
+        blob, tier = self.repository.get(result_cache_key(sql_query, database_name))
+        result, result_bytes = None, 0
+        if blob is not None:
+            try:
+                result, result_bytes = self._deserialize(blob)
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable cached result: {str(e)}")
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+            else:
+                if tier == "memory":
+                    self.memory_hits += 1
+                else:
+                    self.disk_hits += 1
+                self.bytes_saved += result_bytes
+        return result
+
+    def put(self, sql_query, database_name, result: QueryResult):
+        """
+        Stores the result of a query.
+
+        Args:
+            sql_query (str): SQL text.
+            database_name (str): Database the query ran in.
+            result (QueryResult): Fetched result.
+        """
+        if not self.enabled:
+            return
+        try:
+            blob = self._serialize(result)
+        except Exception as e:
+            logger.warning(f"Result not cached: {str(e)}")
+            return
+        self.repository.put(result_cache_key(sql_query, database_name), blob)
+
+    def caching_stream(self, sql_query, database_name, stream):
+        """
+        Wraps a query stream so its result is cached once it has been read to
+        the end. Streams closed early are not cached.
+
+        Args:
+            sql_query (str): SQL text.
+            database_name (str): Database the query runs in.
+            stream (QueryStream): Open stream of the query.
+
+        Returns:
+            _CachingQueryStream: Stream with the same interface.
+        """
+        if not self.enabled:
+            return stream
+        return _CachingQueryStream(self, sql_query, database_name, stream)
+
+    def stats(self):
+        """
+        Returns cache counters.
+
+        Returns:
+            dict: Entry count, bytes in memory, hits per tier, misses, hit rate and
+            the estimated result bytes served without querying the database.
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "entries": self.repository.entry_count(),
+                "bytes": self.repository.bytes,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+            }
+
+    @staticmethod
+    def _serialize(result):
+        payload = {
+            "columns": result.columns,
+            "arrays": result.to_column_arrays(),
+            "truncated": result.truncated,
+            "result_bytes": sum(estimate_row_bytes(row) for row in result.rows),
+        }
+        return zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def _deserialize(blob):
+        payload = pickle.loads(zlib.decompress(blob))
+        result = QueryResult.from_column_arrays(payload["columns"], payload["arrays"], payload["truncated"])
+        return result, payload["result_bytes"]
+
+
+class _CachingQueryStream:
+    """
+    Records the pages of a ``QueryStream`` and caches them when it is exhausted.
+    """
+
+    def __init__(self, cache: ResultCacheService, sql_query, database_name, stream):
+        self._cache = cache
+        self._sql_query = sql_query
+        self._database_name = database_name
+        self._stream = stream
+        self._rows = []
+        self._stored = False
+        self.columns = stream.columns
+
+    @property
+    def exhausted(self):
+        return self._stream.exhausted
+
+    @property
+    def truncated(self):
+        return self._stream.truncated
+
+    def fetch_page(self):
+        rows = self._stream.fetch_page()
+        self._rows.extend(rows)
+        if self._stream.exhausted and not self._stored:
+            self._stored = True
+            self._cache.put(self._sql_query, self._database_name,
+                            QueryResult(columns=self.columns, rows=self._rows, truncated=self.truncated))
+        return rows
+
+    def __iter__(self):
+        while True:
+            rows = self.fetch_page()
+            if not rows:
+                break
+            yield rows
+
+    def to_result(self):
+        rows = []
+        for batch in self:
+            rows.extend(batch)
+        return QueryResult(columns=self.columns, rows=rows, truncated=self.truncated)
+
+    def close(self):
+        # Closing before the end leaves a partial result, which is not cached
+        self._stored = True
+        self._stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,279 @@
+"""Service for keeping schema embeddings in the vector database up to date."""
+
+import hashlib
+import logging
+import threading
+import time
+
+import metrics
+from services.schema_service import SchemaService
+from services.embedding_service import EmbeddingService
+from services.vector_search_service import VectorSearchService
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text):
+    """
+    Computes a stable hash of a schema document.
+
+    Args:
+        text (str): Document text.
+
+    Returns:
+        str: Hex-encoded SHA-256 digest.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def table_doc_id(server, database_name, table_full_name):
+    """
+    Builds the vector database identifier of a table document.
+
+    Args:
+        server (str): Server name.
+        database_name (str): Database name.
+        table_full_name (str): ``schema.table`` name.
+
+    Returns:
+        str: Document identifier, e.g. ``sqlprod01/Sales:dbo.Orders``.
+    """
+    return f"{server}/{database_name}:{table_full_name}"
+
+
+def schema_filter(server, database_name=None):
+    """
+    Builds the metadata filter that scopes vector search to one server, and
+    optionally one database on it.
+
+    Args:
+        server (str): Server name.
+        database_name (str, optional): Database name.
+
+    Returns:
+        dict: Chroma-style ``where`` filter.
+    """
+    if database_name is None:
+        return {"server": server}
+    return {"$and": [{"server": server}, {"database": database_name}]}
+
+
+class SchemaIndexingService:
+    """
+    Ingestion stage that keeps one vector database document per table. Tables are
+    embedded and upserted only when their content hash differs from the one stored
+    alongside them, and documents of dropped tables are deleted.
+    """
+
+    def __init__(self, schema_service: SchemaService,
+                 embedding_service: EmbeddingService,
+                 vector_search_service: VectorSearchService):
+        """
+        Initializes the SchemaIndexingService with its dependencies.
+
+        Args:
+            schema_service (SchemaService): Schema extraction service.
+            embedding_service (EmbeddingService): Embedding generation service.
+            vector_search_service (VectorSearchService): Vector database service.
+        """
+        self.schema_service = schema_service
+        self.embedding_service = embedding_service
+        self.vector_search_service = vector_search_service
+        self._indexed_schemas = {}
+        self._indexed_hashes = {}
+        self._refreshing = set()
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def index_schema(self, database_name):
+        """
+        Ensures the current schema of a database is indexed, one document per table.
+
+        Args:
+            database_name (str): Database on the server, stored as document metadata.
+
+        Returns:
+            DatabaseSchema: Current structured schema.
+        """
+        try:
+            with metrics.span("schema_fetch"):
+                schema = self.schema_service.get_schema(database_name)
+            # The schema service hands out the same object until the schema changes.
+            if self._indexed_schemas.get(database_name) is schema:
+                return schema
+
+            # Once a database is indexed, do not wait for a sync running in another
+            # thread (such as the background refresher); the previous index serves
+            # until it finishes.
+            indexed = database_name in self._indexed_schemas
+            if indexed and database_name in self._refreshing:
+                return schema
+            lock = self._database_lock(database_name)
+            if not lock.acquire(blocking=not indexed):
+                return schema
+            try:
+                if self._indexed_schemas.get(database_name) is not schema and database_name not in self._refreshing:
+                    self._sync(database_name, schema)
+                    self._indexed_schemas[database_name] = schema
+            finally:
+                lock.release()
+            return schema
+        except Exception as e:
+            raise Exception(f"Failed to index schema: {str(e)}")
+
+    def refresh_schema(self, database_name, batch_size=None, throttle=None):
+        """
+        Forces a fingerprint check of a database and indexes whatever changed.
+        Meant for background refreshes: changes to an indexed database are
+        embedded and upserted ``batch_size`` at a time, and ``throttle`` is called
+        after each batch. No lock is held meanwhile, so requests keep using the
+        previous index instead of waiting. A database that is not indexed yet is
+        indexed at full speed, since requests for it have to wait either way.
+
+        Args:
+            database_name (str): Database on the server.
+            batch_size (int, optional): Tables embedded per batch. Defaults to all.
+            throttle (Callable[[float], None], optional): Called with the seconds
+                the batch took, e.g. to sleep in proportion.
+
+        Returns:
+            bool: True if the index was updated.
+        """
+        try:
+            with metrics.span("schema_fetch"):
+                schema = self.schema_service.refresh(database_name)
+            if database_name not in self._indexed_schemas:
+                self.index_schema(database_name)
+                return True
+
+            with self._database_lock(database_name):
+                if self._indexed_schemas.get(database_name) is schema:
+                    return False
+                self._refreshing.add(database_name)
+            try:
+                self._sync(database_name, schema, batch_size, throttle)
+                self._indexed_schemas[database_name] = schema
+            finally:
+                self._refreshing.discard(database_name)
+            return True
+        except Exception as e:
+            raise Exception(f"Failed to refresh schema index: {str(e)}")
+
+    def indexed_databases(self):
+        """
+        Lists the databases indexed by this process.
+
+        Returns:
+            List[str]: Database names.
+        """
+        return list(self._indexed_schemas)
+
+    def is_indexed(self, database_name):
+        """
+        Checks whether a database has been indexed by this process.
+
+        Args:
+            database_name (str): Database name.
+
+        Returns:
+            bool: True if an earlier ``index_schema`` call completed.
+        """
+        return database_name in self._indexed_schemas
+
+    def indexed_table_count(self, database_name):
+        """
+        Counts the table documents of a database, as of its last sync.
+
+        Args:
+            database_name (str): Database name.
+
+        Returns:
+            int or None: Number of tables, or None if not synced by this process.
+        """
+        indexed = self._indexed_hashes.get(database_name)
+        return None if indexed is None else len(indexed)
+
+    def index_databases(self, database_names):
+        """
+        Ensures the current schemas of several databases are indexed.
+
+        Args:
+            database_names (Iterable[str]): Databases on the server.
+        """
+        for database_name in database_names:
+            self.index_schema(database_name)
+
+    def _database_lock(self, database_name):
+        with self._lock:
+            return self._locks.setdefault(database_name, threading.Lock())
+
+    def _sync(self, database_name, schema, batch_size=None, throttle=None):
+        """
+        Upserts added or altered tables and deletes dropped ones.
+
+        Args:
+            database_name (str): Database name.
+            schema (DatabaseSchema): Current structured schema.
+            batch_size (int, optional): Tables embedded per batch. Defaults to all.
+            throttle (Callable[[float], None], optional): Called with the seconds
+                each batch took.
+        """
+        indexed = self._indexed_hashes.get(database_name)
+        if indexed is None:
+            stored = self.vector_search_service.get_schema_metadata(
+                where=schema_filter(self.schema_service.server, database_name)
+            )
+            indexed = {doc_id: metadata.get("content_hash") for doc_id, metadata in stored.items()}
+
+        current = {}
+        changed = []
+        for table in schema.tables.values():
+            doc_id = table_doc_id(self.schema_service.server, database_name, table.full_name)
+            document = table.render()
+            document_hash = content_hash(document)
+            current[doc_id] = document_hash
+            if indexed.get(doc_id) != document_hash:
+                changed.append((doc_id, table, document, document_hash))
+
+        if changed:
+            logger.info(f"Re-embedding {len(changed)} changed tables of {database_name}")
+        batch_size = batch_size or len(changed) or 1
+        for start in range(0, len(changed), batch_size):
+            batch_started = time.monotonic()
+            self._upsert(database_name, changed[start:start + batch_size])
+            if throttle is not None:
+                throttle(time.monotonic() - batch_started)
+
+        dropped = [doc_id for doc_id in indexed if doc_id not in current]
+        if dropped:
+            logger.info(f"Deleting {len(dropped)} dropped tables of {database_name}")
+            self.vector_search_service.delete_schema_embeddings(dropped)
+            metrics.increment("tables_deleted_total", len(dropped))
+
+        self._indexed_hashes[database_name] = current
+
+    def _upsert(self, database_name, changed):
+        """
+        Embeds and upserts ``(doc_id, table, document, document_hash)`` entries.
+        """
+        with metrics.span("embed", kind="tables"):
+            embedding_vectors = self.embedding_service.generate_embeddings(
+                [document for _, _, document, _ in changed]
+            )
+        with metrics.span("vector_upsert"):
+            self.vector_search_service.add_schema_embeddings(
+                doc_ids=[doc_id for doc_id, _, _, _ in changed],
+                schema_texts=[document for _, _, document, _ in changed],
+                embedding_vectors=embedding_vectors,
+                metadatas=[
+                    {
+                        "server": self.schema_service.server,
+                        "database": database_name,
+                        "schema": table.schema_name,
+                        "table": table.name,
+                        "content_hash": document_hash,
+                    }
+                    for _, table, _, document_hash in changed
+                ]
+            )
+        metrics.increment("tables_embedded_total", len(changed))
@@ -0,0 +1,113 @@
+"""Background thread that keeps the schema index in step with the databases."""
+
+import logging
+import threading
+import time
+
+import metrics
+from config import Config
+from services.schema_indexing_service import SchemaIndexingService
+
+logger = logging.getLogger(__name__)
+
+
+class SchemaRefresher:
+    """
+    Polls the catalog fingerprint of every registered database and re-indexes
+    changes off the request path: added or altered tables are embedded and
+    upserted, dropped tables are deleted from the vector database.
+
+    Registered databases are the configured ones plus any the agent has indexed
+    since. Work is throttled to a CPU duty cycle: after each step the thread
+    sleeps in proportion to the time the step took.
+    """
+
+    def __init__(self, schema_indexing_service: SchemaIndexingService, database_names=None,
+                 interval=Config.SCHEMA_REFRESH_INTERVAL,
+                 batch_size=Config.SCHEMA_REFRESH_BATCH_SIZE,
+                 max_duty_cycle=Config.SCHEMA_REFRESH_MAX_DUTY_CYCLE):
+        """
+        Args:
+            schema_indexing_service (SchemaIndexingService): Index to keep fresh.
+            database_names (List[str], optional): Databases to watch. Defaults to
+                ``Config.DB_DATABASES``, or the configured database.
+            interval (float, optional): Seconds between polls. Keep it below
+                ``SCHEMA_CACHE_CHECK_INTERVAL`` so requests never do the check.
+            batch_size (int, optional): Tables embedded per step.
+            max_duty_cycle (float, optional): Fraction of wall time the thread may
+                spend working, between 0 and 1.
+        """
+        self.schema_indexing_service = schema_indexing_service
+        self.database_names = list(database_names or Config.DB_DATABASES
+                                   or [schema_indexing_service.schema_service.default_database])
+        self.interval = interval
+        self.batch_size = batch_size
+        self.max_duty_cycle = min(max(max_duty_cycle, 0.01), 1.0)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Starts the daemon thread. The first pass runs immediately.
+
+        Returns:
+            SchemaRefresher: This refresher.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="schema-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Signals the thread to stop and waits for it to exit.
+
+        Args:
+            timeout (float, optional): Seconds to wait.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def refresh_once(self):
+        """
+        Checks every registered database once, indexing any changes.
+
+        Returns:
+            List[str]: Databases whose index was updated.
+        """
+        updated = []
+        for database_name in self._registered_databases():
+            if self._stop.is_set():
+                break
+            started = time.monotonic()
+            try:
+                with metrics.span("schema_refresh", database=database_name):
+                    if self.schema_indexing_service.refresh_schema(database_name, self.batch_size, self._throttle):
+                        updated.append(database_name)
+            except Exception as e:
+                # Requests still index on demand; try again on the next pass
+                logger.warning(f"Failed to refresh schema index of {database_name}: {str(e)}")
+            self._throttle(time.monotonic() - started)
+        if updated:
+            logger.info(f"Schema index refreshed for: {', '.join(updated)}")
+        return updated
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_once()
+            self._stop.wait(self.interval)
+
+    def _registered_databases(self):
+        names = list(self.database_names)
+        for database_name in self.schema_indexing_service.indexed_databases():
+            if database_name not in names:
+                names.append(database_name)
+        return names
+
+    def _throttle(self, busy_seconds):
+        """
+        Sleeps long enough to keep the work below the duty cycle.
+        """
+        if self.max_duty_cycle < 1.0:
+            self._stop.wait(busy_seconds * (1.0 - self.max_duty_cycle) / self.max_duty_cycle)
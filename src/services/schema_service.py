@@ -1,35 +1,214 @@
 """Service for managing database schema operations."""
 
+import threading
+import time
+
+from config import Config
+from models.schema_models import DatabaseSchema
 from repositories.mssql_repository import MSSQLRepository
+from repositories.schema_cache_repository import SchemaCacheRepository
+
+# Above this many changed tables a full extraction is cheaper than a filtered one
+# (and stays below the 2100 parameter limit of SQL Server).
+_MAX_INCREMENTAL_TABLES = 500
+
+
+class _CacheEntry:
+    """
+    In-memory cached schema together with its rendered text.
+    """
+
+    def __init__(self, fingerprint, schema):
+        self.fingerprint = fingerprint
+        self.schema = schema
+        self.text = schema.render()
+        self.checked_at = time.monotonic()
 
 
 class SchemaService:
     """
     Service layer for extracting and formatting database schema details.
+
+    Any database on the configured server can be served; schemas are cached in
+    memory and on disk, keyed by server and database. The
+    cache is validated with a cheap catalog fingerprint at most once per
+    ``check_interval`` seconds, and only tables whose definitions changed are
+    re-extracted.
     """
 
-    def __init__(self, db_repository: MSSQLRepository):
+    def __init__(self, db_repository: MSSQLRepository,
+                 cache_repository: SchemaCacheRepository = None,
+                 check_interval=Config.SCHEMA_CACHE_CHECK_INTERVAL):
         """
         Initializes the SchemaService with a database repository.
 
         Args:
             db_repository (MSSQLRepository): Database repository instance.
+            cache_repository (SchemaCacheRepository, optional): On-disk cache.
+                Defaults to the snapshot at ``Config.SCHEMA_CACHE_PATH``.
+            check_interval (float, optional): Seconds between fingerprint checks.
         """
         self.db_repository = db_repository
+        self.cache_repository = cache_repository or SchemaCacheRepository(Config.SCHEMA_CACHE_PATH)
+        self.check_interval = check_interval
+        self._entries = {}
+        self._locks = {}
+        self._lock = threading.Lock()
 
-    def get_schema_text(self):
+    @property
+    def server(self):
+        return self.db_repository.server
+
+    @property
+    def default_database(self):
+        return self.db_repository.database
+
+    def cache_key(self, database_name=None):
+        return f"{self.server}/{database_name or self.default_database}"
+
+    def get_schema(self, database_name=None):
+        """
+        Retrieves the structured schema, refreshing the cache if it is stale.
+
+        Args:
+            database_name (str, optional): Database on the server. Defaults to the
+                configured database.
+
+        Returns:
+            DatabaseSchema: Structured schema of the database.
+        """
+        return self._get_entry(database_name).schema
+
+    def get_schema_text(self, database_name=None):
         """
         Retrieves and formats the full schema details from the database.
 
+        Args:
+            database_name (str, optional): Database on the server. Defaults to the
+                configured database.
+
         Returns:
             str: Formatted text containing table names and their columns.
         """
+        return self._get_entry(database_name).text
+
+    def get_fingerprint(self, database_name=None):
+        """
+        Retrieves the catalog fingerprint of the cached schema.
+
+        Args:
+            database_name (str, optional): Database on the server. Defaults to the
+                configured database.
+
+        Returns:
+            str: Fingerprint that changes whenever the schema changes.
+        """
+        return self._get_entry(database_name).fingerprint
+
+    def list_databases(self):
+        """
+        Lists the user databases on the server.
+
+        Returns:
+            List[str]: Database names.
+        """
+        return self.db_repository.list_databases()
+
+    def refresh(self, database_name=None):
+        """
+        Forces a fingerprint check, re-extracting changed tables if needed.
+
+        Args:
+            database_name (str, optional): Database on the server. Defaults to the
+                configured database.
+
+        Returns:
+            DatabaseSchema: Structured schema of the database.
+        """
+        database_name = database_name or self.default_database
+        with self._database_lock(database_name):
+            return self._refresh(database_name, self._entries.get(self.cache_key(database_name))).schema
+
+    def _database_lock(self, database_name):
+        with self._lock:
+            return self._locks.setdefault(database_name, threading.Lock())
+
+    def _get_entry(self, database_name):
+        database_name = database_name or self.default_database
+        key = self.cache_key(database_name)
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.checked_at < self.check_interval:
+            return entry
+
+        with self._database_lock(database_name):
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry.checked_at < self.check_interval:
+                return entry
+            return self._refresh(database_name, entry)
+
+    def _refresh(self, database_name, entry):
+        key = self.cache_key(database_name)
         try:
-            schema_text = self.db_repository.fetch_schema_details()
-            return schema_text
+            if entry is None:
+                stored = self.cache_repository.load(key)
+                if stored is not None:
+                    entry = _CacheEntry(stored["fingerprint"], DatabaseSchema.from_dict(stored["schema"]))
+
+            fingerprint = self.db_repository.fetch_schema_fingerprint(database=database_name)
+            if entry is not None and entry.fingerprint == fingerprint:
+                entry.checked_at = time.monotonic()
+                self._entries[key] = entry
+                return entry
+
+            if entry is None:
+                schema = self.db_repository.fetch_schema(database=database_name)
+            else:
+                schema = self._apply_changes(database_name, entry.schema)
+
+            entry = _CacheEntry(fingerprint, schema)
+            self._entries[key] = entry
+            self.cache_repository.save(key, {"fingerprint": fingerprint, "schema": schema.to_dict()})
+            return entry
         except Exception as e:
             raise Exception(f"Failed to fetch schema details: {str(e)}")
 
+    def _apply_changes(self, database_name, cached_schema):
+        """
+        Builds an up-to-date schema, re-extracting only new or altered tables.
+
+        Args:
+            database_name (str): Database on the server.
+            cached_schema (DatabaseSchema): Previously extracted schema.
+
+        Returns:
+            DatabaseSchema: Updated schema.
+        """
+        versions = self.db_repository.fetch_table_versions(database=database_name)
+        cached_by_id = {table.object_id: table for table in cached_schema.tables.values()}
+
+        current_names = {full_name for full_name, _ in versions.values()}
+        removed_names = set(cached_schema.tables) - current_names
+
+        changed_ids = []
+        for object_id, (full_name, modify_date) in versions.items():
+            cached = cached_by_id.get(object_id)
+            if (cached is None or cached.full_name != full_name or cached.modify_date != modify_date
+                    or any(fk.referenced_full_name in removed_names for fk in cached.foreign_keys)):
+                changed_ids.append(object_id)
+
+        if len(changed_ids) > _MAX_INCREMENTAL_TABLES:
+            return self.db_repository.fetch_schema(database=database_name)
+
+        changed = self.db_repository.fetch_schema(object_ids=changed_ids, database=database_name) if changed_ids else None
+        changed_by_id = {table.object_id: table for table in changed.tables.values()} if changed else {}
+
+        schema = DatabaseSchema(database_name=cached_schema.database_name)
+        for object_id, (full_name, _) in sorted(versions.items(), key=lambda item: item[1][0]):
+            table = changed_by_id.get(object_id) or cached_by_id.get(object_id)
+            if table is not None:
+                schema.add_table(table)
+        return schema
+
     def close_connection(self):
         """
         Closes the database connection via repository.
@@ -0,0 +1,247 @@
+"""Service for caching generated SQL by question."""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import numpy as np
+
+from config import Config
+
+
+def normalize_question(question):
+    """
+    Normalizes a natural language question for exact cache lookups.
+
+    Args:
+        question (str): User question.
+
+    Returns:
+        str: Lower-cased question with collapsed whitespace and no trailing punctuation.
+    """
+    return re.sub(r"\s+", " ", question).strip().rstrip("?.!;").strip().lower()
+
+
+_LITERAL_PATTERN = re.compile(r"'([^']*)'|\"([^\"]*)\"|\b(\w*\d\w*(?:[.,:/-]\d+)*)")
+
+
+def literal_tokens(question):
+    """
+    Extracts the literals of a question: words containing digits (numbers,
+    dates, decimals, ``Q3``) and quoted strings. Questions that differ only in
+    these embed almost identically, but need different SQL.
+
+    Args:
+        question (str): User question.
+
+    Returns:
+        tuple: Sorted, lower-cased literal tokens.
+    """
+    return tuple(sorted("".join(match).lower() for match in _LITERAL_PATTERN.findall(question)))
+
+
+@dataclass
+class CachedSQL:
+    """
+    SQL served from the cache, with the SQL guard results of its generation so
+    that cache hits carry the same cost and warnings as the first answer.
+    """
+    sql_query: str
+    question: str
+    estimated_cost: Optional[float] = None
+    guard_warnings: List[str] = field(default_factory=list)
+
+
+class _SQLCacheEntry:
+    """
+    Cached SQL for a single question.
+    """
+
+    def __init__(self, question, database_name, fingerprint, sql_query, question_embedding,
+                 estimated_cost=None, guard_warnings=None):
+        self.question = question
+        self.literals = literal_tokens(question)
+        self.database_name = database_name
+        self.fingerprint = fingerprint
+        self.sql_query = sql_query
+        self.estimated_cost = estimated_cost
+        self.guard_warnings = list(guard_warnings or [])
+        self.embedding = None
+        if question_embedding is not None:
+            embedding = np.asarray(question_embedding, dtype=np.float32)
+            norm = np.linalg.norm(embedding)
+            self.embedding = embedding / norm if norm else embedding
+        self.created_at = time.monotonic()
+
+    def to_cached_sql(self):
+        return CachedSQL(self.sql_query, self.question, self.estimated_cost, list(self.guard_warnings))
+
+
+class SQLCacheService:
+    """
+    Generated-SQL cache with exact lookups on the normalized question and
+    near-duplicate lookups by question embedding similarity.
+
+    Entries are scoped to a database and its schema fingerprint, evicted LRU
+    beyond ``max_entries`` and expire after ``ttl_seconds``. When a database's
+    fingerprint changes, all of its entries are invalidated.
+    """
+
+    def __init__(self, max_entries=Config.SQL_CACHE_MAX_ENTRIES,
+                 ttl_seconds=Config.SQL_CACHE_TTL_SECONDS,
+                 similarity_threshold=Config.SQL_CACHE_SIMILARITY_THRESHOLD):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_entries (int, optional): Maximum number of cached questions.
+            ttl_seconds (float, optional): Lifetime of an entry.
+            similarity_threshold (float, optional): Minimum cosine similarity for a
+                near hit. Values above 1 disable near hits.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._fingerprints = {}
+        self._lock = threading.Lock()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def get_exact(self, user_query, database_name, fingerprint):
+        """
+        Looks up SQL generated for the same normalized question.
+
+        Args:
+            user_query (str): User question.
+            database_name (str): Database name.
+            fingerprint (str): Current schema fingerprint.
+
+        Returns:
+            CachedSQL or None: Cached SQL query.
+        """
+        key = (normalize_question(user_query), database_name, fingerprint)
+        with self._lock:
+            self._check_fingerprint(database_name, fingerprint)
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self._is_expired(entry):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.exact_hits += 1
+            return entry.to_cached_sql()
+
+    def get_similar(self, user_query, question_embedding, database_name, fingerprint):
+        """
+        Looks up SQL generated for a near-identical question. Only questions with
+        the same numeric and quoted literals qualify, so "orders in 2023" never
+        reuses the SQL of "orders in 2024". Counts a miss when nothing is found,
+        so it should be called after ``get_exact``.
+
+        Args:
+            user_query (str): User question.
+            question_embedding (array-like): Embedding of the user question.
+            database_name (str): Database name.
+            fingerprint (str): Current schema fingerprint.
+
+        Returns:
+            CachedSQL or None: Cached SQL query and the question it was generated for.
+        """
+        query = np.asarray(question_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        literals = literal_tokens(user_query)
+        with self._lock:
+            self._check_fingerprint(database_name, fingerprint)
+            candidates = [
+                (key, entry) for key, entry in self._entries.items()
+                if entry.database_name == database_name and entry.fingerprint == fingerprint
+                and entry.embedding is not None and entry.literals == literals
+                and not self._is_expired(entry)
+            ]
+            if candidates and norm and self.similarity_threshold <= 1:
+                matrix = np.stack([entry.embedding for _, entry in candidates])
+                similarities = matrix @ (query / norm)
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.semantic_hits += 1
+                    return entry.to_cached_sql()
+            self.misses += 1
+            return None
+
+    def put(self, user_query, database_name, fingerprint, sql_query, question_embedding=None,
+            estimated_cost=None, guard_warnings=None):
+        """
+        Stores generated SQL for a question.
+
+        Args:
+            user_query (str): User question.
+            database_name (str): Database name.
+            fingerprint (str): Schema fingerprint the SQL was generated against.
+            sql_query (str): Generated SQL query.
+            question_embedding (array-like, optional): Embedding of the question,
+                enables near hits.
+            estimated_cost (float, optional): Estimated plan cost from the SQL guard.
+            guard_warnings (List[str], optional): Warnings from the SQL guard.
+        """
+        key = (normalize_question(user_query), database_name, fingerprint)
+        with self._lock:
+            self._check_fingerprint(database_name, fingerprint)
+            self._entries[key] = _SQLCacheEntry(
+                user_query, database_name, fingerprint, sql_query, question_embedding,
+                estimated_cost, guard_warnings
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, database_name=None):
+        """
+        Drops cached entries.
+
+        Args:
+            database_name (str, optional): Only drop entries of this database.
+        """
+        with self._lock:
+            if database_name is None:
+                self._entries.clear()
+                self._fingerprints.clear()
+                return
+            self._drop_database(database_name)
+            self._fingerprints.pop(database_name, None)
+
+    def stats(self):
+        """
+        Returns cache counters.
+
+        Returns:
+            dict: Entry count, exact hits, semantic hits, misses and hit rate.
+        """
+        with self._lock:
+            lookups = self.exact_hits + self.semantic_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0,
+            }
+
+    def _check_fingerprint(self, database_name, fingerprint):
+        if self._fingerprints.get(database_name) not in (None, fingerprint):
+            self._drop_database(database_name)
+        self._fingerprints[database_name] = fingerprint
+
+    def _drop_database(self, database_name):
+        for key in [key for key, entry in self._entries.items() if entry.database_name == database_name]:
+            del self._entries[key]
+
+    def _is_expired(self, entry):
+        return time.monotonic() - entry.created_at > self.ttl_seconds
@@ -0,0 +1,284 @@
+"""Validation, limits and cost checks for generated SQL before it is executed."""
+
+import logging
+import re
+
+from config import Config
+from models.guarded_query import GuardedQuery
+from repositories.mssql_repository import MSSQLRepository
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(
+    r"(?P<comment>--[^\n]*|/\*.*?\*/)"
+    r"|(?P<string>N?'(?:[^']|'')*')"
+    r"|(?P<quoted>\[(?:[^\]]|\]\])*\]|\"(?:[^\"]|\"\")*\")"
+    r"|(?P<word>[A-Za-z_@#][\w@#$]*)"
+    r"|(?P<number>\d+(?:\.\d+)?)"
+    r"|(?P<punct>\S)",
+    re.DOTALL
+)
+
+# Keywords that can modify data, schema, server state or reach outside the
+# database. None of them can appear in a plain read-only SELECT.
+_FORBIDDEN_KEYWORDS = {
+    "INSERT", "UPDATE", "DELETE", "MERGE", "INTO", "CREATE", "ALTER", "DROP", "TRUNCATE",
+    "EXEC", "EXECUTE", "DECLARE", "SET", "GRANT", "REVOKE", "DENY", "BACKUP", "RESTORE",
+    "DBCC", "KILL", "SHUTDOWN", "RECONFIGURE", "USE", "WAITFOR", "BULK", "OPENROWSET",
+    "OPENQUERY", "OPENDATASOURCE", "OPENXML", "BEGIN", "COMMIT", "ROLLBACK", "SAVE",
+}
+_STATEMENT_KEYWORDS = {"SELECT", "INSERT", "UPDATE", "DELETE", "MERGE"}
+_SET_OPERATORS = {"UNION", "EXCEPT", "INTERSECT"}
+_NORMALIZED_KEYWORDS = {
+    "SELECT", "DISTINCT", "ALL", "TOP", "PERCENT", "FROM", "WHERE", "GROUP", "BY", "HAVING",
+    "ORDER", "ASC", "DESC", "JOIN", "INNER", "LEFT", "RIGHT", "FULL", "OUTER", "CROSS", "APPLY",
+    "ON", "AND", "OR", "NOT", "IN", "IS", "NULL", "LIKE", "BETWEEN", "EXISTS", "AS", "WITH",
+    "CASE", "WHEN", "THEN", "ELSE", "END", "OPTION", "MAXDOP", "OFFSET", "FETCH", "NEXT",
+    "ROWS", "ONLY", "OVER", "PARTITION",
+} | _SET_OPERATORS
+_COST_PATTERN = re.compile(r'StatementSubTreeCost="([0-9.eE+-]+)"')
+
+
+def normalize_sql(sql_query):
+    """
+    Normalizes SQL text for cache lookups: comments, trailing semicolons and
+    whitespace differences are removed and keywords are upper-cased, while
+    string literals and identifiers are kept as they are.
+
+    Args:
+        sql_query (str): SQL text.
+
+    Returns:
+        str: Space-separated tokens.
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer(sql_query):
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+        text = match.group()
+        if kind == "word" and text.upper() in _NORMALIZED_KEYWORDS:
+            text = text.upper()
+        tokens.append(text)
+    while tokens and tokens[-1] == ";":
+        tokens.pop()
+    return " ".join(tokens)
+
+
+class SQLGuardError(Exception):
+    """Raised when generated SQL must not be executed."""
+
+
+class _Token:
+    __slots__ = ("kind", "text", "start", "end", "depth")
+
+    def __init__(self, kind, text, start, end, depth):
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+        self.depth = depth
+
+    def is_word(self, *words):
+        return self.kind == "word" and self.text.upper() in words
+
+
+class SQLGuardService:
+    """
+    Guard stage between SQL generation and execution.
+
+    Only a single SELECT statement (optionally with CTEs) is accepted. The guard
+    caps the rows with ``TOP``, the parallelism with ``OPTION (MAXDOP ...)``,
+    estimates the plan cost with ``SET SHOWPLAN_XML`` and refuses, or warns about,
+    queries above the cost threshold. Guarded queries run on the repository's
+    read-only pool, whose connections carry a per-statement timeout.
+    """
+
+    def __init__(self, sql_executor: MSSQLRepository,
+                 max_rows=Config.QUERY_MAX_ROWS,
+                 maxdop=Config.SQL_GUARD_MAXDOP,
+                 cost_threshold=Config.SQL_GUARD_COST_THRESHOLD,
+                 cost_action=Config.SQL_GUARD_COST_ACTION,
+                 estimate_cost=Config.SQL_GUARD_ESTIMATE_COST):
+        """
+        Args:
+            sql_executor (MSSQLRepository): Repository used for cost estimation.
+            max_rows (int, optional): Row limit injected as ``TOP``; one extra row
+                is requested so truncation can still be detected.
+            maxdop (int, optional): Degree of parallelism hint, 0 to leave it to the server.
+            cost_threshold (float, optional): Estimated subtree cost above which
+                ``cost_action`` applies, 0 to disable.
+            cost_action (str, optional): ``reject`` or ``warn``.
+            estimate_cost (bool, optional): Request an estimated plan for each query.
+        """
+        if cost_action not in ("reject", "warn"):
+            raise ValueError(f"Unknown cost action: {cost_action}")
+        self.sql_executor = sql_executor
+        self.max_rows = max_rows
+        self.maxdop = maxdop
+        self.cost_threshold = cost_threshold
+        self.cost_action = cost_action
+        self.estimate_cost = estimate_cost
+
+    def guard(self, sql_query, database_name=None):
+        """
+        Validates a query, injects its limits and checks its estimated cost.
+
+        Args:
+            sql_query (str): Generated SQL.
+            database_name (str, optional): Database the query will run in.
+
+        Returns:
+            GuardedQuery: SQL to execute, estimated cost and warnings.
+
+        Raises:
+            SQLGuardError: If the query is not a single SELECT or is too expensive.
+        """
+        tokens, main_select = self._parse(sql_query)
+        warnings = []
+        sql = self._apply_limits(sql_query, tokens, main_select, warnings)
+
+        estimated_cost = None
+        if self.estimate_cost:
+            try:
+                estimated_cost = self._estimate_cost(sql, database_name)
+            except Exception as e:
+                logger.warning(f"Could not estimate query cost: {str(e)}")
+                warnings.append("Estimated cost unavailable")
+
+        if estimated_cost is not None and self.cost_threshold and estimated_cost > self.cost_threshold:
+            message = f"Estimated query cost {estimated_cost:.2f} exceeds the threshold of {self.cost_threshold}"
+            if self.cost_action == "reject":
+                raise SQLGuardError(message)
+            warnings.append(message)
+
+        for warning in warnings:
+            logger.warning(f"SQL guard: {warning}")
+        return GuardedQuery(sql=sql, original_sql=sql_query, estimated_cost=estimated_cost, warnings=warnings)
+
+    def validate(self, sql_query):
+        """
+        Checks that a query is a single read-only SELECT without changing it.
+
+        Args:
+            sql_query (str): SQL to check.
+
+        Raises:
+            SQLGuardError: If the query is not a single SELECT.
+        """
+        self._parse(sql_query)
+
+    def _parse(self, sql_query):
+        """
+        Tokenizes the query and locates its main SELECT.
+
+        Returns:
+            tuple: (code tokens, index of the main SELECT token).
+        """
+        tokens = []
+        depth = 0
+        for match in _TOKEN_PATTERN.finditer(sql_query):
+            kind = match.lastgroup
+            if kind == "comment":
+                continue
+            text = match.group()
+            if text == ")":
+                depth -= 1
+            tokens.append(_Token(kind, text, match.start(), match.end(), depth))
+            if text == "(":
+                depth += 1
+            if depth < 0:
+                raise SQLGuardError("Unbalanced parentheses")
+        if depth != 0:
+            raise SQLGuardError("Unbalanced parentheses")
+
+        while tokens and tokens[-1].text == ";":
+            tokens.pop()
+        if not tokens:
+            raise SQLGuardError("Empty query")
+        if any(token.text == ";" for token in tokens):
+            raise SQLGuardError("Only a single statement is allowed")
+
+        for token in tokens:
+            if token.kind == "word" and token.text.upper() in _FORBIDDEN_KEYWORDS:
+                raise SQLGuardError(f"Keyword not allowed in a read-only query: {token.text.upper()}")
+
+        if tokens[0].is_word("SELECT"):
+            return tokens, 0
+        if tokens[0].is_word("WITH"):
+            # The statement after the CTE list is the first top-level statement keyword
+            for index, token in enumerate(tokens):
+                if token.depth == 0 and token.kind == "word" and token.text.upper() in _STATEMENT_KEYWORDS:
+                    if token.is_word("SELECT"):
+                        return tokens, index
+                    break
+        raise SQLGuardError("Only SELECT statements are allowed")
+
+    def _apply_limits(self, sql_query, tokens, main_select, warnings):
+        """
+        Injects or tightens ``TOP`` and adds ``OPTION (MAXDOP ...)``.
+        """
+        edits = []
+        top_level = [token for token in tokens[main_select:] if token.depth == 0]
+
+        if self.max_rows:
+            limit = self.max_rows + 1
+            if any(token.kind == "word" and token.text.upper() in _SET_OPERATORS | {"OFFSET"}
+                   for token in top_level):
+                warnings.append("Row limit not injected into a set operation or OFFSET query; "
+                                "rows are capped while fetching")
+            else:
+                edits.extend(self._top_edits(tokens, main_select, limit))
+
+        if self.maxdop:
+            edits.extend(self._maxdop_edits(sql_query, tokens, top_level))
+
+        sql = sql_query[:tokens[-1].end]
+        for start, end, text in sorted(edits, reverse=True):
+            sql = sql[:start] + text + sql[end:]
+        return sql
+
+    @staticmethod
+    def _top_edits(tokens, main_select, limit):
+        index = main_select + 1
+        if index < len(tokens) and tokens[index].is_word("DISTINCT", "ALL"):
+            index += 1
+        if index >= len(tokens) or not tokens[index].is_word("TOP"):
+            return [(tokens[index - 1].end, tokens[index - 1].end, f" TOP ({limit})")]
+
+        # Existing TOP n or TOP (n): only tighten plain row counts
+        value = index + 1
+        if value < len(tokens) and tokens[value].text == "(":
+            value += 1
+        if value >= len(tokens) or tokens[value].kind != "number":
+            return []
+        after = value + (2 if tokens[index + 1].text == "(" else 1)
+        if after < len(tokens) and tokens[after].is_word("PERCENT"):
+            return []
+        if float(tokens[value].text) > limit:
+            return [(tokens[value].start, tokens[value].end, str(limit))]
+        return []
+
+    def _maxdop_edits(self, sql_query, tokens, top_level):
+        for position, token in enumerate(top_level):
+            if token.is_word("OPTION"):
+                hints = [t for t in tokens if t.start > token.start]
+                if any(t.is_word("MAXDOP") for t in hints):
+                    return []
+                if position + 1 < len(top_level) and top_level[position + 1].text == "(":
+                    opening = top_level[position + 1]
+                    return [(opening.end, opening.end, f"MAXDOP {self.maxdop}, ")]
+                return []
+        # On a new line, in case the query ends with a line comment
+        end = tokens[-1].end
+        return [(end, end, f"\nOPTION (MAXDOP {self.maxdop})")]
+
+    def _estimate_cost(self, sql_query, database_name):
+        """
+        Estimates the plan cost of a query without executing it.
+        """
+        showplan_xml = self.sql_executor.fetch_estimated_plan(sql_query, database=database_name)
+        costs = [float(cost) for cost in _COST_PATTERN.findall(showplan_xml)]
+        if not costs:
+            raise Exception("Estimated plan has no statement cost")
+        return sum(costs)
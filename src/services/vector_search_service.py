@@ -1,49 +1,83 @@
-"""Service for managing schema embedding operations in Chroma."""
+"""Service for managing schema embedding operations in the vector database."""
 
 from repositories.chroma_repository import ChromaRepository
 
 
 class VectorSearchService:
     """
-    Service layer for managing vector search operations in Chroma.
+    Service layer for managing vector search operations in the vector database (Chroma or the in-process NumPy index).
     """
 
     def __init__(self, chroma_repo: ChromaRepository):
         """
-        Initializes the VectorSearchService with a Chroma repository.
+        Initializes the VectorSearchService with a vector repository.
 
         Args:
-            chroma_repo (ChromaRepository): Chroma repository instance.
+            chroma_repo (ChromaRepository): Chroma repository instance, or any
+                repository with the same interface such as NumpyVectorRepository.
         """
         self.chroma_repo = chroma_repo
 
-    def add_schema_embedding(self, doc_id, schema_text, embedding_vector):
+    def add_schema_embedding(self, doc_id, schema_text, embedding_vector, metadata=None):
         """
-        Adds a schema embedding document to the vector database.
+        Adds or replaces a schema embedding document in the vector database.
 
         Args:
             doc_id (str): Unique document identifier.
             schema_text (str): Schema text document.
-            embedding_vector (List[float]): Embedding vector.
+            embedding_vector (np.ndarray or List[float]): Embedding vector.
+            metadata (dict, optional): Document metadata, e.g. its content hash.
         """
         try:
-            self.chroma_repo.add_embedding(doc_id, schema_text, embedding_vector)
+            self.chroma_repo.add_embedding(doc_id, schema_text, embedding_vector, metadata)
         except Exception as e:
             raise Exception(f"Failed to add schema embedding: {str(e)}")
 
-    def search_similar_schemas(self, embedding_vector, top_k=3):
+    def add_schema_embeddings(self, doc_ids, schema_texts, embedding_vectors, metadatas=None):
+        """
+        Adds or replaces several schema embedding documents in one call.
+
+        Args:
+            doc_ids (List[str]): Unique document identifiers.
+            schema_texts (List[str]): Schema text documents.
+            embedding_vectors (np.ndarray or List[List[float]]): Embedding vectors.
+            metadatas (List[dict], optional): Document metadata.
+        """
+        try:
+            self.chroma_repo.add_embeddings(doc_ids, schema_texts, embedding_vectors, metadatas)
+        except Exception as e:
+            raise Exception(f"Failed to add schema embeddings: {str(e)}")
+
+    def get_schema_metadata(self, doc_ids=None, where=None):
+        """
+        Retrieves stored metadata for schema documents.
+
+        Args:
+            doc_ids (List[str], optional): Document identifiers.
+            where (dict, optional): Metadata filter, e.g. ``{"database": "Sales"}``.
+
+        Returns:
+            dict: Mapping of document id to metadata for the documents that exist.
+        """
+        try:
+            return self.chroma_repo.get_metadata(doc_ids, where)
+        except Exception as e:
+            raise Exception(f"Failed to get schema metadata: {str(e)}")
+
+    def search_similar_schemas(self, embedding_vector, top_k=3, where=None):
         """
         Searches for similar schema embeddings in the vector database.
 
         Args:
-            embedding_vector (List[float]): Embedding vector to compare.
+            embedding_vector (np.ndarray or List[float]): Embedding vector to compare.
             top_k (int, optional): Number of similar results to retrieve. Defaults to 3.
+            where (dict, optional): Metadata filter, e.g. ``{"database": "Sales"}``.
 
         Returns:
             dict: Matching results containing documents, distances, and IDs.
         """
         try:
-            results = self.chroma_repo.query_similar_schemas(embedding_vector, top_k)
+            results = self.chroma_repo.query_similar_schemas(embedding_vector, top_k, where)
             return results
         except Exception as e:
             raise Exception(f"Failed to search similar schemas: {str(e)}")
@@ -59,3 +93,15 @@ class VectorSearchService:
             self.chroma_repo.delete_embedding(doc_id)
         except Exception as e:
             raise Exception(f"Failed to delete schema embedding: {str(e)}")
+
+    def delete_schema_embeddings(self, doc_ids):
+        """
+        Deletes several schema embeddings from the vector database.
+
+        Args:
+            doc_ids (List[str]): Document identifiers.
+        """
+        try:
+            self.chroma_repo.delete_embeddings(doc_ids)
+        except Exception as e:
+            raise Exception(f"Failed to delete schema embeddings: {str(e)}")